@@ -12,7 +12,10 @@ from datetime import datetime
 # 스크립트 경로 추가
 sys.path.insert(0, str(Path(__file__).parent / "scripts"))
 
+from answer_cache import SemanticAnswerCache
 from rag_system import RAGSystem, MockLLMBackend, OllamaBackend, ClaudeBackend
+from startup import breakdown as startup_breakdown
+from tracing import tracer
 
 # 페이지 설정
 st.set_page_config(
@@ -33,6 +36,19 @@ if 'feedback_submitted' not in st.session_state:
 
 # 피드백 저장 경로
 FEEDBACK_FILE = Path(__file__).parent / "aidata" / "feedback.json"
+# 추적 내보내기 경로 (Chrome trace / JSONL)
+TRACE_DIR = Path(__file__).parent / "aidata" / "traces"
+
+
+def trace_rows(trace: dict) -> dict:
+    """단계별 시간 표 (이름, ms, 횟수, 후보/토큰 수 등 주요 속성)"""
+    keys = ("candidates", "results", "scored", "matches", "prompt_tokens", "answer_chars")
+    return {
+        "단계": list(trace),
+        "ms": [f"{entry['ms']:.1f}" for entry in trace.values()],
+        "횟수": [entry['count'] for entry in trace.values()],
+        "정보": [", ".join(f"{k}={entry[k]}" for k in keys if entry.get(k) is not None) for entry in trace.values()]
+    }
 
 
 def save_feedback(query: str, answer: str, sources: list, rating: int, comment: str):
@@ -67,34 +83,53 @@ def save_feedback(query: str, answer: str, sources: list, rating: int, comment:
 
 
 @st.cache_resource
-def load_rag_system(backend_type: str = "mock", model: str = "qwen2:7b", api_key: str = None, use_reranker: bool = False):
-    """RAG 시스템 로드 (캐싱)"""
+def load_search_engine(inference: str = "torch"):
+    """
+    검색 엔진 (프로세스 전체에서 하나 - LLM 백엔드/모델/API 키/리랭킹 선택과 무관)
+
+    임베딩 모델, Chroma 연결, BM25 인덱스, 쿼리 임베딩 캐시를 재사용
+    (추론 엔진은 임베딩 모델 자체가 달라 엔진별로 하나)
+    """
     from rag_system import VectorSearch
 
-    # 검색 엔진 초기화 (리랭커 옵션 포함)
-    search_engine = VectorSearch(use_reranker=use_reranker)
+    search_engine = VectorSearch(persist_query_cache=True, inference=inference)
+    search_engine.warmup()  # 모델/BM25 예열 (첫 질문 지연 제거)
+    return search_engine
+
+
+@st.cache_resource
+def load_answer_cache():
+    """답변 캐시 (백엔드 간 공유, 항목은 백엔드/모델별로 구분)"""
+    return SemanticAnswerCache()
 
+
+@st.cache_resource
+def load_llm_backend(backend_type: str = "mock", model: str = "qwen2:7b", api_key: str = None):
+    """LLM 백엔드 (가벼운 객체 - 선택이 바뀌면 새로 생성)"""
     if backend_type == "ollama":
         try:
             import requests
             response = requests.get("http://localhost:11434/api/tags", timeout=2)
             if response.status_code == 200:
-                rag = RAGSystem(llm_backend=OllamaBackend(model=model))
-                rag.search_engine = search_engine
-                return rag
+                return OllamaBackend(model=model)
         except:
             st.warning("Ollama 연결 실패. Mock 모드로 전환됩니다.")
     elif backend_type == "claude":
         try:
-            rag = RAGSystem(llm_backend=ClaudeBackend(api_key=api_key, model=model))
-            rag.search_engine = search_engine
-            return rag
+            return ClaudeBackend(api_key=api_key, model=model)
         except Exception as e:
             st.error(f"Claude API 오류: {e}")
 
-    rag = RAGSystem(llm_backend=MockLLMBackend())
-    rag.search_engine = search_engine
-    return rag
+    return MockLLMBackend()
+
+
+@st.cache_resource
+def load_rag_system(backend_type: str = "mock", model: str = "qwen2:7b", api_key: str = None,
+                    inference: str = "torch"):
+    """RAG 시스템 = 공유 검색 엔진 + 선택한 LLM 백엔드 (백엔드 전환 시 모델 재로드 없음)"""
+    return RAGSystem(llm_backend=load_llm_backend(backend_type, model, api_key),
+                     search_engine=load_search_engine(inference),
+                     answer_cache=load_answer_cache())
 
 
 def main():
@@ -152,7 +187,16 @@ def main():
         use_hybrid = st.checkbox("하이브리드 검색 (BM25+Vector)", value=True,
                                  help="키워드+의미 검색 결합. Part 15E 같은 정확한 검색에 효과적")
         use_rerank = st.checkbox("리랭킹 (CrossEncoder)", value=False,
-                                 help="검색 결과 재정렬. 더 정확하지만 느림")
+                                 help="융합 점수로 순위가 애매한 후보만 CrossEncoder로 재정렬 (점수 캐시)")
+        inference = st.selectbox("추론 엔진", ["torch", "onnx"], index=0,
+                                 help="onnx: int8 양자화 ONNX Runtime (CPU 전용 PC에서 빠름, onnx_models.py export 필요)")
+        fusion = st.selectbox("점수 융합", ["weighted", "rrf", "zscore"], index=0,
+                              help="weighted: 기존 가중 합 / rrf: 순위 기반 / zscore: 분포 보정",
+                              disabled=not use_hybrid)
+        use_routing = st.checkbox("자동 라우팅", value=True,
+                                  help="KDB/RSS 번호, CFR 조항, Test Report 언급 시 해당 문서만 우선 검색")
+        use_mmr = st.checkbox("결과 다양화 (MMR)", value=True,
+                              help="비슷한 청크를 줄이고 문서당 최대 2개 청크만 표시")
 
         # 컬렉션 선택
         st.subheader("검색 대상")
@@ -187,7 +231,16 @@ def main():
 
     # RAG 시스템 로드
     with st.spinner("시스템 로딩 중..."):
-        rag = load_rag_system(backend_type, model, api_key, use_rerank)
+        rag = load_rag_system(backend_type, model, api_key, inference)
+        if use_rerank:
+            # 리랭커는 처음 켤 때 공유 검색 엔진에 붙임 (CrossEncoder는 백그라운드 로드)
+            rag.search_engine.attach_reranker(prewarm=True)
+    if rag.search_engine.unified:
+        st.sidebar.caption("통합 컬렉션(regulatory_corpus): 검색 대상 선택은 source_type 필터로 적용")
+    with st.sidebar.expander("⏱️ 시작 시간"):
+        # 프로세스 시작 후 단계별 누적 시간 (콜드 스타트 회귀 확인용, 기록은 scripts/startup.py)
+        timings = startup_breakdown()
+        st.table({"단계": list(timings), "ms": [f"{seconds * 1000:.0f}" for seconds in timings.values()]})
 
     # 메인 영역
     col1, col2 = st.columns([2, 1])
@@ -225,17 +278,24 @@ def main():
                 search_mode = "리랭킹 검색 중..."
 
             with st.spinner(search_mode):
-                # Q&A 검색 먼저
-                qa_matches = rag.search_engine.search_qa(query, n_results=2, threshold=0.5)
-
-                # 문서 검색 수행
-                search_results = rag.search_engine.search(
+                # Q&A + 문서 검색 (한 번만 수행 - AI 답변 생성 시 같은 후보 재사용)
+                retrieval = rag.retrieve(
                     query,
                     collections=collections if collections else None,
                     n_results=n_results,
                     hybrid=use_hybrid,
-                    rerank=use_rerank
+                    rerank=use_rerank,
+                    fusion=fusion,
+                    route=use_routing,
+                    mmr=use_mmr,
+                    max_per_doc=2 if use_mmr else None
                 )
+                qa_matches = retrieval.qa_matches
+                search_results = retrieval.sources
+
+            if retrieval.routing and retrieval.routing.routed:
+                st.caption(f"라우팅: {', '.join(retrieval.routing.collections)} "
+                           f"(BM25 {1 - retrieval.routing.vector_weight:.0%})")
 
             # Q&A 매칭 결과 표시
             if qa_matches:
@@ -262,7 +322,8 @@ def main():
                         f"[{i+1}] {result.doc_id} - 유사도: {similarity:.1f}%",
                         expanded=(i == 0)
                     ):
-                        st.markdown(f"**파일:** `{result.source_file}`")
+                        page = f" (p.{result.page_num})" if result.page_num else ""
+                        st.markdown(f"**파일:** `{result.source_file}`{page}")
                         st.markdown(f"**유형:** {result.source_type.upper()}")
                         st.markdown("**내용:**")
                         st.text_area(
@@ -277,11 +338,30 @@ def main():
                 if backend_type in ["ollama", "claude"] and (backend_type != "claude" or api_key):
                     st.markdown("---")
                     st.subheader("🤖 AI 답변")
-                    with st.spinner("답변 생성 중..."):
-                        response = rag.ask(query, n_results=n_results)
-                        st.markdown(response.answer)
-                        st.session_state.last_response = response
-                        st.session_state.feedback_submitted = False
+                    # 토큰 스트리밍 표시 (첫 토큰까지의 시간이 체감 지연)
+                    stream = rag.ask_stream(query, retrieval=retrieval)
+                    st.write_stream(stream)
+                    response = stream.to_response()
+                    st.session_state.last_response = response
+                    st.session_state.feedback_submitted = False
+                    if stream.answer_source == "qa":
+                        st.caption(f"✅ 검증된 Q&A 답변 (LLM 생략, 약 {stream.latency_saved:.1f}초 절약)")
+                    elif stream.answer_source == "cache":
+                        st.caption(f"♻️ 답변 캐시 (유사 질문의 이전 답변, {stream.latency_saved:.1f}초 절약)")
+                    elif stream.error:
+                        st.error("LLM 응답 중 오류가 발생했습니다 - 이 답변은 캐시에 저장되지 않습니다.")
+                    elif stream.time_to_first_token is not None:
+                        prompt_note = " / 축약 프롬프트" if stream.answer_source == "llm_short" else ""
+                        st.caption(f"첫 토큰 {stream.time_to_first_token:.1f}초 / "
+                                   f"전체 {stream.total_time:.1f}초{prompt_note}")
+                    if response.trace:
+                        with st.expander("⏱️ 단계별 시간"):
+                            st.table(trace_rows(response.trace))
+                    # 답변 인용 검증 (조항 색인에 없는 인용 경고)
+                    unverified = [f"{c.citation} (상위 조항 {c.matched_key}만 확인)" if c.matched_key else c.citation
+                                  for c in response.citations or [] if not c.found]
+                    if unverified:
+                        st.warning(f"색인에서 확인되지 않은 인용: {', '.join(unverified)}")
 
                     # 피드백 UI
                     st.markdown("---")
@@ -338,6 +418,37 @@ def main():
         for key, value in stats.items():
             st.metric(key, value)
 
+        # 쿼리 임베딩 캐시 통계
+        cache_stats = rag.search_engine.embedding_cache.stats()
+        st.caption(
+            f"임베딩 캐시: 히트 {cache_stats['hits'] + cache_stats['disk_hits']} / "
+            f"미스 {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})"
+        )
+
+        # 답변 빠른 경로 통계 (검증된 Q&A / 답변 캐시)
+        answer_stats = rag.answer_stats()
+        st.caption(
+            f"답변 캐시: 히트 {answer_stats['cache_hits']} / 미스 {answer_stats['cache_misses']} · "
+            f"Q&A 바로 답변 {answer_stats['qa']} · 축약 프롬프트 {answer_stats['llm_short']} · "
+            f"절약 {answer_stats['saved_seconds']:.1f}초"
+        )
+
+        # 단계별 지연 분포 (최근 요청 기준 rolling p50/p95)
+        latency = tracer.percentiles()
+        if latency:
+            with st.expander("⏱️ 단계별 지연 (p50/p95)"):
+                st.table({
+                    "단계": list(latency),
+                    "p50 ms": [f"{v['p50_ms']:.1f}" for v in latency.values()],
+                    "p95 ms": [f"{v['p95_ms']:.1f}" for v in latency.values()],
+                    "n": [v['count'] for v in latency.values()]
+                })
+                if st.button("추적 내보내기"):
+                    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    count = tracer.export_chrome_trace(TRACE_DIR / f"rag_trace_{stamp}.json")
+                    tracer.export_jsonl(TRACE_DIR / "rag_spans.jsonl")
+                    st.success(f"{count}개 span 저장: {TRACE_DIR} (chrome://tracing 또는 Perfetto)")
+
         st.markdown("---")
 
         # 검색 히스토리
@@ -1,23 +1,31 @@
 """
 Test Report만 벡터DB에 추가하는 스크립트
+(증분 manifest 사용 - 이미 색인된 리포트는 건너뛰고 새/수정된 파일만 임베딩, 추출은 CPU 코어 수만큼 병렬)
 """
 import sys
 sys.path.insert(0, str(__file__).replace('\\add_testreports.py', ''))
 
-from vectordb_pipeline import process_testreport_documents, VectorDBBuilder, logger
+from vectordb_pipeline import ingest_testreports, load_manifest, VectorDBBuilder, VECTOR_DB_DIR, logger
+from vector_store import UNIFIED_COLLECTION, LAYOUT_UNIFIED, read_layout
 
 def main():
     logger.info("Test Report 추가 시작")
 
-    # Test Report 처리
-    collection, chunks = process_testreport_documents()
+    # 검색 엔진이 읽는 컬렉션에 추가 (통합 구성이면 regulatory_corpus)
+    unified = read_layout(VECTOR_DB_DIR) == LAYOUT_UNIFIED
+    collection_name = UNIFIED_COLLECTION if unified else "fcc_testreport"
 
-    if chunks > 0:
-        logger.info(f"\n완료: {chunks}개 청크 추가됨")
+    # Test Report 처리 (임베딩 모델은 검색 테스트와 공유)
+    builder = VectorDBBuilder()
+    collection, indexer = ingest_testreports(collection_name, manifest=load_manifest(builder),
+                                             workers=0,  # 전체 코어로 추출
+                                             builder=builder)
+
+    if indexer is not None and indexer.embedded_chunks > 0:
+        logger.info(f"\n완료 ({collection_name}): {indexer.summary()}")
 
         # 검색 테스트
         logger.info("\n검색 테스트:")
-        builder = VectorDBBuilder()
 
         test_queries = [
             "spurious emission limit",
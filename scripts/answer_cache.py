@@ -0,0 +1,132 @@
+"""
+AI 자동화 시스템 - 의미 기반 답변 캐시
+LLM이 생성한 답변을 쿼리 임베딩으로 저장하고, 거의 같은 질문(코사인 유사도 임계값 이상)이
+다시 들어오면 LLM 호출 없이 바로 반환 (TTL 만료 + LRU 제거)
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """캐시 항목"""
+    query: str
+    answer: str
+    embedding: np.ndarray              # L2 정규화된 쿼리 임베딩
+    generation_seconds: float          # 원래 LLM 생성에 걸린 시간 (히트 시 절약 시간)
+    scope: str = ""
+    created_at: float = field(default_factory=time.monotonic)
+    similarity: float = 0.0            # 조회 시 채워짐
+
+
+class SemanticAnswerCache:
+    """
+    쿼리 임베딩 → 생성된 답변 (스레드 안전)
+
+    - 조회: 저장된 쿼리 임베딩과 코사인 유사도가 threshold 이상인 가장 가까운 항목
+      (질문이 조금만 달라도 답이 달라질 수 있으므로 임계값은 엄격하게)
+    - scope: LLM 백엔드/모델 또는 검색된 출처 문서가 다르면 다른 답변으로 취급
+    - TTL이 지난 항목은 조회 시 제거, max_size 초과 시 가장 오래 사용하지 않은 항목 제거
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_size: int = 256):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+
+        self._entries = OrderedDict()  # id -> CachedAnswer
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _purge_expired(self, now: float):
+        """TTL 만료 항목 제거 (lock 보유 상태에서 호출)"""
+        if self.ttl_seconds is None:
+            return
+        stale = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in stale:
+            del self._entries[key]
+        self.expired += len(stale)
+
+    def lookup(self, embedding: List[float], scope: str = "") -> Optional[CachedAnswer]:
+        """임계값 이상으로 가장 유사한 답변 (없으면 None)"""
+        if embedding is None:
+            return None
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            keys = [key for key, entry in self._entries.items() if entry.scope == scope]
+            if keys:
+                matrix = np.stack([self._entries[key].embedding for key in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    entry = self._entries[key]
+                    entry.similarity = float(similarities[best])
+                    self.hits += 1
+                    self.saved_seconds += entry.generation_seconds
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding: List[float], answer: str, generation_seconds: float,
+            scope: str = ""):
+        """생성된 답변 저장 (빈 답변은 저장하지 않음)"""
+        if embedding is None or not answer.strip():
+            return
+        entry = CachedAnswer(query=query, answer=answer, embedding=self._normalize(embedding),
+                             generation_seconds=generation_seconds, scope=scope)
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """캐시 통계 (hit/miss, 절약한 LLM 시간)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'saved_seconds': self.saved_seconds,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'size': len(self._entries)
+            }
+
+    def clear(self):
+        """항목 및 통계 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expired = self.evictions = 0
+            self.saved_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 처리량 벤치마크 - 이전 방식 vs 공유 모델 + 길이순 대용량 배치
+
+- 이전: 소스마다 VectorDBBuilder (파이프라인 실행당 모델 로드 5회), 파일 순서대로 50개씩 encode
+- 이후: 모델 1회 로드, 문서 경계 없이 pool_size개를 토큰 길이순 정렬 후 가용 RAM 기준 배치로 encode
+- 입력: 벡터DB에 저장된 청크 (컬렉션별 저장 순서 = 파일 순서)
+- 출력: embeddings/sec, 패딩 비율 (패딩 포함 토큰 / 실제 토큰), 모델 로드 시간
+- --scaling: 임베딩 프로세스 1/2/4/8개의 처리량과 확장 효율 (N개 처리량 / (N × 1개 처리량))
+
+사용법:
+    python benchmark_embedding.py --limit 2000
+    python benchmark_embedding.py --inference onnx --batch-size 128
+    python benchmark_embedding.py --scaling --limit 8000
+"""
+import sys
+import time
+import argparse
+from collections import deque
+
+sys.path.insert(0, '.')
+from vectordb_pipeline import VECTOR_DB_DIR, VectorDBBuilder, TextChunk
+from vector_store import ChromaVectorStore
+
+COLLECTIONS = ["fcc_kdb", "fcc_ecfr", "ised_rss", "fcc_testreport"]
+LEGACY_BATCH = 50          # 이전 add_chunks 배치
+LEGACY_ENCODE_BATCH = 32   # SentenceTransformer.encode 기본 배치
+LEGACY_MODEL_LOADS = 5     # KDB/eCFR/RSS/Test Report/test_search 각각 로드
+
+
+def load_texts(limit: int) -> list:
+    """컬렉션별 저장 순서대로 청크 본문 (컬렉션마다 limit/4개)"""
+    store = ChromaVectorStore(VECTOR_DB_DIR)
+    texts = []
+    for name in COLLECTIONS:
+        try:
+            collection = store.get_collection(name)
+            texts.extend(collection.get(include=['documents'], limit=max(1, limit // len(COLLECTIONS)))['documents'])
+        except Exception as e:
+            print(f"{name} 없음 - 건너뜀 ({e})")
+    return texts
+
+
+def padded_tokens(lengths: list, call_size: int, encode_batch: int) -> int:
+    """encode 호출(call_size개)마다 길이순 정렬 후 encode_batch로 나눴을 때 패딩 포함 토큰 수"""
+    total = 0
+    for start in range(0, len(lengths), call_size):
+        call = sorted(lengths[start:start + call_size])
+        for i in range(0, len(call), encode_batch):
+            batch = call[i:i + encode_batch]
+            total += max(batch) * len(batch)
+    return total
+
+
+def measure_workers(texts: list, workers: int, inference: str, batch_size: int = None) -> dict:
+    """임베딩 프로세스 workers개로 texts 전체 처리량 (풀 시작/모델 로드 제외, 결과는 제출 순서대로 수집)"""
+    builder = VectorDBBuilder(inference=inference, batch_size=batch_size, embed_workers=workers)
+    chunks = [TextChunk(chunk_id=str(i), source_file="", source_type="", doc_id="", page_num=None,
+                        chunk_index=i, content=text, metadata={}) for i, text in enumerate(texts)]
+    builder.embed(chunks[:8])  # 풀 시작 + 예열
+    pending = deque()
+    started = time.perf_counter()
+    for i in range(0, len(chunks), builder.pool_size):
+        pending.append(builder.embed_async(chunks[i:i + builder.pool_size]))
+        while len(pending) > builder.in_flight:
+            pending.popleft().result()
+    while pending:
+        pending.popleft().result()
+    seconds = time.perf_counter() - started
+    result = {'requested': workers, 'workers': builder.embed_workers, 'threads': builder.embed_threads,
+              'batch': builder.batch_size, 'rate': len(texts) / seconds}
+    builder.close()
+    return result
+
+
+def scaling_report(texts: list, inference: str, batch_size: int = None):
+    """프로세스 1/2/4/8개 처리량 표 (코어/RAM이 부족해 줄어든 경우 실제 프로세스 수 표시)"""
+    results = [measure_workers(texts, workers, inference, batch_size) for workers in (1, 2, 4, 8)]
+    base = results[0]['rate']
+    print(f"\n{len(texts)} chunks, inference {inference}")
+    print(f"{'requested':>10}{'workers':>9}{'threads':>9}{'batch':>7}{'embeddings/s':>15}{'speedup':>9}{'efficiency':>12}")
+    for r in results:
+        speedup = r['rate'] / base
+        print(f"{r['requested']:>10}{r['workers']:>9}{r['threads'] or '-':>9}{r['batch']:>7}{r['rate']:>15.1f}"
+              f"{speedup:>8.2f}x{speedup / r['workers']:>11.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 처리량 벤치마크 (이전 vs 이후)")
+    parser.add_argument('--limit', type=int, default=2000, help="측정할 청크 수")
+    parser.add_argument('--inference', choices=['torch', 'onnx'], default='torch')
+    parser.add_argument('--batch-size', type=int, help="이후 방식 encode 배치 (기본: 가용 RAM 기준 자동)")
+    parser.add_argument('--scaling', action='store_true', help="임베딩 프로세스 1/2/4/8개 확장 효율")
+    args = parser.parse_args()
+
+    texts = load_texts(args.limit)
+    if not texts:
+        print("청크가 없습니다 - vectordb_pipeline.py로 먼저 구축하세요")
+        return
+    if args.scaling:
+        scaling_report(texts, args.inference, args.batch_size)
+        return
+
+    started = time.perf_counter()
+    builder = VectorDBBuilder(inference=args.inference, batch_size=args.batch_size)
+    builder.model.get()
+    load_seconds = time.perf_counter() - started
+    builder.model.encode(texts[:8])  # 예열
+
+    # 이전: 파일 순서 50개씩
+    started = time.perf_counter()
+    for i in range(0, len(texts), LEGACY_BATCH):
+        builder.model.encode(texts[i:i + LEGACY_BATCH])
+    legacy_seconds = time.perf_counter() - started
+
+    # 이후: pool_size개씩 길이순 정렬 + RAM 기준 배치
+    chunks = [TextChunk(chunk_id=str(i), source_file="", source_type="", doc_id="", page_num=None,
+                        chunk_index=i, content=text, metadata={}) for i, text in enumerate(texts)]
+    started = time.perf_counter()
+    for i in range(0, len(chunks), builder.pool_size):
+        builder.embed(chunks[i:i + builder.pool_size])
+    pooled_seconds = time.perf_counter() - started
+
+    lengths = builder.token_lengths(texts)
+    real = sum(lengths)
+    legacy_padding = padded_tokens(lengths, LEGACY_BATCH, LEGACY_ENCODE_BATCH) / real
+    pooled_padding = padded_tokens(lengths, builder.pool_size, builder.batch_size) / real
+
+    print(f"\n{len(texts)} chunks, model {builder.model_name} ({builder.inference})")
+    print(f"{'mode':<10}{'batch':>12}{'embeddings/s':>15}{'padding':>10}{'model load s':>15}")
+    print(f"{'before':<10}{f'{LEGACY_BATCH}/{LEGACY_ENCODE_BATCH}':>12}{len(texts) / legacy_seconds:>15.1f}"
+          f"{legacy_padding:>10.2f}{load_seconds * LEGACY_MODEL_LOADS:>15.1f}")
+    print(f"{'after':<10}{f'{builder.pool_size}/{builder.batch_size}':>12}{len(texts) / pooled_seconds:>15.1f}"
+          f"{pooled_padding:>10.2f}{load_seconds:>15.1f}")
+    print(f"\nspeedup {legacy_seconds / pooled_seconds:.2f}x "
+          f"(모델 로드 {LEGACY_MODEL_LOADS}회 → 1회, 이전 로드 시간은 1회 측정값 × {LEGACY_MODEL_LOADS})")
+
+
+if __name__ == '__main__':
+    main()
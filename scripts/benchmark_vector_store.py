@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+벡터 저장소 벤치마크 - Chroma(HNSW) vs NumPy memory-map(float32 / int8)
+
+- 쿼리 세트: 테스트 스크립트 쿼리 + qa_pairs 질문 샘플
+- 지연시간: 쿼리 하나로 4개 컬렉션 벡터 검색 (p50 / p95)
+- 재현율: float32 정확 검색 top-k 대비 recall@k
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, '.')
+from rag_system import VECTOR_DB_DIR
+from vector_store import ChromaVectorStore, NumpyVectorStore
+from embedding_cache import QueryEmbeddingCache
+from sentence_transformers import SentenceTransformer
+
+COLLECTIONS = ["fcc_kdb", "fcc_ecfr", "ised_rss", "fcc_testreport"]
+
+QUERIES = [
+    'Part 15E', 'FCC part 15E', '15.407', 'U-NII 5GHz power limit', 'DFS test procedure',
+    'DFS 테스트 절차', 'RF 노출 제한', 'module certification requirements', 'RF exposure limits',
+    'RSS-247 power limit', 'RSS-Gen receiver emissions', 'KDB 789033 measurement procedure',
+    'test report UNII 6E', 'conducted output power measurement', '2.4 GHz 대역 출력 제한',
+    'SAR exclusion threshold', 'radiated spurious emissions limit', 'power spectral density limit',
+]
+
+
+def load_queries(store: ChromaVectorStore, sample: int) -> list:
+    """기본 쿼리 + qa_pairs 질문 샘플"""
+    queries = list(QUERIES)
+    try:
+        qa = store.get_collection("qa_pairs")
+        questions = qa.get(include=['documents'], limit=sample * 4)['documents']
+        rng = np.random.default_rng(0)
+        picked = rng.choice(len(questions), size=min(sample, len(questions)), replace=False)
+        queries.extend(questions[i] for i in sorted(picked))
+    except Exception as e:
+        print(f"qa_pairs 없음 - 기본 쿼리만 사용 ({e})")
+    return queries
+
+
+def run(collections: dict, embeddings: list, k: int) -> tuple:
+    """쿼리별 전체 컬렉션 검색 → (지연시간 ms 목록, 쿼리별 {컬렉션: top-k ID})"""
+    latencies, results = [], []
+    for embedding in embeddings:
+        start = time.perf_counter()
+        hits = {}
+        for name, col in collections.items():
+            result = col.query(query_embeddings=[embedding], n_results=k, include=['distances'])
+            hits[name] = result['ids'][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(hits)
+    return latencies, results
+
+
+def recall(results: list, reference: list) -> float:
+    found = total = 0
+    for hits, truth in zip(results, reference):
+        for name, ids in truth.items():
+            found += len(set(hits.get(name, [])) & set(ids))
+            total += len(ids)
+    return found / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy 벡터 저장소 벤치마크")
+    parser.add_argument('--k', type=int, default=15, help="컬렉션별 top-k (기본: search()의 n_results*3)")
+    parser.add_argument('--qa-sample', type=int, default=100, help="qa_pairs 질문 샘플 수")
+    parser.add_argument('--store-dir', default=str(VECTOR_DB_DIR / "numpy_store_bench"),
+                        help="벤치마크용 NumPy 저장소 디렉토리 (float32/int8 하위 디렉토리)")
+    parser.add_argument('--rebuild', action='store_true', help="NumPy 저장소 다시 내보내기")
+    args = parser.parse_args()
+
+    chroma = ChromaVectorStore(VECTOR_DB_DIR)
+    queries = load_queries(chroma, args.qa_sample)
+
+    model_name = "all-MiniLM-L6-v2"
+    encoder = QueryEmbeddingCache(SentenceTransformer(model_name), model_name)
+    embeddings = [encoder.encode(q) for q in queries]
+
+    stores = {}
+    for label, quantize in [('float32', False), ('int8', True)]:
+        path = Path(args.store_dir) / label
+        if args.rebuild or not (path / "manifest.json").exists():
+            print(f"Exporting {label} store → {path}")
+            NumpyVectorStore.export(chroma, path, collections=COLLECTIONS, quantize=quantize)
+        stores[label] = NumpyVectorStore.load(path)
+
+    backends = {'chroma': {name: chroma.get_collection(name) for name in COLLECTIONS}}
+    for label, store in stores.items():
+        backends[f'numpy-{label}'] = {name: store.get_collection(name) for name in COLLECTIONS}
+
+    # 예열 (모델/페이지 캐시) 후 측정
+    for collections in backends.values():
+        run(collections, embeddings[:3], args.k)
+    measured = {label: run(collections, embeddings, args.k) for label, collections in backends.items()}
+
+    reference = measured['numpy-float32'][1]
+    print(f"\n{len(queries)} queries x {len(COLLECTIONS)} collections, k={args.k}")
+    print(f"{'backend':<16}{'p50 ms':>10}{'p95 ms':>10}{'recall@k':>10}{'vs chroma':>11}{'memory MB':>11}")
+    for label, (latencies, results) in measured.items():
+        store = stores.get(label.replace('numpy-', ''))
+        memory = f"{store.memory_bytes() / 1e6:.1f}" if store and label != 'chroma' else "-"
+        print(f"{label:<16}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+              f"{recall(results, reference):>10.3f}{recall(results, measured['chroma'][1]):>11.3f}{memory:>11}")
+
+
+if __name__ == '__main__':
+    main()
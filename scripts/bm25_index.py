@@ -0,0 +1,257 @@
+"""
+AI 자동화 시스템 - 희소 역색인 BM25 엔진
+CSR 형태의 역색인으로 쿼리 토큰의 포스팅만 점수화하고 top-k만 선택
+BM25Okapi(rank_bm25)와 동일한 점수/순위를 보장
+"""
+
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷 포맷 버전 (토큰화/키워드 규칙이 바뀌면 올려서 재구축 유도)
+SNAPSHOT_VERSION = 1
+
+
+class SparseBM25Index:
+    """
+    BM25Okapi 호환 희소 역색인
+    - indptr/doc_idx/tf: 용어별 포스팅 리스트 (CSR)
+    - idf: 용어별 IDF (BM25Okapi의 epsilon floor 동일 적용)
+    - doc_norm: 문서별 k1 * (1 - b + b * dl / avgdl) 사전 계산
+    - ids: 문서 인덱스 -> 청크 ID (옵션)
+    """
+
+    def __init__(self, vocab: Dict[str, int], idf: np.ndarray, indptr: np.ndarray,
+                 doc_idx: np.ndarray, tf: np.ndarray, doc_norm: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25, meta: Dict = None,
+                 ids: List[str] = None):
+        self.vocab = vocab
+        self.idf = idf
+        self.indptr = indptr
+        self.doc_idx = doc_idx
+        self.tf = tf
+        self.doc_norm = doc_norm
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.meta = meta or {}
+        self.ids = ids
+        self.corpus_size = len(doc_norm)
+
+    @classmethod
+    def build(cls, tokenized_docs: List[List[str]], k1: float = 1.5, b: float = 0.75,
+              epsilon: float = 0.25, meta: Dict = None, ids: List[str] = None) -> 'SparseBM25Index':
+        """토큰화된 문서 목록으로 역색인 구축"""
+        vocab = {}          # term -> term id (첫 등장 순서 = BM25Okapi의 nd 순서)
+        postings = []       # term id -> [(doc, tf), ...]
+        doc_len = []
+
+        for doc_i, document in enumerate(tokenized_docs):
+            doc_len.append(len(document))
+            frequencies = {}
+            for word in document:
+                frequencies[word] = frequencies.get(word, 0) + 1
+            for word, freq in frequencies.items():
+                term_id = vocab.get(word)
+                if term_id is None:
+                    term_id = vocab[word] = len(postings)
+                    postings.append([])
+                postings[term_id].append((doc_i, freq))
+
+        corpus_size = len(doc_len)
+        avgdl = sum(doc_len) / corpus_size if corpus_size else 0.0
+
+        # IDF (BM25Okapi._calc_idf와 동일한 순서/수식)
+        idf = np.zeros(len(postings), dtype=np.float64)
+        idf_sum = 0
+        negative_idfs = []
+        for term_id, plist in enumerate(postings):
+            freq = len(plist)
+            value = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            idf[term_id] = value
+            idf_sum += value
+            if value < 0:
+                negative_idfs.append(term_id)
+        if postings:
+            eps = epsilon * (idf_sum / len(postings))
+            for term_id in negative_idfs:
+                idf[term_id] = eps
+
+        # CSR 배열
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        for term_id, plist in enumerate(postings):
+            indptr[term_id + 1] = indptr[term_id] + len(plist)
+        doc_idx = np.fromiter((d for plist in postings for d, _ in plist), dtype=np.int32, count=int(indptr[-1]))
+        tf = np.fromiter((f for plist in postings for _, f in plist), dtype=np.int32, count=int(indptr[-1]))
+
+        lengths = np.array(doc_len, dtype=np.int64)
+        doc_norm = k1 * (1 - b + b * lengths / avgdl) if corpus_size else np.zeros(0)
+
+        return cls(vocab, idf, indptr, doc_idx, tf, doc_norm, k1=k1, b=b, epsilon=epsilon, meta=meta, ids=ids)
+
+    def _accumulate(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        쿼리 토큰의 포스팅만 누적 → (점수가 계산된 문서 인덱스 오름차순, 해당 점수)
+
+        배열 크기는 포스팅 합집합 크기 - 코퍼스 크기만큼의 점수 배열을 만들지 않음
+        (문서별 합산은 토큰 순서대로라 BM25Okapi와 같은 부동소수점 결과)
+        """
+        docs_parts, score_parts = [], []
+        for token in query_tokens:  # 중복 토큰도 BM25Okapi처럼 매번 누적
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.doc_idx[start:end]
+            tf = self.tf[start:end]
+            docs_parts.append(docs)
+            score_parts.append(self.idf[term_id] * (tf * (self.k1 + 1) / (tf + self.doc_norm[docs])))
+
+        if not docs_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        touched, inverse = np.unique(np.concatenate(docs_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts), minlength=len(touched))
+        return touched.astype(np.int64), scores
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """전체 문서 점수 (BM25Okapi.get_scores 호환, 패리티 검증용 - 검색 경로는 top_k 사용)"""
+        touched, values = self._accumulate(query_tokens)
+        scores = np.zeros(self.corpus_size)
+        scores[touched] = values
+        return scores
+
+    def top_k(self, query_tokens: List[str], k: int,
+              allowed: np.ndarray = None) -> Tuple[List[int], List[float], float]:
+        """
+        상위 k개 문서 선택
+
+        BM25Okapi 점수를 내림차순 안정 정렬한 것과 동일한 순서를 반환
+        (동점은 문서 인덱스 오름차순, 포스팅이 없는 문서는 점수 0으로 채움)
+
+        Args:
+            allowed: 후보로 허용할 문서 인덱스 (오름차순, None이면 전체) - 메타데이터 필터용
+
+        Returns:
+            (문서 인덱스 목록, 점수 목록, 양수 최대 점수 또는 1)
+        """
+        touched, scores = self._accumulate(query_tokens)
+        return self._select_top_k(touched, scores, k, allowed)
+
+    def top_k_many(self, queries_tokens: List[List[str]], k: int,
+                   allowed: np.ndarray = None) -> List[Tuple[List[int], List[float], float]]:
+        """여러 쿼리의 top-k (쿼리마다 포스팅만 누적)"""
+        return [self.top_k(query_tokens, k, allowed) for query_tokens in queries_tokens]
+
+    def _select_top_k(self, touched: np.ndarray, scores: np.ndarray, k: int,
+                      allowed: np.ndarray = None) -> Tuple[List[int], List[float], float]:
+        """포스팅이 있는 문서 점수에서 BM25Okapi 정렬 순서와 같은 top-k 선택"""
+        if allowed is not None:
+            mask = np.isin(touched, allowed)
+            touched, scores = touched[mask], scores[mask]
+        k = min(k, self.corpus_size if allowed is None else len(allowed))
+        if k <= 0:
+            return [], [], 1
+
+        positive = scores > 0
+        pos_docs, pos_scores = touched[positive], scores[positive]
+        max_score = float(pos_scores.max()) if len(pos_docs) else 1
+
+        # 양수 점수 후보 중 top-k (argpartition 후 경계 동점까지 포함해 정렬)
+        if len(pos_docs) > k:
+            kth = np.partition(pos_scores, len(pos_scores) - k)[len(pos_scores) - k]
+            keep = pos_scores >= kth
+            pos_docs, pos_scores = pos_docs[keep], pos_scores[keep]
+        order = np.lexsort((pos_docs, -pos_scores))[:k]
+        selected = [int(i) for i in pos_docs[order]]
+        selected_scores = [float(v) for v in pos_scores[order]]
+
+        # 부족하면 점수 0 문서를 인덱스 순으로 채우고, 음수 점수는 맨 뒤
+        if len(selected) < k:
+            negative = scores < 0
+            neg_docs, neg_scores = touched[negative], scores[negative]
+            skip = set(selected) | set(int(i) for i in neg_docs)
+            for i in (range(self.corpus_size) if allowed is None else allowed):
+                i = int(i)
+                if len(selected) >= k:
+                    break
+                if i not in skip:
+                    selected.append(i)
+                    selected_scores.append(0.0)
+            if len(selected) < k and len(neg_docs):
+                order = np.lexsort((neg_docs, -neg_scores))[:k - len(selected)]
+                selected.extend(int(i) for i in neg_docs[order])
+                selected_scores.extend(float(v) for v in neg_scores[order])
+
+        return selected, selected_scores, max_score
+
+    def save(self, path: Path):
+        """디스크 스냅샷 저장 (npy + json)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "meta.json").unlink(missing_ok=True)  # 기록 중에는 무효 처리
+        np.save(path / "indptr.npy", self.indptr)
+        np.save(path / "doc_idx.npy", self.doc_idx)
+        np.save(path / "tf.npy", self.tf)
+        np.save(path / "idf.npy", self.idf)
+        np.save(path / "doc_norm.npy", self.doc_norm)
+        with open(path / "vocab.json", 'w', encoding='utf-8') as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        if self.ids is not None:
+            with open(path / "ids.json", 'w', encoding='utf-8') as f:
+                json.dump(self.ids, f, ensure_ascii=False)
+        meta = dict(self.meta, version=SNAPSHOT_VERSION, k1=self.k1, b=self.b, epsilon=self.epsilon)
+        # meta.json은 마지막에 기록 → meta가 있으면 완전한 스냅샷
+        with open(path / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @staticmethod
+    def invalidate(path: Path) -> bool:
+        """
+        디스크 스냅샷 무효화 (meta.json 삭제 → 다음 로드에서 재구축)
+
+        수집 파이프라인이 컬렉션 청크를 갱신/삭제하면 호출 - 청크 ID와 문서 수가 그대로여도
+        본문이 바뀌었을 수 있어 문서 수 비교만으로는 오래된 스냅샷을 알 수 없음
+        Returns: 유효한 스냅샷이 있어 무효화했으면 True
+        """
+        meta_file = Path(path) / "meta.json"
+        if not meta_file.exists():
+            return False
+        meta_file.unlink()
+        return True
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> Optional['SparseBM25Index']:
+        """디스크 스냅샷 로드 (배열은 memory-map), 없거나 버전이 다르면 None"""
+        path = Path(path)
+        meta_file = path / "meta.json"
+        if not meta_file.exists():
+            return None
+
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        mode = 'r' if mmap else None
+        with open(path / "vocab.json", 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        ids = None
+        if (path / "ids.json").exists():
+            with open(path / "ids.json", 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+
+        return cls(
+            vocab,
+            np.load(path / "idf.npy", mmap_mode=mode),
+            np.load(path / "indptr.npy", mmap_mode=mode),
+            np.load(path / "doc_idx.npy", mmap_mode=mode),
+            np.load(path / "tf.npy", mmap_mode=mode),
+            np.load(path / "doc_norm.npy", mmap_mode=mode),
+            k1=meta['k1'], b=meta['b'], epsilon=meta['epsilon'], meta=meta, ids=ids
+        )
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""스크립트형 테스트 공용 검사 도우미 (항목별 OK/FAIL 출력 + 실패 수 집계 + 종료 코드)"""
+import sys
+
+failures = 0
+
+
+def expect(name: str, condition, detail="") -> bool:
+    """조건 검사 결과 출력 (실패하면 집계)"""
+    global failures
+    print(f"{'OK  ' if condition else 'FAIL'} {name}{f' {detail}' if detail != '' else ''}")
+    if not condition:
+        failures += 1
+    return bool(condition)
+
+
+def fail(message: str):
+    """expect로 표현하기 어려운 검사 실패 기록"""
+    global failures
+    failures += 1
+    print(f"  FAIL {message}")
+
+
+def finish():
+    """PASS/FAIL 요약 출력 후 실패가 있으면 종료 코드 1"""
+    print(f"\n{'PASS' if failures == 0 else f'FAIL ({failures})'}")
+    sys.exit(1 if failures else 0)
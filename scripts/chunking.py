@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - 문서 텍스트 추출 / 청킹
+PDF 텍스트 추출, 문단 단위 청킹, 프로세스 풀 작업 함수 (extract_and_chunk)
+모델/DB 의존성이 없어 ProcessPoolExecutor 작업 프로세스가 가볍게 import (Windows spawn 포함)
+"""
+
+import re
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# 큰 PDF는 이 페이지 수 단위로 나눠 여러 작업 프로세스에 분배
+PAGES_PER_TASK = 64
+
+
+@dataclass
+class TextChunk:
+    """텍스트 청크 데이터 구조"""
+    chunk_id: str
+    source_file: str
+    source_type: str  # kdb, ecfr, rss
+    doc_id: str
+    page_num: Optional[int]
+    chunk_index: int
+    content: str
+    metadata: Dict
+    char_start: int = 0  # 원문 텍스트 내 위치 (조항 색인용, 오버랩 포함 근사값)
+    char_end: int = 0
+
+
+class PDFExtractor:
+    """
+    PDF 텍스트 추출기
+    - PyMuPDF 사용
+    - 페이지별 텍스트 추출
+    - 테이블 구조 보존 시도
+    """
+
+    def extract(self, pdf_path: Path, page_start: int = 0, page_end: Optional[int] = None) -> List[Dict]:
+        """PDF에서 텍스트 추출 (page_start/page_end: 0부터 시작하는 페이지 구간, 큰 PDF 분할 처리용)"""
+        pages = []
+
+        try:
+            doc = fitz.open(pdf_path)
+            page_end = doc.page_count if page_end is None else min(page_end, doc.page_count)
+            for page_num in range(page_start, page_end):
+                text = doc[page_num].get_text("text")
+                # 빈 페이지 건너뛰기
+                if text.strip():
+                    pages.append({
+                        'page_num': page_num + 1,
+                        'content': self._clean_text(text)
+                    })
+            doc.close()
+            logger.info(f"Extracted {len(pages)} pages from {Path(pdf_path).name}")
+        except Exception as e:
+            logger.error(f"Failed to extract {pdf_path}: {e}")
+
+        return pages
+
+    @staticmethod
+    def page_count(pdf_path: Path) -> int:
+        """전체 페이지 수 (열 수 없으면 0)"""
+        try:
+            doc = fitz.open(pdf_path)
+            count = doc.page_count
+            doc.close()
+            return count
+        except Exception as e:
+            logger.error(f"Failed to open {pdf_path}: {e}")
+            return 0
+
+    def _clean_text(self, text: str) -> str:
+        """텍스트 정리"""
+        # 연속 공백 정리
+        text = re.sub(r'[ \t]+', ' ', text)
+        # 연속 줄바꿈 정리
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        return text.strip()
+
+
+class TextChunker:
+    """
+    텍스트 청킹기
+    - 의미 단위로 분할
+    - 오버랩 적용으로 컨텍스트 유지
+    """
+
+    def __init__(self, chunk_size: int = 800, overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def chunk(self, text: str, metadata: Dict) -> List[TextChunk]:
+        """텍스트를 청크로 분할"""
+        chunks = []
+
+        # 문단 단위로 먼저 분할 (원문 위치 포함)
+        paragraphs = self._split_paragraph_spans(text)
+
+        current_chunk = ""
+        chunk_index = 0
+        span = (0, 0)  # 현재 청크의 원문 위치
+
+        for para_start, para_end, para in paragraphs:
+            # 현재 청크 + 새 문단이 크기 제한 초과
+            if len(current_chunk) + len(para) > self.chunk_size:
+                if current_chunk:
+                    chunks.append(self._create_chunk(
+                        current_chunk, chunk_index, metadata, span
+                    ))
+                    chunk_index += 1
+
+                    # 오버랩: 마지막 부분 유지
+                    if len(current_chunk) > self.overlap:
+                        current_chunk = current_chunk[-self.overlap:] + "\n" + para
+                        span = (max(span[0], span[1] - self.overlap), para_end)
+                    else:
+                        current_chunk = para
+                        span = (para_start, para_end)
+                else:
+                    # 단일 문단이 크기 초과 - 강제 분할
+                    step = self.chunk_size - self.overlap
+                    for i, sub_chunk in enumerate(self._force_split(para)):
+                        sub_start = para_start + i * step
+                        chunks.append(self._create_chunk(
+                            sub_chunk, chunk_index, metadata, (sub_start, sub_start + len(sub_chunk))
+                        ))
+                        chunk_index += 1
+                    current_chunk = ""
+            else:
+                if current_chunk:
+                    current_chunk += "\n" + para
+                    span = (span[0], para_end)
+                else:
+                    current_chunk = para
+                    span = (para_start, para_end)
+
+        # 마지막 청크
+        if current_chunk.strip():
+            chunks.append(self._create_chunk(
+                current_chunk, chunk_index, metadata, span
+            ))
+
+        return chunks
+
+    def _split_paragraphs(self, text: str) -> List[str]:
+        """문단 분할"""
+        return [para for _, _, para in self._split_paragraph_spans(text)]
+
+    def _split_paragraph_spans(self, text: str) -> List[tuple]:
+        """문단 분할 (두 줄 이상 공백 기준) → [(시작, 끝, 문단), ...]"""
+        spans = []
+        start = 0
+        separators = list(re.finditer(r'\n\s*\n', text)) + [None]
+        for separator in separators:
+            end = separator.start() if separator else len(text)
+            segment = text[start:end]
+            para = segment.strip()
+            if para:
+                offset = start + len(segment) - len(segment.lstrip())
+                spans.append((offset, offset + len(para), para))
+            if separator:
+                start = separator.end()
+        return spans
+
+    def _force_split(self, text: str) -> List[str]:
+        """강제 분할 (긴 문단)"""
+        chunks = []
+        for i in range(0, len(text), self.chunk_size - self.overlap):
+            chunks.append(text[i:i + self.chunk_size])
+        return chunks
+
+    def _create_chunk(self, content: str, index: int, metadata: Dict, span: tuple = (0, 0)) -> TextChunk:
+        """청크 객체 생성"""
+        # 고유 ID 생성: doc_id + 파일명 해시 + 페이지 + 인덱스
+        source_file = metadata.get('source_file', 'unknown')
+        file_hash = hashlib.md5(source_file.encode()).hexdigest()[:8]
+        page_num = metadata.get('page_num', 0)
+        chunk_id = f"{metadata.get('doc_id', 'unknown')}_{file_hash}_p{page_num}_{index:04d}"
+
+        return TextChunk(
+            chunk_id=chunk_id,
+            source_file=source_file,
+            source_type=metadata.get('source_type', 'unknown'),
+            doc_id=metadata.get('doc_id', ''),
+            page_num=metadata.get('page_num'),
+            chunk_index=index,
+            content=content.strip(),
+            metadata=metadata,
+            char_start=span[0],
+            char_end=span[1]
+        )
+
+
+@dataclass
+class ExtractTask:
+    """작업 프로세스 단위 (PDF 하나 또는 큰 PDF의 페이지 구간)"""
+    path: str
+    source_type: str
+    doc_id: str
+    page_start: int = 0
+    page_end: Optional[int] = None
+    chunk_size: int = 800
+    overlap: int = 100
+    keep_text: bool = False  # 페이지 원문도 반환 (조항 색인용 - 아니면 전송량 절약)
+
+
+@dataclass
+class ExtractResult:
+    """
+    작업 결과 (프로세스 간 전송용 압축 레코드)
+
+    pages: [(페이지 번호, 페이지 텍스트 또는 None, [(청크 ID, 청크 인덱스, 내용, 문자 시작, 문자 끝), ...]), ...]
+    """
+    task: ExtractTask
+    pages: List[tuple] = field(default_factory=list)
+    page_count: int = 0       # 구간 내 전체 페이지 (빈 페이지 포함)
+    seconds: float = 0.0      # 작업 프로세스 추출+청킹 시간
+
+    def chunks(self) -> List[TextChunk]:
+        return [chunk for _, _, page_chunks in self.page_chunks() for chunk in page_chunks]
+
+    def page_chunks(self) -> List[tuple]:
+        """[(페이지 번호, 페이지 텍스트, TextChunk 목록), ...] - 부모 프로세스에서 복원"""
+        source_file = Path(self.task.path).name
+        restored = []
+        for page_num, text, records in self.pages:
+            metadata = {
+                'source_file': source_file,
+                'source_type': self.task.source_type,
+                'doc_id': self.task.doc_id,
+                'page_num': page_num
+            }
+            restored.append((page_num, text, [
+                TextChunk(chunk_id=chunk_id, source_file=source_file, source_type=self.task.source_type,
+                          doc_id=self.task.doc_id, page_num=page_num, chunk_index=index, content=content,
+                          metadata=metadata, char_start=start, char_end=end)
+                for chunk_id, index, content, start, end in records
+            ]))
+        return restored
+
+
+def extract_and_chunk(task: ExtractTask) -> ExtractResult:
+    """PDF 페이지 구간 추출 + 청킹 (ProcessPoolExecutor 작업 함수 - 모듈 최상위라 pickle 가능)"""
+    started = time.perf_counter()
+    pages = PDFExtractor().extract(Path(task.path), task.page_start, task.page_end)
+    chunker = TextChunker(chunk_size=task.chunk_size, overlap=task.overlap)
+    source_file = Path(task.path).name
+
+    result = ExtractResult(task)
+    for page in pages:
+        metadata = {
+            'source_file': source_file,
+            'source_type': task.source_type,
+            'doc_id': task.doc_id,
+            'page_num': page['page_num']
+        }
+        chunks = chunker.chunk(page['content'], metadata)
+        result.pages.append((
+            page['page_num'],
+            page['content'] if task.keep_text else None,
+            [(c.chunk_id, c.chunk_index, c.content, c.char_start, c.char_end) for c in chunks]
+        ))
+    result.page_count = task.page_end - task.page_start if task.page_end is not None else len(pages)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def split_pdf_tasks(path: Path, source_type: str, doc_id: str, chunk_size: int = 800, overlap: int = 100,
+                    keep_text: bool = False, pages_per_task: int = PAGES_PER_TASK) -> List[ExtractTask]:
+    """PDF 하나를 페이지 구간 작업으로 분할 (작은 PDF는 작업 1개)"""
+    page_count = PDFExtractor.page_count(path)
+    ranges = [(start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)] or [(0, 0)]
+    return [ExtractTask(str(path), source_type, doc_id, start, end, chunk_size, overlap, keep_text)
+            for start, end in ranges]
@@ -0,0 +1,161 @@
+"""
+AI 자동화 시스템 - 토큰 예산 기반 컨텍스트 패커
+검색 결과를 LLM 컨텍스트 창에 맞게 병합/중복 제거/선별
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 한글/CJK 문자는 대략 1자 = 1토큰, 그 외는 약 4자 = 1토큰
+_CJK_PATTERN = re.compile(r'[ᄀ-ᇿ㄰-㆏가-힣一-鿿぀-ヿ]')
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 토큰 수 추정 (한국어/영어 혼합 문서 기준)"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class PackedContext:
+    """패킹 결과"""
+    passages: list                    # 프롬프트에 들어갈 SearchResult (관련도 순)
+    context_tokens: int               # 패킹된 컨텍스트 토큰 수
+    budget_tokens: int                # 컨텍스트 예산
+    input_count: int = 0              # 입력 청크 수
+    merged: int = 0                   # 인접 청크 병합 횟수
+    deduplicated: int = 0             # 중복 제거된 청크 수
+    dropped: int = 0                  # 예산 초과로 제외된 청크 수
+    truncated: List[str] = field(default_factory=list)  # 잘려서 들어간 청크의 doc_id
+
+
+class ContextPacker:
+    """
+    컨텍스트 패커
+    1. 같은 파일의 오버랩 청크(청커 overlap=100자) 병합
+    2. 거의 같은 본문(단어 shingle Jaccard) 제거
+    3. 토큰당 관련도 순으로 예산까지 채움 (최상위 청크는 항상 포함)
+    """
+
+    def __init__(self, max_context_tokens: int = 3000, dedup_threshold: float = 0.85,
+                 min_overlap: int = 20, token_counter: Callable[[str], int] = None):
+        self.max_context_tokens = max_context_tokens
+        self.dedup_threshold = dedup_threshold
+        self.min_overlap = min_overlap
+        self.count_tokens = token_counter or estimate_tokens
+
+    def format_passage(self, result) -> str:
+        """프롬프트 내 청크 표기 (build_prompt와 동일 형식)"""
+        return f"[출처: {result.doc_id} - {result.source_file}]\n{result.content}"
+
+    def pack(self, results: list, budget_tokens: Optional[int] = None) -> PackedContext:
+        """검색 결과(관련도 순)를 예산 내로 패킹"""
+        budget = self.max_context_tokens if budget_tokens is None else min(budget_tokens, self.max_context_tokens)
+        budget = max(budget, 0)
+        packed = PackedContext(passages=[], context_tokens=0, budget_tokens=budget, input_count=len(results))
+        if not results:
+            return packed
+
+        passages, packed.merged = self._merge_neighbors(list(results))
+        passages, packed.deduplicated = self._deduplicate(passages)
+
+        sizes = [self.count_tokens(self.format_passage(p)) for p in passages]
+        separator = self.count_tokens("\n\n---\n\n")
+
+        # 최상위 청크는 항상 포함 (예산보다 크면 잘라서)
+        chosen = {0}
+        used = sizes[0]
+        if used > budget:
+            passages[0] = self._truncate(passages[0], budget)
+            packed.truncated.append(passages[0].doc_id)
+            used = self.count_tokens(self.format_passage(passages[0]))
+
+        # 나머지는 토큰당 관련도 순으로 채움
+        density = sorted(
+            range(1, len(passages)),
+            key=lambda i: (1 - passages[i].distance) / max(sizes[i], 1),
+            reverse=True
+        )
+        for i in density:
+            if used + separator + sizes[i] <= budget:
+                chosen.add(i)
+                used += separator + sizes[i]
+
+        packed.passages = [passages[i] for i in sorted(chosen)]  # 프롬프트에는 관련도 순서 유지
+        packed.context_tokens = used
+        packed.dropped = len(passages) - len(chosen)
+        return packed
+
+    def _overlap(self, first: str, second: str) -> int:
+        """first의 끝과 second의 시작이 겹치는 길이 (없으면 0)"""
+        for size in range(min(len(first), len(second)), self.min_overlap - 1, -1):
+            if first.endswith(second[:size]):
+                return size
+        return 0
+
+    def _merge_neighbors(self, passages: list):
+        """같은 파일의 연속 청크(오버랩 공유)를 하나로 병합 - 점수는 더 좋은 쪽 유지"""
+        merged_count = 0
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(passages)):
+                for j in range(len(passages)):
+                    if i == j:
+                        continue
+                    a, b = passages[i], passages[j]
+                    if a.source_file != b.source_file or a.doc_id != b.doc_id or a.content == b.content:
+                        continue  # 완전히 같은 본문은 중복 제거 단계에서 처리
+                    # 청커는 이전 청크의 마지막 overlap 글자를 다음 청크 앞에 붙임
+                    size = self._overlap(a.content[-200:], b.content[:200])
+                    if size == 0:
+                        continue
+                    combined = replace(a, content=a.content + b.content[size:],
+                                       distance=min(a.distance, b.distance))
+                    keep, drop = (i, j) if i < j else (j, i)
+                    passages[keep] = combined
+                    del passages[drop]
+                    merged_count += 1
+                    changed = True
+                    break
+                if changed:
+                    break
+        return passages, merged_count
+
+    def _shingles(self, text: str) -> set:
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < 3:
+            return {' '.join(words)}
+        return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+    def _deduplicate(self, passages: list):
+        """거의 같은 청크 제거 (관련도 높은 쪽 유지)"""
+        kept, kept_shingles = [], []
+        removed = 0
+        for passage in passages:
+            shingles = self._shingles(passage.content)
+            duplicate = False
+            for other in kept_shingles:
+                union = len(shingles | other)
+                if union and len(shingles & other) / union >= self.dedup_threshold:
+                    duplicate = True
+                    break
+            if duplicate:
+                removed += 1
+                continue
+            kept.append(passage)
+            kept_shingles.append(shingles)
+        return kept, removed
+
+    def _truncate(self, passage, budget: int):
+        """예산에 맞게 본문 뒤쪽을 잘라냄"""
+        content = passage.content
+        while content and self.count_tokens(self.format_passage(replace(passage, content=content))) > budget:
+            content = content[:int(len(content) * 0.9)]
+        return replace(passage, content=content)
@@ -0,0 +1,82 @@
+"""
+AI 자동화 시스템 - 검색 결과 다양화
+MMR(Maximal Marginal Relevance)로 최종 top-k에서 중복에 가까운 청크를 줄이고
+문서별 청크 수를 제한 (같은 Test Report가 상위를 채우는 문제 방지)
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(result) -> str:
+    """문서 단위 키 (같은 파일의 청크는 같은 문서)"""
+    return result.source_file or result.doc_id
+
+
+def mmr_select(results: List, embeddings: Dict[str, np.ndarray], k: int, lambda_mult: float = 0.7,
+               max_per_doc: Optional[int] = None, duplicate_threshold: float = 0.98) -> List:
+    """
+    MMR 선택 + 문서별 상한
+
+    score = λ * 관련도 - (1 - λ) * max(이미 고른 청크와의 코사인 유사도)
+    관련도는 입력 순서의 점수(1 - distance)를 후보 안에서 0~1로 정규화해 사용
+    (가중합/RRF/리랭커 점수 스케일과 무관하게 λ의 의미를 유지)
+
+    Args:
+        results: 관련도 순 후보 (SearchResult, chunk_id/distance 사용)
+        embeddings: 청크 ID -> 저장된 청크 임베딩 (없는 후보는 유사도 0으로 취급)
+        k: 선택할 결과 수
+        lambda_mult: 관련도 비중 (1이면 문서별 상한만 적용)
+        max_per_doc: 문서(source_file)별 최대 청크 수 (None이면 제한 없음)
+        duplicate_threshold: 이미 고른 청크와 이 이상 유사하면 중복으로 제외 (헤더/반복 표 등)
+
+    Returns:
+        선택 순서대로 결과 (distance는 그대로 유지)
+    """
+    if not results or k <= 0:
+        return []
+
+    relevance = np.array([1 - r.distance for r in results], dtype=np.float64)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(len(results))
+
+    # 정규화된 임베딩 행렬 (없는 청크는 0 벡터 → 유사도 0)
+    dim = next((len(v) for v in embeddings.values() if v is not None), 0)
+    matrix = np.zeros((len(results), dim), dtype=np.float32)
+    for i, result in enumerate(results):
+        vector = embeddings.get(result.chunk_id)
+        if vector is not None and dim:
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                matrix[i] = vector / norm
+
+    max_similarity = np.zeros(len(results))
+    available = np.ones(len(results), dtype=bool)
+    per_doc = {}
+    selected = []
+
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))  # 동점이면 원래 순위가 앞선 후보
+        available[best] = False
+
+        if max_similarity[best] >= duplicate_threshold:
+            continue
+        key = document_key(results[best])
+        if max_per_doc is not None and per_doc.get(key, 0) >= max_per_doc:
+            continue
+        per_doc[key] = per_doc.get(key, 0) + 1
+        selected.append(results[best])
+        if dim:
+            max_similarity = np.maximum(max_similarity, matrix @ matrix[best])
+
+    if len(selected) < len(results):
+        logger.debug(f"MMR: {len(selected)}/{len(results)} candidates, "
+                     f"{len(per_doc)} documents (λ={lambda_mult}, max_per_doc={max_per_doc})")
+    return selected
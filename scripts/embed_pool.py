@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - 다중 프로세스 임베딩 풀 (CPU 대량 수집용)
+청크 배치를 작업 프로세스에 나눠 encode - 프로세스마다 모델 사본 1개, intra-op 스레드 수 고정
+결과는 제출 순서대로 받음 (쓰기 스테이지가 받는 청크 순서는 단일 프로세스와 동일)
+코어/RAM이 부족하면 단일 프로세스로 동작
+
+사용법:
+    workers, threads = resolve_embed_workers(0, os.cpu_count(), available_memory_bytes())
+    pool = EmbeddingPool("all-MiniLM-L6-v2", "torch", workers, threads)
+    future = pool.submit(texts)     # 길이순 정렬 + encode는 작업 프로세스에서
+    embeddings = future.result()    # 원래 순서
+    pool.close()
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# encode 배치: 가용 RAM의 EMBED_MEMORY_FRACTION 안에서 결정 (작업 프로세스가 여러 개면 나눠 씀)
+EMBED_MEMORY_FRACTION = 0.25
+EMBED_BATCH_RANGE = (16, 512)
+
+# 작업 프로세스 하나에 필요한 코어 / 메모리 (모델 사본 + torch 런타임 + 배치 활성값 여유)
+MIN_THREADS_PER_WORKER = 2
+WORKER_MEMORY_BYTES = 2 ** 30
+
+_worker_model = None  # 작업 프로세스의 모델 (initializer에서 로드)
+
+
+def available_memory_bytes() -> Optional[int]:
+    """가용 물리 메모리 (psutil → /proc/meminfo → Windows API 순, 모르면 None)"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if os.name == 'nt':
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+def auto_batch_size(max_length: int, dim: int, available: Optional[int] = None) -> int:
+    """
+    가용 RAM 기준 encode 배치 크기 (8의 배수, EMBED_BATCH_RANGE 범위)
+
+    시퀀스 하나의 추론 중 활성값 ≈ 최대 토큰 수 × 은닉 차원 × 4바이트 × 12
+    (어텐션/FFN 중간값 포함 보수적 추정 - MiniLM 256토큰 × 384차원 ≈ 4.7MB)
+    """
+    low, high = EMBED_BATCH_RANGE
+    if available is None:
+        return 64
+    per_text = max_length * dim * 4 * 12
+    size = int(available * EMBED_MEMORY_FRACTION // per_text) // 8 * 8
+    return max(low, min(high, size))
+
+
+def resolve_embed_workers(requested: int, cpus: Optional[int], available: Optional[int]) -> Tuple[int, Optional[int]]:
+    """
+    임베딩 작업 프로세스 수와 프로세스당 스레드 수
+
+    - requested: 1이면 단일 프로세스, 0 이하면 코어 수 기준 자동
+    - 프로세스마다 코어 MIN_THREADS_PER_WORKER개, RAM WORKER_MEMORY_BYTES 이상이 되도록 줄이고
+      2개 미만이면 단일 프로세스 (스레드 수는 라이브러리 기본값)
+
+    Returns:
+        (작업 프로세스 수, 프로세스당 스레드 수 또는 None)
+    """
+    cpus = cpus or 1
+    limit = cpus // MIN_THREADS_PER_WORKER
+    if available is not None:
+        limit = min(limit, available // WORKER_MEMORY_BYTES)
+    if requested is not None and requested <= 0:
+        requested = limit
+    if not requested or requested <= 1:
+        return 1, None
+
+    workers = min(requested, limit)
+    if workers < 2:
+        logger.warning(f"Embedding workers {requested} → single process "
+                       f"(CPU {cpus}, RAM {available / 2**30 if available else float('nan'):.1f} GB)")
+        return 1, None
+    if workers < requested:
+        logger.warning(f"Embedding workers {requested} → {workers} "
+                       f"(CPU {cpus}, RAM {available / 2**30 if available else float('nan'):.1f} GB)")
+    return workers, max(1, cpus // workers)
+
+
+def load_embedding_model(model_name: str, inference: str = "torch", threads: Optional[int] = None):
+    """임베딩 모델 로드 (torch import은 이때 - spawn 방식 작업 프로세스가 이 모듈을 import해도 가볍게)"""
+    if inference == "onnx":
+        # onnx_models.py export로 만든 int8 모델 (ONNX Runtime CPU)
+        from onnx_models import OnnxEmbedder
+        return OnnxEmbedder.load(model_name, threads=threads)
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def model_shape(model) -> Tuple[int, int]:
+    """(최대 토큰 수, 임베딩 차원) - 배치 크기 계산용"""
+    max_length = getattr(model, 'max_seq_length', None) or getattr(model, 'max_length', None) or 256
+    if hasattr(model, 'get_sentence_embedding_dimension'):
+        dim = model.get_sentence_embedding_dimension() or 384
+    else:
+        dim = getattr(model, 'config', {}).get('dim', 384)
+    return max_length, dim
+
+
+def token_lengths(model, texts: List[str]) -> List[int]:
+    """토큰 수 (토크나이저가 없으면 문자 수로 근사)"""
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is None:
+        return [len(text) for text in texts]
+    max_length = getattr(model, 'max_seq_length', None) or 512
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+    return [len(ids) for ids in encoded['input_ids']]
+
+
+def encode_sorted(model, texts: List[str], batch_size: int) -> List[List[float]]:
+    """토큰 길이순으로 batch_size씩 encode 후 원래 순서로 복원 (패딩 최소화)"""
+    lengths = token_lengths(model, texts)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    encoded = model.encode([texts[i] for i in order], batch_size=batch_size)
+    embeddings = [None] * len(texts)
+    for position, index in enumerate(order):
+        embeddings[index] = encoded[position].tolist()
+    return embeddings
+
+
+def _init_worker(model_name: str, inference: str, threads: Optional[int]):
+    """작업 프로세스 시작: BLAS/OpenMP 스레드 고정 후 모델 로드"""
+    global _worker_model
+    if threads:
+        for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            os.environ[name] = str(threads)
+    _worker_model = load_embedding_model(model_name, inference, threads)
+
+
+def _worker_shape() -> Tuple[int, int]:
+    return model_shape(_worker_model)
+
+
+def _worker_encode(texts: List[str], batch_size: int) -> List[List[float]]:
+    return encode_sorted(_worker_model, texts, batch_size)
+
+
+class EmbeddingPool:
+    """
+    작업 프로세스 풀 (프로세스마다 모델 사본, 스레드 수 고정)
+
+    - submit(texts) → Future: 제출 순서대로 result()를 받으면 쓰기 순서가 유지됨
+    - spawn 방식 (fork 후 torch 스레드 풀 교착 방지, Windows와 동작 동일)
+    - batch_size: 가용 RAM을 프로세스 수로 나눠 계산 (모델 로드 후 작업 프로세스에서 모델 크기 조회)
+    """
+
+    def __init__(self, model_name: str, inference: str, workers: int, threads: Optional[int] = None,
+                 batch_size: int = None):
+        self.workers = workers
+        self.threads = threads
+        started = time.perf_counter()
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(model_name, inference, threads))
+        # 작업 프로세스를 미리 띄워 모델 로드 (첫 배치 지연을 처리량 측정에서 분리)
+        shapes = [f.result() for f in [self._executor.submit(_worker_shape) for _ in range(workers)]]
+        if batch_size is None:
+            available = available_memory_bytes()
+            batch_size = auto_batch_size(*shapes[0], available // workers if available else None)
+        self.batch_size = batch_size
+        logger.info(f"Embedding pool: {workers} processes × {threads or 'default'} threads, "
+                    f"batch {batch_size}, started in {time.perf_counter() - started:.1f}s")
+
+    def submit(self, texts: List[str]) -> Future:
+        return self._executor.submit(_worker_encode, texts, self.batch_size)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'EmbeddingPool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,150 @@
+"""
+AI 자동화 시스템 - 쿼리 임베딩 캐시
+프로세스 내 LRU + 옵션 디스크(SQLite) 캐시로 같은 질문의 재임베딩 방지
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFC + 공백 정리)"""
+    query = unicodedata.normalize('NFC', query)
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    쿼리 임베딩 캐시
+    - 키: (모델명, 정규화된 쿼리)
+    - 1차: 프로세스 내 LRU (스레드 안전)
+    - 2차: 디스크 SQLite (옵션, 재시작 후에도 유지)
+    """
+
+    def __init__(self, model, model_name: str, max_size: int = 1024, disk_dir: Optional[Path] = None):
+        self.model = model
+        self.model_name = model_name
+        self.max_size = max_size
+
+        self._lru = OrderedDict()  # key -> List[float]
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # 디스크 캐시 (옵션)
+        self._db = None
+        if disk_dir is not None:
+            try:
+                disk_dir = Path(disk_dir)
+                disk_dir.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(disk_dir / "query_embeddings.sqlite"), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Query embedding disk cache disabled: {e}")
+                self._db = None
+
+    def _key(self, query: str) -> str:
+        raw = f"{self.model_name}\x00{normalize_query(query)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        """LRU → 디스크 순으로 조회 (lock 보유 상태에서 호출)"""
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return self._lru[key]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                vector = array('f')
+                vector.frombytes(row[0])
+                embedding = vector.tolist()
+                self._remember(key, embedding, persist=False)
+                self.disk_hits += 1
+                return embedding
+
+        return None
+
+    def _remember(self, key: str, embedding: List[float], persist: bool = True):
+        """LRU(+디스크)에 저장 (lock 보유 상태에서 호출)"""
+        self._lru[key] = embedding
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+        if persist and self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, array('f', embedding).tobytes())
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Query embedding disk cache write failed: {e}")
+
+    def encode(self, query: str) -> List[float]:
+        """단일 쿼리 임베딩 (캐시 우선)"""
+        return self.encode_many([query])[0]
+
+    def encode_many(self, queries: List[str]) -> List[List[float]]:
+        """여러 쿼리 임베딩 - 캐시 미스만 한 번의 배치로 인코딩"""
+        keys = [self._key(q) for q in queries]
+        embeddings = [None] * len(queries)
+        missing = {}  # key -> 원본 쿼리 (중복 제거)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._lookup(key)
+                if cached is not None:
+                    embeddings[i] = cached
+                elif key not in missing:
+                    missing[key] = normalize_query(queries[i])
+                    self.misses += 1
+
+        if missing:
+            encoded = self.model.encode(list(missing.values())).tolist()
+            with self._lock:
+                for key, embedding in zip(missing.keys(), encoded):
+                    self._remember(key, embedding)
+                fresh = dict(zip(missing.keys(), encoded))
+            for i, key in enumerate(keys):
+                if embeddings[i] is None:
+                    embeddings[i] = fresh[key]
+
+        return embeddings
+
+    def stats(self) -> dict:
+        """캐시 통계 (hit/miss 카운터)"""
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / total if total else 0.0,
+                'size': len(self._lru),
+                'disk_enabled': self._db is not None
+            }
+
+    def clear(self):
+        """메모리 캐시 및 통계 초기화 (디스크는 유지)"""
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.disk_hits = self.misses = 0
@@ -0,0 +1,195 @@
+"""
+AI 자동화 시스템 - 하이브리드 검색 점수 융합
+벡터/BM25 후보 목록을 하나의 점수로 합치는 전략 (weighted / rrf / zscore)
++ 적응형 후보 깊이를 위한 꼬리 상한 계산
+"""
+
+import math
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CollectionCandidates:
+    """
+    컬렉션 하나에서 가져온 후보
+
+    items의 각 값은 'vector_score'(1 - L2 거리, 벡터 목록에 없으면 None)와
+    'bm25_raw'(BM25 원점수, BM25 목록에 없으면 None)를 가짐
+    """
+    name: str
+    items: Dict[str, dict] = field(default_factory=dict)  # 청크 ID -> 후보 데이터
+    depth: int = 0                        # 목록별로 요청한 후보 수
+    bm25_max: float = 1                   # 컬렉션 내 BM25 최대 점수 (없으면 1)
+    vector_floor: Optional[float] = None  # 아직 안 가져온 후보의 벡터 점수 상한 (목록 소진 시 None)
+    bm25_floor: Optional[float] = None    # 아직 안 가져온 후보의 BM25 원점수 상한 (목록 소진 시 None)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.vector_floor is None and self.bm25_floor is None
+
+
+class ScoreFusion:
+    """점수 융합 전략 기본 클래스 - 점수가 클수록 좋음 (0~1)"""
+
+    name = "base"
+    # 후보 점수가 다른 후보와 무관해 tail_bound로 전체 깊이와 같은 결과를 보장할 수 있는지
+    # (순위/통계를 전체 후보로 계산하는 전략은 깊이에 따라 점수 자체가 달라짐)
+    exact_tail = False
+
+    def prepare(self, pools: List[CollectionCandidates]):
+        """전체 후보 기준 통계 계산 (score 호출 전에 실행)"""
+
+    def score(self, pool: CollectionCandidates, vector_score: Optional[float],
+              bm25_raw: Optional[float], vector_weight: float) -> float:
+        raise NotImplementedError
+
+    def fuse(self, pools: List[CollectionCandidates], vector_weight: float) -> List[Tuple[str, dict, float]]:
+        """
+        컬렉션 순서대로 후보를 병합하고 융합 점수 계산
+
+        Returns:
+            [(청크 ID, 후보 데이터, 융합 점수), ...] - 병합 순서 유지 (정렬은 호출자)
+        """
+        self.prepare(pools)
+        merged = {}  # 청크 ID -> (pool, data) - 같은 ID는 나중 컬렉션이 덮어씀
+        for pool in pools:
+            for chunk_id, data in pool.items.items():
+                merged[chunk_id] = (pool, data)
+        return [
+            (chunk_id, data, self.score(pool, data['vector_score'], data['bm25_raw'], vector_weight))
+            for chunk_id, (pool, data) in merged.items()
+        ]
+
+    def tail_bound(self, pool: CollectionCandidates, vector_weight: float) -> float:
+        """
+        컬렉션을 더 깊이 가져왔을 때 나올 수 있는 최고 점수
+
+        - 아직 안 가져온 후보: 각 목록의 마지막 점수(floor)를 넘을 수 없음
+        - 한쪽 목록에만 있는 후보: 빠진 신호가 floor까지 올라갈 수 있음
+          (top-k 후보도 포함 - 빠진 신호가 채워지기 전의 점수는 확정값이 아님)
+        """
+        bound = -math.inf
+        if not pool.exhausted:
+            bound = self.score(pool, pool.vector_floor, pool.bm25_floor, vector_weight)
+        for data in pool.items.values():
+            vector_score, bm25_raw = data['vector_score'], data['bm25_raw']
+            if vector_score is None and pool.vector_floor is not None:
+                vector_score = pool.vector_floor
+            elif bm25_raw is None and pool.bm25_floor is not None:
+                bm25_raw = pool.bm25_floor
+            else:
+                continue
+            bound = max(bound, self.score(pool, vector_score, bm25_raw, vector_weight))
+        return bound
+
+
+class WeightedFusion(ScoreFusion):
+    """기존 방식: 벡터 점수 * w + (BM25 / 컬렉션 최대 BM25) * (1 - w)"""
+
+    name = "weighted"
+    exact_tail = True
+
+    def score(self, pool, vector_score, bm25_raw, vector_weight):
+        vector_score = vector_score or 0
+        bm25_norm = bm25_raw / pool.bm25_max if bm25_raw is not None else 0
+        return (vector_score * vector_weight) + (bm25_norm * (1 - vector_weight))
+
+
+class RRFFusion(ScoreFusion):
+    """
+    Reciprocal Rank Fusion
+
+    컬렉션을 합친 전체 후보에서 신호별 순위를 매김 (벡터는 같은 임베딩 공간이라
+    거리 비교 가능, BM25는 컬렉션 최대값 정규화 대신 원점수 순위 사용)
+    결과는 1위/1위 문서가 1.0이 되도록 (k + 1)을 곱해 정규화
+    """
+
+    name = "rrf"
+
+    def __init__(self, k: int = 60):
+        self.k = k
+        self._vector_values = []
+        self._bm25_values = []
+
+    def prepare(self, pools):
+        self._vector_values = sorted(
+            (d['vector_score'] for p in pools for d in p.items.values() if d['vector_score'] is not None),
+            reverse=True
+        )
+        self._bm25_values = sorted(
+            (d['bm25_raw'] for p in pools for d in p.items.values() if d['bm25_raw'] is not None),
+            reverse=True
+        )
+
+    def _rank(self, values: List[float], value: float) -> int:
+        """value보다 큰 값의 개수 + 1 (동점은 같은 순위)"""
+        lo, hi = 0, len(values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[mid] > value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo + 1
+
+    def score(self, pool, vector_score, bm25_raw, vector_weight):
+        fused = 0.0
+        if vector_score is not None:
+            fused += vector_weight / (self.k + self._rank(self._vector_values, vector_score))
+        if bm25_raw is not None and vector_weight < 1:
+            fused += (1 - vector_weight) / (self.k + self._rank(self._bm25_values, bm25_raw))
+        return fused * (self.k + 1)
+
+
+class ZScoreFusion(ScoreFusion):
+    """
+    z-score 보정 융합
+
+    신호별로 전체 후보의 평균/표준편차로 표준화한 뒤 로지스틱 함수로 0~1 변환
+    (컬렉션별 최대값 정규화와 달리 약한 컬렉션의 1위가 1.0으로 부풀지 않음)
+    """
+
+    name = "zscore"
+
+    def __init__(self):
+        self._stats = {}
+
+    def prepare(self, pools):
+        for key in ('vector_score', 'bm25_raw'):
+            values = [d[key] for p in pools for d in p.items.values() if d[key] is not None]
+            if not values:
+                self._stats[key] = (0.0, 1.0)
+                continue
+            mean = sum(values) / len(values)
+            std = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)) or 1.0
+            self._stats[key] = (mean, std)
+
+    def _calibrate(self, key: str, value: Optional[float]) -> float:
+        if value is None:
+            return 0.0
+        mean, std = self._stats[key]
+        return 1 / (1 + math.exp(-(value - mean) / std))
+
+    def score(self, pool, vector_score, bm25_raw, vector_weight):
+        return (self._calibrate('vector_score', vector_score) * vector_weight) + \
+               (self._calibrate('bm25_raw', bm25_raw) * (1 - vector_weight))
+
+
+FUSION_STRATEGIES = {
+    'weighted': WeightedFusion,
+    'rrf': RRFFusion,
+    'zscore': ZScoreFusion
+}
+
+
+def get_fusion(fusion) -> ScoreFusion:
+    """이름 또는 ScoreFusion 인스턴스로 전략 선택"""
+    if isinstance(fusion, ScoreFusion):
+        return fusion
+    if fusion not in FUSION_STRATEGIES:
+        raise ValueError(f"Unknown fusion strategy: {fusion} (available: {', '.join(FUSION_STRATEGIES)})")
+    return FUSION_STRATEGIES[fusion]()
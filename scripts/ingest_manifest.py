@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - 증분 색인 manifest
+원본 파일 → (내용 해시, 청킹 파라미터, 임베딩 모델, 청크 ID별 내용 해시) 기록
+재실행 시 바뀌지 않은 파일은 건너뛰고, 바뀐 파일은 달라진 청크만 upsert/삭제,
+사라진 파일의 청크는 삭제 (vectordb_pipeline.py가 벡터DB 폴더에 함께 저장)
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """파일 내용 SHA-256 (큰 PDF도 블록 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    """청크 본문 해시 (같은 ID라도 내용이 바뀌었으면 다시 임베딩)"""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+class IngestManifest:
+    """
+    증분 색인 상태
+
+    - 키: "컬렉션:상대 경로" (분리/통합 컬렉션 구축을 따로 추적)
+    - 파일 크기/수정 시각이 같으면 해시 계산 생략, 다르면 내용 해시로 판단
+    - 청킹 파라미터나 임베딩 모델이 바뀌면 모든 파일을 변경된 것으로 취급
+    """
+
+    def __init__(self, path: Path, model: str, chunker: dict, root: Path = None):
+        self.path = Path(path)
+        self.model = model
+        self.chunker = dict(chunker)
+        self.root = Path(root) if root else None
+        self.files: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Path, model: str, chunker: dict, root: Path = None) -> 'IngestManifest':
+        """manifest 로드 (없거나 버전이 다르면 빈 상태 - 전체 재색인)"""
+        manifest = cls(path, model, chunker, root)
+        if Path(path).exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    manifest.files = data['files']
+                else:
+                    logger.warning("Ingest manifest version mismatch - full re-index")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ingest manifest unreadable ({e}) - full re-index")
+        return manifest
+
+    def save(self):
+        """원자적 저장 (임시 파일 기록 후 교체 - 중단되어도 이전 manifest 유지)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files}, f, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def key(self, collection: str, path: Path) -> str:
+        path = Path(path)
+        if self.root:
+            try:
+                path = path.relative_to(self.root)
+            except ValueError:
+                pass
+        return f"{collection}:{path.as_posix()}"
+
+    def _current_settings(self, record: dict) -> bool:
+        return record.get('model') == self.model and record.get('chunker') == self.chunker
+
+    def unchanged(self, collection: str, path: Path) -> bool:
+        """파일과 색인 설정이 마지막 색인 때와 같으면 True"""
+        record = self.files.get(self.key(collection, path))
+        if record is None or not self._current_settings(record):
+            return False
+
+        stat = Path(path).stat()
+        if stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']:
+            return True
+        if stat.st_size != record['size'] or file_hash(path) != record['hash']:
+            return False
+        # 내용은 같고 수정 시각만 바뀜 (복사/체크아웃) - 다음 실행부터 해시 생략
+        record['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def chunk_hashes(self, collection: str, path: Path) -> Dict[str, str]:
+        """마지막 색인 때의 청크 ID → 내용 해시 (설정이 바뀌었으면 빈 dict - 전부 다시 임베딩)"""
+        record = self.files.get(self.key(collection, path))
+        if record is None or not self._current_settings(record):
+            return {}
+        return record['chunks']
+
+    def previous_chunk_ids(self, collection: str, path: Path) -> List[str]:
+        """설정과 무관하게 마지막으로 기록된 청크 ID (삭제 대상 계산용)"""
+        record = self.files.get(self.key(collection, path))
+        return list(record['chunks']) if record else []
+
+    def record(self, collection: str, path: Path, doc_id: str, source_type: str, chunks: Dict[str, str]):
+        """파일 색인 결과 기록 (chunks: 청크 ID → 내용 해시)"""
+        stat = Path(path).stat()
+        self.files[self.key(collection, path)] = {
+            'collection': collection,
+            'source_file': Path(path).name,
+            'source_type': source_type,
+            'doc_id': doc_id,
+            'hash': file_hash(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'model': self.model,
+            'chunker': self.chunker,
+            'chunks': chunks
+        }
+
+    def missing(self, collection: str, source_type: str, seen: Iterable[str]) -> Dict[str, dict]:
+        """이번 실행에서 보이지 않은 파일 (원본이 삭제됨) - {키: 기록}"""
+        seen = set(seen)
+        return {key: record for key, record in self.files.items()
+                if record['collection'] == collection and record['source_type'] == source_type
+                and key not in seen}
+
+    def move_collection(self, sources: Iterable[str], target: str) -> int:
+        """
+        소스 컬렉션 기록을 target 컬렉션 키로 옮김 → 옮긴 파일 수
+
+        migrate_unified_collection.py가 청크를 그대로 복사한 뒤 호출 - 다음 증분 실행이
+        통합 컬렉션에서 파일을 그대로인 것으로 보고 다시 임베딩하지 않음 (같은 파일의 기존 기록은 덮어씀)
+        """
+        sources = set(sources)
+        moved = 0
+        for key, record in list(self.files.items()):
+            if record['collection'] not in sources:
+                continue
+            del self.files[key]
+            relpath = key.split(':', 1)[1]
+            self.files[f"{target}:{relpath}"] = dict(record, collection=target)
+            moved += 1
+        return moved
+
+    def forget(self, key: str) -> Optional[dict]:
+        return self.files.pop(key, None)
+
+    def clear(self):
+        self.files.clear()
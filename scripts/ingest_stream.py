@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - 스트리밍 수집 파이프라인
+추출 → 임베딩 → 쓰기 스테이지를 각자 스레드에서 동시에 실행하고 크기 제한 큐로 연결
+하류가 느리면 put이 막혀 상류가 멈춤(backpressure) - 문서 크기와 무관하게 메모리 일정
+스테이지별 처리량(단위/초), 입력 대기/출력 막힘 시간, 큐 깊이를 기록
+
+사용법:
+    pipeline = StreamingPipeline(queue_size=8)
+    pipeline.stage("embed", embed_handler, flush=embed_flush, unit_name="chunks")
+    pipeline.stage("write", write_handler, unit_name="chunks")
+    stats = pipeline.run(pieces(), source_name="extract", source_unit=len, source_unit_name="pages")
+    logger.info(format_stats(stats))
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # 입력 종료 표시
+
+
+@dataclass
+class StageStats:
+    """스테이지 하나의 처리 통계"""
+    name: str
+    unit_name: str = "items"
+    items: int = 0                 # 처리한 입력 항목 수
+    units: int = 0                 # 처리량 단위 수 (페이지/청크)
+    busy_seconds: float = 0.0      # 실제 처리 시간
+    idle_seconds: float = 0.0      # 입력 대기 (상류가 느림)
+    blocked_seconds: float = 0.0   # 출력 큐가 가득 차 대기 (하류가 느림 - backpressure)
+    wall_seconds: float = 0.0
+    depth_sum: int = 0
+    depth_samples: int = 0
+    max_depth: int = 0             # 입력 큐 최대 깊이
+
+    def sample_depth(self, depth: int):
+        self.depth_sum += depth
+        self.depth_samples += 1
+        self.max_depth = max(self.max_depth, depth)
+
+    @property
+    def avg_depth(self) -> float:
+        return self.depth_sum / self.depth_samples if self.depth_samples else 0.0
+
+    @property
+    def rate(self) -> float:
+        """처리 중일 때의 단위/초 (대기 시간 제외)"""
+        return self.units / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    @property
+    def wall_rate(self) -> float:
+        """전체 경과 기준 단위/초"""
+        return self.units / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'avg_depth': self.avg_depth, 'rate': self.rate, 'wall_rate': self.wall_rate}
+
+
+class StreamingPipeline:
+    """
+    source → stage → stage → ... (스테이지마다 스레드 1개, 사이는 maxsize=queue_size 큐)
+
+    - handler(item, emit) → 처리한 단위 수(int) 또는 None(항목 1개): emit(out)으로 다음 스테이지에 전달
+    - flush(emit): 입력이 끝났을 때 남은 배치 내보내기 (선택)
+    - 한 스테이지에서 예외가 나면 나머지는 입력을 버리며 종료하고 run()이 첫 예외를 다시 발생
+    """
+
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self._stages = []
+        self._errors = []
+        self._failed = threading.Event()
+
+    def stage(self, name: str, handler: Callable, flush: Callable = None,
+              unit_name: str = "items") -> 'StreamingPipeline':
+        self._stages.append((name, handler, flush, unit_name))
+        return self
+
+    def _emitter(self, output: Optional[queue.Queue], stats: StageStats):
+        def emit(item):
+            if output is None:
+                return
+            started = time.perf_counter()
+            output.put(item)
+            stats.blocked_seconds += time.perf_counter() - started
+        return emit
+
+    def _fail(self, stats: StageStats, error: BaseException):
+        logger.error(f"Ingest stage '{stats.name}' failed: {error}")
+        self._errors.append(error)
+        self._failed.set()
+
+    def _run_source(self, source: Iterable, output: queue.Queue, stats: StageStats, unit: Callable):
+        emit = self._emitter(output, stats)
+        started = time.perf_counter()
+        try:
+            iterator = iter(source)
+            while not self._failed.is_set():
+                step = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.busy_seconds += time.perf_counter() - step
+                stats.items += 1
+                stats.units += unit(item) if unit else 1
+                emit(item)
+        except Exception as e:
+            self._fail(stats, e)
+        finally:
+            output.put(_DONE)
+            stats.wall_seconds = time.perf_counter() - started
+
+    def _run_stage(self, handler: Callable, flush: Optional[Callable], source: queue.Queue,
+                   output: Optional[queue.Queue], stats: StageStats):
+        emit = self._emitter(output, stats)
+        started = time.perf_counter()
+
+        def call(fn, *args):
+            blocked = stats.blocked_seconds
+            step = time.perf_counter()
+            units = fn(*args, emit)
+            # 출력 큐 대기는 처리 시간에서 제외
+            stats.busy_seconds += time.perf_counter() - step - (stats.blocked_seconds - blocked)
+            return units
+
+        try:
+            while True:
+                stats.sample_depth(source.qsize())
+                wait = time.perf_counter()
+                item = source.get()
+                stats.idle_seconds += time.perf_counter() - wait
+                if item is _DONE:
+                    break
+                if self._failed.is_set():
+                    continue  # 다른 스테이지 실패 - 상류가 막히지 않도록 입력만 비움
+                try:
+                    units = call(handler, item)
+                    stats.items += 1
+                    stats.units += 1 if units is None else units
+                except Exception as e:
+                    self._fail(stats, e)
+            if flush is not None and not self._failed.is_set():
+                try:
+                    stats.units += call(flush) or 0
+                except Exception as e:
+                    self._fail(stats, e)
+        finally:
+            if output is not None:
+                output.put(_DONE)
+            stats.wall_seconds = time.perf_counter() - started
+
+    def run(self, source: Iterable, source_name: str = "source", source_unit: Callable = None,
+            source_unit_name: str = "items") -> List[StageStats]:
+        """source를 끝까지 흘려보내고 스테이지별 통계 반환 (source 스테이지 포함)"""
+        self._errors.clear()
+        self._failed.clear()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        stats = [StageStats(source_name, source_unit_name)] + \
+                [StageStats(name, unit_name) for name, _, _, unit_name in self._stages]
+
+        threads = [threading.Thread(target=self._run_source, args=(source, queues[0], stats[0], source_unit),
+                                    name=f"ingest-{source_name}", daemon=True)]
+        for i, (name, handler, flush, _) in enumerate(self._stages):
+            output = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(threading.Thread(target=self._run_stage,
+                                            args=(handler, flush, queues[i], output, stats[i + 1]),
+                                            name=f"ingest-{name}", daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return stats
+
+
+def format_stats(stats: List[StageStats]) -> str:
+    """스테이지별 처리량/대기/큐 깊이 표"""
+    lines = [f"  {'stage':<10}{'items':>8}{'units':>10}  {'unit':<7}{'busy s':>8}{'units/s':>10}"
+             f"{'wall/s':>9}{'idle s':>8}{'blocked s':>10}{'queue avg/max':>15}"]
+    for s in stats:
+        lines.append(f"  {s.name:<10}{s.items:>8}{s.units:>10}  {s.unit_name:<7}{s.busy_seconds:>8.2f}"
+                     f"{s.rate:>10.1f}{s.wall_rate:>9.1f}{s.idle_seconds:>8.2f}{s.blocked_seconds:>10.2f}"
+                     f"{s.avg_depth:>9.1f}/{s.max_depth:<5}")
+    return "\n".join(lines)
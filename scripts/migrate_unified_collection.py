@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+소스별 컬렉션(fcc_kdb, fcc_ecfr, ised_rss, fcc_testreport) → 통합 컬렉션(regulatory_corpus) 이전
+
+- 저장된 임베딩/본문/메타데이터를 그대로 복사 (재인코딩 없음, upsert라 다시 실행해도 안전)
+- source_type이 없는 청크는 원래 컬렉션 기준으로 채움
+- 이전 후 컬렉션 구성을 unified로 기록 → 검색과 이후 vectordb_pipeline.py 기본 수집이 통합 컬렉션 사용
+  (증분 manifest 기록도 통합 컬렉션 키로 옮겨 다음 수집에서 다시 임베딩하지 않음)
+- --measure: 분리/통합 구성의 검색 지연시간(p50/p95) 비교
+"""
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, '.')
+from bm25_index import SparseBM25Index
+from ingest_manifest import IngestManifest
+from rag_system import BM25_INDEX_DIR, VECTOR_DB_DIR, VectorSearch
+from vectordb_pipeline import BASE_DIR, MANIFEST_PATH
+from vector_store import ChromaVectorStore, UNIFIED_COLLECTION, COLLECTION_SOURCE_TYPES, LAYOUT_UNIFIED, write_layout
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MEASURE_QUERIES = [
+    'Part 15E', 'FCC part 15E', '15.407', 'U-NII 5GHz power limit', 'DFS test procedure',
+    'DFS 테스트 절차', 'RF 노출 제한', 'module certification requirements', 'RF exposure limits',
+    'RSS-247 power limit', 'test report UNII 6E', '2.4 GHz 대역 출력 제한',
+]
+
+# UI 체크박스 조합 (전체 / 일부 소스)
+MEASURE_SELECTIONS = [
+    None,
+    ['fcc_kdb', 'fcc_ecfr'],
+    ['ised_rss'],
+]
+
+
+def migrate(store: ChromaVectorStore, batch_size: int = 1000) -> int:
+    """소스 컬렉션의 임베딩을 통합 컬렉션으로 복사"""
+    target = None
+    total = 0
+    for name, source_type in COLLECTION_SOURCE_TYPES.items():
+        try:
+            col = store.get_collection(name)
+        except Exception as e:
+            logger.warning(f"  Collection {name} not found: {e}")
+            continue
+
+        if target is None:
+            # 모델 등 컬렉션 메타데이터는 원본을 따름 (거리 공간 포함)
+            metadata = dict(getattr(col, 'metadata', None) or {})
+            metadata['layout'] = 'unified'
+            target = store.client.get_or_create_collection(name=UNIFIED_COLLECTION, metadata=metadata)
+
+        count = col.count()
+        for offset in range(0, count, batch_size):
+            batch = col.get(include=['embeddings', 'documents', 'metadatas'], limit=batch_size, offset=offset)
+            metadatas = [dict(meta or {}) for meta in batch['metadatas']]
+            for meta in metadatas:
+                meta.setdefault('source_type', source_type)
+            target.upsert(ids=batch['ids'], embeddings=batch['embeddings'],
+                          documents=batch['documents'], metadatas=metadatas)
+        total += count
+        logger.info(f"  {name} → {UNIFIED_COLLECTION}: {count} chunks")
+
+    if target is not None:
+        logger.info(f"{UNIFIED_COLLECTION}: {target.count()} chunks (copied {total})")
+        # 같은 ID로 다시 복사하면 문서 수가 그대로라 BM25 스냅샷이 갱신된 본문을 모름
+        SparseBM25Index.invalidate(BM25_INDEX_DIR / UNIFIED_COLLECTION)
+    return total
+
+
+def measure(rounds: int = 3, n_results: int = 5):
+    """분리(4개 컬렉션) vs 통합(where 필터) 구성의 search() 지연시간"""
+    engines = {'separate': VectorSearch(unified=False), 'unified': VectorSearch(unified=True)}
+
+    print(f"\n{len(MEASURE_QUERIES)} queries x {len(MEASURE_SELECTIONS)} selections x {rounds} rounds")
+    print(f"{'layout':<10}{'selection':<24}{'p50 ms':>10}{'p95 ms':>10}")
+    for selection in MEASURE_SELECTIONS:
+        for layout, engine in engines.items():
+            # 임베딩/BM25 인덱스 예열 후 측정 (컬렉션 검색 경로만 비교)
+            for query in MEASURE_QUERIES:
+                engine.search(query, collections=selection, n_results=n_results)
+            latencies = []
+            for _ in range(rounds):
+                for query in MEASURE_QUERIES:
+                    start = time.perf_counter()
+                    engine.search(query, collections=selection, n_results=n_results)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            label = ','.join(selection) if selection else 'all'
+            print(f"{layout:<10}{label:<24}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"소스별 컬렉션 → {UNIFIED_COLLECTION} 이전")
+    parser.add_argument('--measure', action='store_true', help="이전 후 분리/통합 검색 지연시간 비교")
+    parser.add_argument('--skip-migrate', action='store_true', help="이전 없이 측정만")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    if not args.skip_migrate and migrate(ChromaVectorStore(VECTOR_DB_DIR), args.batch_size):
+        # 구성 기록과 manifest 키 이전을 함께 - 통합 컬렉션 수집이 복사된 파일을 그대로인 것으로 봄
+        manifest = IngestManifest.load(MANIFEST_PATH, model="", chunker={}, root=BASE_DIR)
+        moved = manifest.move_collection(COLLECTION_SOURCE_TYPES, UNIFIED_COLLECTION)
+        if moved:
+            manifest.save()
+            logger.info(f"Ingest manifest: {moved} files moved to {UNIFIED_COLLECTION}")
+        write_layout(VECTOR_DB_DIR, LAYOUT_UNIFIED)
+        logger.info(f"Collection layout: {LAYOUT_UNIFIED} (vectordb_pipeline.py now ingests into {UNIFIED_COLLECTION})")
+    if args.measure:
+        measure()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - ONNX Runtime 추론 경로 (CPU)
+임베딩 모델(all-MiniLM-L6-v2)과 리랭커(ms-marco-MiniLM-L-6-v2)를 ONNX로 내보내고
+동적 int8 양자화 후 ONNX Runtime으로 실행 (PyTorch 없이 추론, intra-op 스레드 조정)
+
+사용법:
+    python onnx_models.py export       # 두 모델 내보내기 + int8 양자화
+    python onnx_models.py parity       # PyTorch 대비 코사인 편차 / 순위 일치도
+    python onnx_models.py benchmark    # 쿼리 시점 / 수집 시점 배치 처리량
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(r"C:\Users\younh\Documents\Ai model")
+ONNX_MODEL_DIR = BASE_DIR / "aidata" / "models" / "onnx"
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def model_dir(model_name: str) -> Path:
+    return ONNX_MODEL_DIR / model_name.replace('/', '__')
+
+
+def default_threads() -> int:
+    """intra-op 스레드 기본값 - 물리 코어 수 (하이퍼스레딩은 GEMM에 거의 도움이 안 됨)"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _session(path: Path, threads: Optional[int]):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or default_threads()
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+
+
+class _OnnxModel:
+    """내보낸 모델 디렉토리 (model.onnx / model_int8.onnx + 토크나이저 + onnx_config.json) 로더"""
+
+    def __init__(self, path: Path, quantized: bool = True, threads: Optional[int] = None):
+        from transformers import AutoTokenizer
+
+        path = Path(path)
+        config_file = path / "onnx_config.json"
+        if not config_file.exists():
+            raise FileNotFoundError(f"ONNX model not found: {path} (run onnx_models.py export)")
+        with open(config_file, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.path = path
+        self.quantized = quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(str(path))
+        self.session = _session(path / ("model_int8.onnx" if quantized else "model.onnx"), threads)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = self.config['max_length']
+
+    def _run(self, encoded: dict) -> np.ndarray:
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
+
+
+class OnnxEmbedder(_OnnxModel):
+    """SentenceTransformer.encode 호환 임베딩 (mean pooling + L2 정규화)"""
+
+    @classmethod
+    def load(cls, model_name: str = EMBEDDING_MODEL, quantized: bool = True,
+             threads: Optional[int] = None) -> 'OnnxEmbedder':
+        return cls(model_dir(model_name), quantized, threads)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config['dim']), dtype=np.float32)
+
+        # 길이순 배치 (패딩 최소화) 후 원래 순서로 복원
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        output = np.zeros((len(texts), self.config['dim']), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self.tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                     max_length=self.max_length, return_tensors='np')
+            hidden = self._run(encoded)
+            mask = encoded['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.config.get('normalize', True):
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            output[batch] = pooled
+        return output[0] if single else output
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """CrossEncoder.predict 호환 리랭커 (원본과 같은 활성화 함수 적용)"""
+
+    @classmethod
+    def load(cls, model_name: str = RERANKER_MODEL, quantized: bool = True,
+             threads: Optional[int] = None) -> 'OnnxCrossEncoder':
+        return cls(model_dir(model_name), quantized, threads)
+
+    def predict(self, pairs: List[tuple], batch_size: int = 32, **kwargs) -> np.ndarray:
+        pairs = list(pairs)
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            encoded = self.tokenizer([q for q, _ in batch], [d for _, d in batch], padding=True,
+                                     truncation='longest_first', max_length=self.max_length, return_tensors='np')
+            scores[start:start + len(batch)] = self._run(encoded)[:, 0]
+        if self.config.get('sigmoid'):
+            scores = 1 / (1 + np.exp(-scores))
+        return scores
+
+
+# ---------- 내보내기 ----------
+
+def _export(model, tokenizer, path: Path, config: dict, opset: int = 14):
+    """transformers 모델 → ONNX (배치/시퀀스 동적 축) → 동적 int8 양자화"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    class Wrapper(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids)[0]
+
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "onnx_config.json").unlink(missing_ok=True)  # 기록 중에는 무효 처리
+    tokenizer.save_pretrained(str(path))
+
+    sample = tokenizer(["dynamic axes sample"], ["second segment"] if config['kind'] == 'reranker' else None,
+                       return_tensors='pt')
+    if 'token_type_ids' not in sample:
+        sample['token_type_ids'] = torch.zeros_like(sample['input_ids'])
+    names = ['input_ids', 'attention_mask', 'token_type_ids']
+    axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+    axes['output'] = {0: 'batch'}
+
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(Wrapper(model), tuple(sample[name] for name in names), str(path / "model.onnx"),
+                          input_names=names, output_names=['output'], dynamic_axes=axes, opset_version=opset)
+    quantize_dynamic(str(path / "model.onnx"), str(path / "model_int8.onnx"), weight_type=QuantType.QInt8)
+
+    with open(path / "onnx_config.json", 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    sizes = {name: (path / name).stat().st_size / 1e6 for name in ("model.onnx", "model_int8.onnx")}
+    logger.info(f"Exported {config['model']} → {path} "
+                f"(fp32 {sizes['model.onnx']:.1f} MB, int8 {sizes['model_int8.onnx']:.1f} MB)")
+
+
+def export_embedder(model_name: str = EMBEDDING_MODEL) -> Path:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    modules = [type(m).__name__ for m in model]
+    if 'Pooling' in modules and model[1].get_pooling_mode_str() != 'mean':
+        raise ValueError(f"Only mean pooling is supported: {model[1].get_pooling_mode_str()}")
+    config = {
+        'kind': 'embedder', 'model': model_name, 'max_length': model.max_seq_length,
+        'dim': model.get_sentence_embedding_dimension(), 'normalize': 'Normalize' in modules
+    }
+    path = model_dir(model_name)
+    _export(model[0].auto_model, model.tokenizer, path, config)
+    return path
+
+
+def export_reranker(model_name: str = RERANKER_MODEL) -> Path:
+    from sentence_transformers import CrossEncoder
+
+    model = CrossEncoder(model_name, device='cpu')
+    # sentence-transformers 버전에 따라 속성 이름이 다름
+    activation = getattr(model, 'activation_fn', None) or getattr(model, 'default_activation_function', None)
+    config = {
+        'kind': 'reranker', 'model': model_name, 'max_length': model.max_length or 512,
+        'sigmoid': type(activation).__name__ == 'Sigmoid'
+    }
+    path = model_dir(model_name)
+    _export(model.model, model.tokenizer, path, config)
+    return path
+
+
+# ---------- 정확도 / 처리량 ----------
+
+def _sample_texts(limit: int = 400) -> tuple:
+    """쿼리 세트 + 벡터DB 청크 샘플"""
+    from benchmark_vector_store import QUERIES
+    from rag_system import VECTOR_DB_DIR
+    from vector_store import ChromaVectorStore, COLLECTION_SOURCE_TYPES
+
+    store = ChromaVectorStore(VECTOR_DB_DIR)
+    chunks = []
+    for name in COLLECTION_SOURCE_TYPES:
+        try:
+            chunks.extend(store.get_collection(name).get(include=['documents'], limit=limit // 4)['documents'])
+        except Exception as e:
+            logger.warning(f"  {name} unavailable: {e}")
+    return list(QUERIES), chunks
+
+
+def _top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> List[set]:
+    scores = queries @ chunks.T
+    return [set(np.argsort(-row, kind='stable')[:k]) for row in scores]
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra, rb = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    if ra.std() == 0 or rb.std() == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def parity(k: int = 10, threads: Optional[int] = None) -> bool:
+    """PyTorch 대비 ONNX int8 정확도 (임베딩 코사인 편차, 검색/리랭킹 순위 일치도)"""
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+    queries, chunks = _sample_texts()
+    texts = queries + chunks
+    torch_model = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+    onnx_model = OnnxEmbedder.load(threads=threads)
+
+    reference = torch_model.encode(texts, normalize_embeddings=True)
+    candidate = onnx_model.encode(texts)
+    cosine = np.einsum('ij,ij->i', reference, candidate) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+    drift = 1 - cosine
+    print(f"\n[embedding] {len(texts)} texts: cosine drift mean {drift.mean():.5f}, max {drift.max():.5f}")
+
+    n = len(queries)
+    ok = drift.mean() < 0.01
+    if chunks:
+        k = min(k, len(chunks))
+        exact = _top_k(reference[:n], reference[n:], k)
+        # 실제 배포 형태: 벡터DB는 PyTorch 임베딩, 쿼리만 ONNX
+        mixed = _top_k(candidate[:n], reference[n:], k)
+        full = _top_k(candidate[:n], candidate[n:], k)
+        overlap_mixed = np.mean([len(a & b) / k for a, b in zip(exact, mixed)])
+        overlap_full = np.mean([len(a & b) / k for a, b in zip(exact, full)])
+        print(f"[embedding] top-{k} agreement: onnx query vs torch index {overlap_mixed:.3f}, "
+              f"onnx query vs onnx index {overlap_full:.3f}")
+        ok = ok and overlap_mixed >= 0.9
+
+        # 리랭커: 쿼리별 top-k 후보를 두 엔진으로 점수화해 순위 비교
+        torch_ce = CrossEncoder(RERANKER_MODEL, device='cpu')
+        onnx_ce = OnnxCrossEncoder.load(threads=threads)
+        rho, top1 = [], []
+        for q, candidates in zip(queries, exact):
+            pairs = [(q, chunks[i]) for i in sorted(candidates)]
+            a, b = np.asarray(torch_ce.predict(pairs)), onnx_ce.predict(pairs)
+            rho.append(_spearman(a, b))
+            top1.append(int(np.argmax(a) == np.argmax(b)))
+        print(f"[reranker] {len(queries)} queries x {k} pairs: Spearman {np.mean(rho):.3f}, "
+              f"top-1 agreement {np.mean(top1):.3f}")
+        ok = ok and np.mean(rho) >= 0.9
+
+    print(f"\n{'PASS' if ok else 'FAIL'}")
+    return ok
+
+
+def _throughput(fn, items: list, batch_size: int, rounds: int = 3) -> float:
+    """항목/초 (배치 단위 호출, 첫 배치로 예열)"""
+    fn(items[:batch_size])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(items), batch_size):
+            fn(items[i:i + batch_size])
+    return rounds * len(items) / (time.perf_counter() - start)
+
+
+def benchmark(thread_counts: List[int] = None):
+    """쿼리 시점(배치 1 임베딩, 후보 10쌍 리랭킹) / 수집 시점(청크 50개 배치) 처리량"""
+    import torch
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+    queries, chunks = _sample_texts()
+    chunks = chunks or queries * 10
+    pairs = [(q, chunks[i % len(chunks)]) for q in queries for i in range(10)]
+    thread_counts = thread_counts or sorted({1, 2, 4, default_threads()})
+
+    engines = {
+        'torch': (lambda: SentenceTransformer(EMBEDDING_MODEL, device='cpu'),
+                  lambda: CrossEncoder(RERANKER_MODEL, device='cpu')),
+        'onnx-fp32': (lambda t: OnnxEmbedder.load(quantized=False, threads=t),
+                      lambda t: OnnxCrossEncoder.load(quantized=False, threads=t)),
+        'onnx-int8': (lambda t: OnnxEmbedder.load(quantized=True, threads=t),
+                      lambda t: OnnxCrossEncoder.load(quantized=True, threads=t)),
+    }
+
+    print(f"\n{'engine':<11}{'threads':>8}{'query emb/s':>13}{'rerank q/s':>12}{'ingest chunks/s':>17}")
+    for label, (make_embedder, make_reranker) in engines.items():
+        for threads in thread_counts:
+            if label == 'torch':
+                torch.set_num_threads(threads)
+                embedder, reranker = make_embedder(), make_reranker()
+            else:
+                embedder, reranker = make_embedder(threads), make_reranker(threads)
+            query_rate = _throughput(lambda batch: embedder.encode(batch), queries, 1)
+            rerank_rate = _throughput(lambda batch: reranker.predict(batch), pairs, 10) / 10
+            ingest_rate = _throughput(lambda batch: embedder.encode(batch), chunks, 50, rounds=1)
+            print(f"{label:<11}{threads:>8}{query_rate:>13.1f}{rerank_rate:>12.1f}{ingest_rate:>17.1f}")
+
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="ONNX Runtime int8 추론 경로")
+    parser.add_argument('command', choices=['export', 'parity', 'benchmark'])
+    parser.add_argument('--threads', type=int, nargs='*', help="intra-op 스레드 수 (benchmark는 여러 값)")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_embedder()
+        export_reranker()
+    elif args.command == 'parity':
+        raise SystemExit(0 if parity(threads=args.threads[0] if args.threads else None) else 1)
+    else:
+        benchmark(args.threads)
+
+
+if __name__ == '__main__':
+    main()
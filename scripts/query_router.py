@@ -0,0 +1,154 @@
+"""
+AI 자동화 시스템 - 규칙 기반 쿼리 라우터
+쿼리에 명시된 규격 식별자(KDB 번호, RSS 번호, CFR 조항, Test Report)로
+검색 대상 컬렉션, Chroma where 필터, 하이브리드 가중치를 검색 전에 결정
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ALL_COLLECTIONS = ["fcc_kdb", "fcc_ecfr", "ised_rss", "fcc_testreport"]
+
+# 47 CFR Part 15 조항 번호 → Subpart (eCFR 문서 doc_id: CFR_Part_15E 등)
+PART15_SUBPARTS = [
+    (1, 99, 'A'),      # 15.1 ~ 15.38 General
+    (101, 199, 'B'),   # 15.101 ~ 15.123 Unintentional Radiators
+    (201, 299, 'C'),   # 15.201 ~ 15.258 Intentional Radiators (15.247 DTS)
+    (301, 399, 'D'),   # 15.301 ~ 15.323 UPCS
+    (401, 499, 'E'),   # 15.401 ~ 15.407 U-NII
+    (501, 599, 'F'),   # 15.501 ~ 15.525 UWB
+    (601, 699, 'G'),   # 15.601 ~ 15.615 Access BPL
+    (701, 799, 'H'),   # 15.701 ~ 15.717 TVBD
+]
+
+KDB_PATTERN = re.compile(r'\bKDB\s*(?:no\.?\s*|#\s*)?(\d{6})\b', re.IGNORECASE)
+RSS_PATTERN = re.compile(r'\bRSS\s*-?\s*(\d{1,3}|gen)\b', re.IGNORECASE)
+# § 15.407 / section 15.407 / 47 CFR 2.1093 / 15.247 (Part 15는 조항 번호만으로도 인식)
+CFR_SECTION_PATTERN = re.compile(
+    r'(?:§+\s*|\b(?:section|sec\.|47\s*cfr)\s*)(\d{1,2})\.(\d{1,4})\b|\b(15)\.(\d{3})\b',
+    re.IGNORECASE
+)
+CFR_PART_PATTERN = re.compile(r'\bpart\s*(\d{1,2})\s*(?:subpart\s*)?([A-H])?\b', re.IGNORECASE)
+TEST_REPORT_PATTERN = re.compile(
+    r'test\s*report|시험\s*성적서|성적서|테스트\s*리포트|시험\s*보고서',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class RoutingDecision:
+    """라우팅 결과"""
+    collections: List[str]                                 # 검색할 컬렉션
+    where: Dict[str, dict] = field(default_factory=dict)   # 컬렉션 -> Chroma where 필터
+    vector_weight: float = 0.5                             # 벡터 가중치 (나머지는 BM25)
+    rules: List[str] = field(default_factory=list)         # 매칭된 규칙 (로그용)
+
+    @property
+    def routed(self) -> bool:
+        return bool(self.rules)
+
+    def describe(self) -> str:
+        filters = ", ".join(f"{name}: {flt}" for name, flt in self.where.items()) or "none"
+        rules = ", ".join(self.rules) or "default"
+        return (f"collections={self.collections} where={{{filters}}} "
+                f"vector_weight={self.vector_weight} rules=[{rules}]")
+
+
+class QueryRouter:
+    """
+    규칙 기반 쿼리 라우터
+
+    - 식별자 쿼리 (KDB 789033, RSS-247, §15.407): 해당 컬렉션 + doc_id 필터,
+      BM25 비중을 높임 (번호/조항은 키워드 매칭이 정확)
+    - Test Report 언급: fcc_testreport 컬렉션
+    - 그 외: 전체 컬렉션, 기본 가중치
+    """
+
+    def __init__(self, identifier_weight: float = 0.3, default_weight: float = 0.5,
+                 all_collections: List[str] = None):
+        self.identifier_weight = identifier_weight
+        self.default_weight = default_weight
+        self.all_collections = all_collections or ALL_COLLECTIONS
+
+    def _cfr_doc_id(self, part: str, section: str) -> str:
+        """CFR 조항 → eCFR doc_id (Part 15는 Subpart까지)"""
+        if part == '15':
+            number = int(section[:3]) if len(section) >= 3 else int(section)
+            for low, high, subpart in PART15_SUBPARTS:
+                if low <= number <= high:
+                    return f"CFR_Part_15{subpart}"
+            return ""
+        return f"CFR_Part_{part}"
+
+    def route(self, query: str, collections: Optional[List[str]] = None) -> RoutingDecision:
+        """
+        쿼리 라우팅
+
+        Args:
+            query: 검색어
+            collections: 사용자가 허용한 컬렉션 (None이면 전체) - 라우팅 결과는 이 범위 안으로 제한
+        """
+        allowed = list(collections or self.all_collections)
+        targets = {}   # 컬렉션 -> doc_id 목록 (빈 목록이면 필터 없음)
+        rules = []
+
+        for match in KDB_PATTERN.finditer(query):
+            targets.setdefault('fcc_kdb', []).append(f"KDB_{match.group(1)}")
+            rules.append(f"kdb:{match.group(1)}")
+
+        for match in RSS_PATTERN.finditer(query):
+            number = match.group(1).upper()  # 수집된 doc_id는 RSS-GEN (scrape_all.py 파일명)
+            targets.setdefault('ised_rss', []).append(f"RSS-{number}")
+            rules.append(f"rss:{number}")
+
+        for match in CFR_SECTION_PATTERN.finditer(query):
+            part, section = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+            doc_id = self._cfr_doc_id(part, section)
+            targets.setdefault('fcc_ecfr', [])
+            if doc_id:
+                targets['fcc_ecfr'].append(doc_id)
+            rules.append(f"cfr:{part}.{section}")
+
+        test_report = bool(TEST_REPORT_PATTERN.search(query))
+        for match in CFR_PART_PATTERN.finditer(query):
+            part, subpart = match.group(1), (match.group(2) or '').upper()
+            rules.append(f"cfr_part:{part}{subpart}")
+            if test_report:
+                continue  # "Part 15E test report" - 리포트 종류 설명이지 규정 원문 요청이 아님
+            targets.setdefault('fcc_ecfr', [])
+            if part != '15' or subpart:
+                targets['fcc_ecfr'].append(f"CFR_Part_{part}{subpart}")
+
+        if test_report:
+            targets.setdefault('fcc_testreport', [])
+            rules.append("testreport")
+
+        if not targets:
+            return RoutingDecision(collections=allowed, vector_weight=self.default_weight)
+
+        routed = [name for name in self.all_collections if name in targets and name in allowed]
+        if not routed:
+            # 라우팅 대상이 사용자 선택 범위 밖 → 선택 범위 전체 검색
+            return RoutingDecision(collections=allowed, vector_weight=self.default_weight,
+                                   rules=rules + ["outside_selection"])
+
+        where = {}
+        for name in routed:
+            doc_ids = list(dict.fromkeys(targets[name]))
+            if len(doc_ids) == 1:
+                where[name] = {'doc_id': doc_ids[0]}
+            elif doc_ids:
+                where[name] = {'doc_id': {'$in': doc_ids}}
+
+        # 번호/조항 식별자가 있으면 BM25 비중을 높임 (Test Report만 언급된 경우는 기본값)
+        has_identifier = any(not rule.startswith("testreport") for rule in rules)
+        return RoutingDecision(
+            collections=routed,
+            where=where,
+            vector_weight=self.identifier_weight if has_identifier else self.default_weight,
+            rules=rules
+        )
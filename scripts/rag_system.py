@@ -5,34 +5,75 @@ AI 자동화 시스템 - RAG (Retrieval-Augmented Generation) 시스템
 
 import os
 import json
+import math
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 from dataclasses import dataclass
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from rank_bm25 import BM25Okapi
+import numpy as np
 import re
 
+from answer_cache import SemanticAnswerCache
+from bm25_index import SparseBM25Index
+from context_packer import ContextPacker
+from diversity import document_key, mmr_select
+from fusion import CollectionCandidates, get_fusion
+from embedding_cache import QueryEmbeddingCache
+from onnx_models import OnnxCrossEncoder, OnnxEmbedder
+from query_router import QueryRouter, RoutingDecision
+from rerank_cascade import ScoreCache, query_window, split_band
+from section_index import CitationCheck, SectionIndex, citation_keys
+from startup import LazyModel, breakdown, timed
+from tracing import tracer
+from vector_store import (ChromaVectorStore, NumpyVectorStore, UNIFIED_COLLECTION, COLLECTION_SOURCE_TYPES,
+                          LAYOUT_UNIFIED, read_layout, source_filter)
+
 # 경로 설정
 BASE_DIR = Path(r"C:\Users\younh\Documents\Ai model")
 VECTOR_DB_DIR = BASE_DIR / "aidata" / "vector_db"
+QUERY_CACHE_DIR = VECTOR_DB_DIR / "query_cache"
+BM25_INDEX_DIR = VECTOR_DB_DIR / "bm25_index"
+SECTION_INDEX_DIR = VECTOR_DB_DIR / "section_index"  # vectordb_pipeline.py가 수집 시 구축
+VECTOR_STORE_DIR = VECTOR_DB_DIR / "numpy_store"      # vector_store.py export로 생성
 LOGS_DIR = BASE_DIR / "logs"
 
-# 로깅 설정
+# 로깅 설정 (로그 폴더가 없으면 콘솔만, 파일은 첫 기록 시 열기)
+_log_handlers = [logging.StreamHandler()]
+if LOGS_DIR.is_dir():
+    _log_handlers.insert(0, logging.FileHandler(LOGS_DIR / "rag.log", encoding='utf-8', delay=True))
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(LOGS_DIR / "rag.log", encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=_log_handlers
 )
 logger = logging.getLogger(__name__)
 
 
+def _trace_summary(*trace_ids) -> dict:
+    """요청의 단계별 소요 시간 (검색과 답변 생성이 다른 trace면 합침)"""
+    summary = {}
+    for trace_id in dict.fromkeys(t for t in trace_ids if t is not None):
+        summary.update(tracer.stage_summary(trace_id))
+    return summary
+
+
+def _load_sentence_transformer(model_name: str):
+    with timed("import sentence_transformers"):
+        from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_cross_encoder(model_name: str):
+    with timed("import sentence_transformers"):
+        from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name)
+
+
 @dataclass
 class SearchResult:
     """검색 결과"""
@@ -41,6 +82,8 @@ class SearchResult:
     source_file: str
     source_type: str
     distance: float
+    chunk_id: str = ""                # 청크 ID (중복 제거용, 조항 인용 결과는 빈 값)
+    page_num: Optional[int] = None
 
 
 @dataclass
@@ -50,26 +93,190 @@ class RAGResponse:
     sources: List[SearchResult]
     query: str
     qa_matches: List[dict] = None  # 매칭된 Q&A 쌍
+    prompt_stats: dict = None      # 프롬프트 토큰 통계 (build_prompt_with_stats)
+    citations: List[CitationCheck] = None  # 답변 인용 검증 결과
+    answer_source: str = "llm"     # llm / llm_short (축약 프롬프트) / qa (검증된 Q&A) / cache (답변 캐시)
+    latency_saved: float = 0.0     # 빠른 경로로 생략한 LLM 생성 시간 추정치 (초)
+    trace: dict = None             # 단계별 소요 시간/후보 수 (tracing.stage_summary)
+    error: str = None              # LLM 백엔드 오류 메시지 (있으면 답변은 부분 응답 + 오류 표시, 캐시 저장 안 함)
 
 
-class Reranker:
-    """CrossEncoder 기반 리랭커"""
+@dataclass
+class Retrieval:
+    """검색 단계 결과 (답변 생성 시 재사용)"""
+    query: str
+    sources: List[SearchResult]
+    qa_matches: List[dict] = None
+    query_embedding: List[float] = None
+    routing: RoutingDecision = None
+    trace_id: int = None  # 검색 단계 trace (답변 단계 trace와 합쳐 표시)
+
+
+class LLMBackendError(RuntimeError):
+    """LLM 백엔드 호출 실패 (메시지는 답변 자리에 그대로 표시할 수 있는 형태)"""
+
+
+class StreamingAnswer:
+    """
+    스트리밍 RAG 응답
+    - 순회하면 LLM 토큰 조각을 순서대로 반환
+    - 순회가 끝나면 answer, time_to_first_token, total_time 확정
+    - 스트림 도중 백엔드가 실패하면 오류 메시지를 마지막 조각으로 반환하고 error에 기록
+    """
+
+    def __init__(self, chunks: Iterator[str], sources: List['SearchResult'], query: str,
+                 qa_matches: List[dict] = None, started_at: float = None, prompt_stats: dict = None,
+                 citation_checker=None, answer_source: str = "llm", latency_saved: float = 0.0,
+                 on_complete=None, trace_ids: tuple = ()):
+        self._chunks = chunks
+        self._citation_checker = citation_checker
+        self._on_complete = on_complete  # 스트림을 끝까지 소비하면 (answer, 생성 시간, error)로 호출
+        self.answer_source = answer_source
+        self.latency_saved = latency_saved
+        self.trace_ids = trace_ids
+        self.sources = sources
+        self.query = query
+        self.qa_matches = qa_matches
+        self.prompt_stats = prompt_stats
+        self.started_at = started_at or time.perf_counter()
+        self.answer = ""
+        self.time_to_first_token = None  # 요청 시작 → 첫 토큰 (초)
+        self.total_time = None           # 요청 시작 → 마지막 토큰 (초)
+        self.error = None                # LLM 백엔드 오류 메시지
+
+    def __iter__(self) -> Iterator[str]:
+        generation_started = time.perf_counter()
+        try:
+            for chunk in self._chunks:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - self.started_at
+                self.answer += chunk
+                yield chunk
+        except LLMBackendError as e:
+            self.error = str(e)
+            separator = "\n\n" if self.answer else ""
+            self.answer += separator + self.error
+            yield separator + self.error
+
+        self.total_time = time.perf_counter() - self.started_at
+        if self._on_complete:
+            self._on_complete(self.answer, time.perf_counter() - generation_started, self.error)
+        if self.time_to_first_token is not None:
+            logger.info(f"Streamed answer: TTFT {self.time_to_first_token:.2f}s, total {self.total_time:.2f}s")
+
+    def to_response(self) -> RAGResponse:
+        """스트림 소비 후 일반 RAGResponse로 변환"""
+        citations = self._citation_checker(self.answer) if self._citation_checker else None
+        return RAGResponse(answer=self.answer, sources=self.sources, query=self.query,
+                           qa_matches=self.qa_matches, prompt_stats=self.prompt_stats,
+                           citations=citations, answer_source=self.answer_source,
+                           latency_saved=self.latency_saved, trace=_trace_summary(*self.trace_ids),
+                           error=self.error)
 
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
-        logger.info(f"Loading reranker model: {model_name}")
-        self.model = CrossEncoder(model_name)
 
-    def rerank(self, query: str, results: List['SearchResult'], top_k: int = None) -> List['SearchResult']:
-        """검색 결과 리랭킹"""
+class Reranker:
+    """
+    CrossEncoder 기반 리랭커 (캐스케이드)
+
+    cascade=True면 융합 점수로 top-k가 확정되지 않은 경계 구간만 점수화하고,
+    청크는 쿼리 중심 구간으로 잘라 넣으며, 점수는 (쿼리, 청크 ID) LRU에 캐시
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", cascade: bool = True,
+                 margin_ratio: float = 0.25, window_chars: int = 400, cache_size: int = 4096,
+                 inference: str = "torch"):
+        # 모델은 첫 점수화(또는 warmup/prewarm) 시 로드
+        if inference == "onnx":
+            # onnx_models.py export로 만든 int8 모델 (ONNX Runtime CPU)
+            self.model = LazyModel("load reranker", lambda: OnnxCrossEncoder.load(model_name))
+        else:
+            self.model = LazyModel("load reranker", lambda: _load_cross_encoder(model_name))
+        self.cascade = cascade
+        self.margin_ratio = margin_ratio
+        self.window_chars = window_chars
+        self.score_cache = ScoreCache(cache_size)
+        self.stats = {'calls': 0, 'skipped': 0, 'scored': 0, 'candidates': 0}
+
+    def _score_pairs(self, items: List[tuple]) -> List[float]:
+        """(query, SearchResult) 목록 점수화 - 캐시에 없는 쌍만 CrossEncoder 한 번의 배치로 계산"""
+        keys = [ScoreCache.key(query, r.chunk_id, r.content) for query, r in items]
+        scores = [self.score_cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            pairs = [(items[i][0], query_window(items[i][0], items[i][1].content, self.window_chars))
+                     for i in missing]
+            for i, score in zip(missing, self.model.predict(pairs)):
+                scores[i] = float(score)
+                self.score_cache.put(keys[i], scores[i])
+            self.stats['scored'] += len(missing)
+        return scores
+
+    def _band(self, results: List['SearchResult'], cutoff: Optional[int]) -> tuple:
+        """리랭킹할 구간 [head, band) - 캐스케이드를 쓰지 않으면 전체"""
+        if not self.cascade or not cutoff:
+            return 0, len(results)
+        return split_band([1 - r.distance for r in results], cutoff, self.margin_ratio)
+
+    def _reorder_band(self, results: List['SearchResult'], head: int, band: int,
+                      scores: List[float]) -> List['SearchResult']:
+        """중간 구간만 CrossEncoder 순서로 재배치 (구간의 융합 distance는 순위 자리에 그대로 재할당)"""
+        middle = results[head:band]
+        slots = [r.distance for r in middle]
+        order = sorted(range(len(middle)), key=lambda i: scores[i], reverse=True)
+        reordered = [middle[i] for i in order]
+        for result, distance in zip(reordered, slots):
+            result.distance = distance
+        return results[:head] + reordered + results[band:]
+
+    def rerank(self, query: str, results: List['SearchResult'], top_k: int = None,
+               cutoff: int = None) -> List['SearchResult']:
+        """
+        검색 결과 리랭킹
+
+        Args:
+            results: 융합 점수 순 후보
+            top_k: 반환할 결과 수 (None이면 전체)
+            cutoff: 캐스케이드 경계 순위 (기본 top_k) - 이 순위 안팎이 애매한 후보만 점수화
+        """
         if not results:
             return results
-
-        # Query-Document 쌍 생성
-        pairs = [(query, r.content) for r in results]
-
-        # CrossEncoder 점수 계산
-        scores = self.model.predict(pairs)
-
+        return self.rerank_many([query], [results], top_k, cutoff)[0]
+
+    @tracer.traced("rerank")
+    def rerank_many(self, queries: List[str], results_list: List[List['SearchResult']],
+                    top_k: int = None, cutoff: int = None) -> List[List['SearchResult']]:
+        """여러 쿼리의 검색 결과를 CrossEncoder 한 번의 배치로 리랭킹 (쿼리별 캐스케이드 적용)"""
+        cutoff = cutoff or top_k
+        bands = [self._band(results, cutoff) if results else (0, 0) for results in results_list]
+
+        items = [(query, r) for query, results, (head, band) in zip(queries, results_list, bands)
+                 for r in results[head:band]]
+        scores = self._score_pairs(items) if items else []
+
+        self.stats['calls'] += len(queries)
+        self.stats['candidates'] += sum(len(results) for results in results_list)
+        reranked_list = []
+        offset = 0
+        for results, (head, band) in zip(results_list, bands):
+            if head == band:
+                # 융합 점수 차이로 top-k가 확정 → CrossEncoder 생략
+                self.stats['skipped'] += 1
+                reranked = list(results)
+            elif self.cascade and cutoff:
+                reranked = self._reorder_band(results, head, band, scores[offset:offset + band - head])
+            else:
+                reranked = self._apply_scores(scores[offset:offset + band - head], results)
+            offset += band - head
+            reranked_list.append(reranked[:top_k] if top_k else reranked)
+
+        tracer.annotate(queries=len(queries), candidates=sum(len(results) for results in results_list),
+                        scored=len(items), skipped=sum(1 for head, band in bands if head == band))
+        logger.debug(f"Rerank: scored {len(items)} pairs for {len(queries)} queries "
+                     f"(cache {self.score_cache.hits} hits / {self.score_cache.misses} misses)")
+        return reranked_list
+
+    def _apply_scores(self, scores, results: List['SearchResult'], top_k: int = None) -> List['SearchResult']:
+        """CrossEncoder 점수로 정렬하고 distance 재할당"""
         # 점수와 결과 매핑
         scored_results = list(zip(scores, results))
         scored_results.sort(key=lambda x: x[0], reverse=True)  # 높은 점수 순
@@ -92,45 +299,183 @@ class Reranker:
 class VectorSearch:
     """벡터 검색 엔진 (하이브리드 검색 + 리랭킹 지원)"""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_reranker: bool = False):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_reranker: bool = False,
+                 persist_query_cache: bool = False, max_workers: int = 5, vector_backend: str = "chroma",
+                 vector_store_dir: Path = None, unified: Optional[bool] = None, inference: str = "torch",
+                 prewarm: bool = False):
+        """
+        Args:
+            inference: 'torch' (SentenceTransformer/CrossEncoder) 또는 'onnx' (int8 ONNX Runtime)
+            prewarm: 모델 로드/BM25 스냅샷 매핑을 백그라운드에서 바로 시작
+
+        모델과 BM25 인덱스는 첫 사용 시 로드 (생성자는 저장소만 열고 바로 반환)
+        첫 쿼리 지연을 없애려면 시작 시 warmup() 호출 또는 prewarm=True
+        """
         logger.info("Initializing Vector Search...")
-        self.model = SentenceTransformer(model_name)
+        if inference == "onnx":
+            self.model = LazyModel("load embedding model", lambda: OnnxEmbedder.load(model_name))
+            cache_model_name = f"{model_name}:onnx-int8"  # 임베딩 값이 조금 달라 캐시를 분리
+        else:
+            self.model = LazyModel("load embedding model", lambda: _load_sentence_transformer(model_name))
+            cache_model_name = model_name
 
-        # 리랭커 초기화 (옵션)
-        self.reranker = None
-        if use_reranker:
-            try:
-                self.reranker = Reranker()
-            except Exception as e:
-                logger.warning(f"Reranker 로드 실패: {e}")
+        # 컬렉션 병렬 검색 + Q&A 검색용 스레드 풀 (컬렉션 4개 + Q&A 1개)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-search")
 
-        self.client = chromadb.PersistentClient(
-            path=str(VECTOR_DB_DIR),
-            settings=Settings(anonymized_telemetry=False)
+        # 쿼리 임베딩 캐시 (LRU + 옵션 디스크)
+        self.embedding_cache = QueryEmbeddingCache(
+            self.model, cache_model_name,
+            disk_dir=QUERY_CACHE_DIR if persist_query_cache else None
         )
 
+        # 쿼리 라우터 (식별자 쿼리 → 컬렉션/필터/가중치)
+        self.router = QueryRouter()
+
+        # 리랭커 (옵션, 나중에 attach_reranker()로 붙일 수도 있음 - 모델은 지연 로드)
+        self.inference = inference
+        self.reranker = None
+        self._reranker_lock = threading.Lock()
+        if use_reranker:
+            self.attach_reranker()
+
+        # 벡터 저장소 (chroma: HNSW / numpy: memory-map 정확 검색)
+        with timed("open vector store"):
+            if vector_backend == "numpy":
+                self.store = NumpyVectorStore.load(vector_store_dir or VECTOR_STORE_DIR)
+                logger.info(f"  NumPy vector store: {self.store.manifest['count']} vectors, "
+                            f"{'int8' if self.store.quantized else 'float32'} "
+                            f"({self.store.memory_bytes() / 1e6:.1f} MB)")
+            else:
+                self.store = ChromaVectorStore(VECTOR_DB_DIR)
+
         # 컬렉션 로드
         self.collections = {}
         self.bm25_index = {}  # BM25 인덱스 캐시
-        self.doc_cache = {}   # 문서 캐시
-
-        for name in ["fcc_kdb", "fcc_ecfr", "ised_rss", "fcc_testreport"]:
+        self.doc_cache = {}   # 문서 캐시 (청크 ID -> (document, metadata, embedding))
+        self._bm25_locks = {}  # 컬렉션별 BM25 구축 lock (병렬 검색 시 중복 구축 방지)
+        self._bm25_positions = {}  # 컬렉션별 청크 ID -> BM25 문서 인덱스 (where 필터용)
+        self._bm25_allowed_cache = {}  # 컬렉션별 where 필터 -> 허용 BM25 문서 인덱스
+
+        # 컬렉션 구성 - 통합: regulatory_corpus 1개 + source_type 필터 (ANN 1회) / 분리: 소스별 4개
+        # unified=None이면 벡터DB에 기록된 구성을 따름 (vectordb_pipeline.py / migrate_unified_collection.py가 기록)
+        if unified is None:
+            unified = read_layout(VECTOR_DB_DIR) == LAYOUT_UNIFIED
             try:
-                self.collections[name] = self.client.get_collection(name)
-                count = self.collections[name].count()
-                logger.info(f"  Loaded {name}: {count} documents")
+                available = self.store.list_collections()
             except Exception as e:
-                logger.warning(f"  Collection {name} not found: {e}")
+                logger.warning(f"  Collection list unavailable: {e}")
+                available = None
+            if available is not None and unified and UNIFIED_COLLECTION not in available:
+                logger.warning(f"  Layout is unified but {UNIFIED_COLLECTION} is missing - using per-source collections")
+                unified = False
+            elif available is not None and not unified and UNIFIED_COLLECTION in available:
+                logger.info(f"  {UNIFIED_COLLECTION} ignored (collection layout: separate)")
+        self.unified = unified
+
+        # 문서 수 확인과 BM25 스냅샷 매핑은 warmup() 또는 첫 BM25 검색에서 수행
+        with timed("open collections"):
+            for name in ([UNIFIED_COLLECTION] if unified else list(COLLECTION_SOURCE_TYPES)):
+                try:
+                    self.collections[name] = self.store.get_collection(name)
+                except Exception as e:
+                    logger.warning(f"  Collection {name} not found: {e}")
+                    continue
+                self._bm25_locks[name] = threading.Lock()
+
+        # 검색 대상으로 선택 가능한 소스 컬렉션 (통합 모드에서는 where 필터로 변환)
+        if self.unified:
+            self.sources = list(COLLECTION_SOURCE_TYPES) if self.collections else []
+        else:
+            self.sources = list(self.collections)
 
         # Q&A 컬렉션 로드
         self.qa_collection = None
         try:
-            self.qa_collection = self.client.get_collection("qa_pairs")
-            qa_count = self.qa_collection.count()
-            logger.info(f"  Loaded qa_pairs: {qa_count} Q&A pairs")
+            self.qa_collection = self.store.get_collection("qa_pairs")
         except Exception as e:
             logger.info(f"  Q&A collection not found (optional): {e}")
 
+        # 조항 인용 색인 (15.407(a)(1), RSS-247 5.4, KDB 905462 D01 7.2 → 조항 전체)
+        with timed("load section index"):
+            self.section_index = SectionIndex.load(SECTION_INDEX_DIR)
+        if len(self.section_index):
+            logger.info(f"  Loaded section index: {len(self.section_index)} citations")
+
+        self._warmup_thread = None
+        if prewarm:
+            self.prewarm()
+
+    def warmup(self) -> dict:
+        """
+        첫 쿼리에서 할 준비 작업을 미리 수행 (모델 로드 + 첫 추론, 문서 수 확인, BM25 스냅샷 매핑/구축)
+
+        Returns:
+            startup.breakdown() - 프로세스 시작 후 단계별 소요 시간 (초)
+        """
+        # 모델 로드 후 첫 추론 (스레드 풀/커널 초기화) - 쿼리 임베딩 캐시에는 넣지 않음
+        self.model.get()
+        with timed("warmup embedding"):
+            self.model.encode(["warmup"])
+        if self.reranker and self._load_reranker():
+            with timed("warmup reranker"):
+                self.reranker.model.predict([("warmup", "warmup")])
+
+        for name, col in self.collections.items():
+            with timed("warmup collections"):
+                logger.info(f"  Loaded {name}: {col.count()} documents")
+            with timed("warmup bm25 index"):
+                self._build_bm25_index(name)
+        if self.qa_collection:
+            with timed("warmup collections"):
+                logger.info(f"  Loaded qa_pairs: {self.qa_collection.count()} Q&A pairs")
+        return breakdown()
+
+    def attach_reranker(self, prewarm: bool = False) -> Optional[Reranker]:
+        """
+        리랭커를 붙임 (이미 있으면 그대로 반환 - 검색 엔진/인덱스는 다시 만들지 않음)
+
+        prewarm=True면 CrossEncoder를 백그라운드에서 로드 (실패 시 리랭킹 비활성화)
+        """
+        with self._reranker_lock:
+            if self.reranker is None:
+                self.reranker = Reranker(inference=self.inference)
+                if prewarm:
+                    threading.Thread(target=self._load_reranker, name="reranker-prewarm", daemon=True).start()
+            return self.reranker
+
+    def _load_reranker(self) -> bool:
+        """리랭커 모델 로드 (실패하면 떼어내고 융합 점수 순서로 검색)"""
+        reranker = self.reranker
+        if reranker is None:
+            return False
+        try:
+            reranker.model.get()
+            return True
+        except Exception as e:
+            logger.warning(f"Reranker 로드 실패: {e}")
+            with self._reranker_lock:
+                if self.reranker is reranker:
+                    self.reranker = None
+            return False
+
+    def prewarm(self) -> threading.Thread:
+        """warmup()을 백그라운드 스레드에서 시작 (진행 중 들어온 쿼리는 필요한 부분만 기다림)"""
+        if self._warmup_thread is None:
+            def run():
+                try:
+                    self.warmup()
+                except Exception as e:
+                    logger.warning(f"Prewarm failed: {e}")
+
+            self._warmup_thread = threading.Thread(target=run, name="vector-search-prewarm", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    @tracer.traced("embed_query")
+    def embed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 (캐시 사용) - 요청당 한 번 계산해 search/search_qa에 재사용"""
+        return self.embedding_cache.encode(query)
+
     def _tokenize(self, text: str) -> List[str]:
         """텍스트 토큰화 (BM25용)"""
         # 소문자 변환 + 특수문자/언더스코어를 공백으로 + 분리
@@ -194,13 +539,39 @@ class VectorSearch:
 
         return ' '.join(keywords)
 
+    def _load_bm25_snapshot(self, col_name: str, doc_count: int) -> Optional[SparseBM25Index]:
+        """디스크 BM25 스냅샷 로드 (문서 수가 다르면 무효, 수집 파이프라인이 컬렉션을 바꾸면 삭제됨)"""
+        try:
+            index = SparseBM25Index.load(BM25_INDEX_DIR / col_name)
+        except Exception as e:
+            logger.warning(f"  BM25 snapshot for {col_name} unreadable: {e}")
+            return None
+
+        if index is None or index.ids is None or index.meta.get('doc_count') != doc_count:
+            return None
+        logger.info(f"  BM25 snapshot mapped for {col_name}: {doc_count} documents")
+        return index
+
     def _build_bm25_index(self, col_name: str):
-        """BM25 인덱스 구축 (한 번만 실행)"""
+        """BM25 인덱스 구축 (한 번만 실행, 스냅샷이 유효하면 로드)"""
         if col_name in self.bm25_index:
             return
 
-        logger.info(f"Building BM25 index for {col_name}...")
+        with self._bm25_locks.setdefault(col_name, threading.Lock()):
+            if col_name not in self.bm25_index:
+                self._build_bm25_index_locked(col_name)
+
+    @tracer.traced("bm25_build")
+    def _build_bm25_index_locked(self, col_name: str):
+        """BM25 인덱스 구축 본체 (컬렉션 lock 보유 상태에서 호출)"""
         col = self.collections[col_name]
+        index = self._load_bm25_snapshot(col_name, col.count())
+        if index is not None:
+            tracer.annotate(collection=col_name, snapshot=True, documents=index.corpus_size)
+            self.bm25_index[col_name] = index
+            return
+
+        logger.info(f"Building BM25 index for {col_name}...")
 
         # 모든 문서 가져오기
         all_docs = col.get(include=['documents', 'metadatas'])
@@ -219,19 +590,187 @@ class VectorSearch:
             combined = f"{keywords} {doc}"
             tokenized_docs.append(self._tokenize(combined))
 
-        # BM25 인덱스 생성
-        self.bm25_index[col_name] = BM25Okapi(tokenized_docs)
-        self.doc_cache[col_name] = {
-            'ids': all_docs['ids'],
-            'documents': all_docs['documents'],
-            'metadatas': all_docs['metadatas']
-        }
+        # 희소 역색인 생성 + 스냅샷 저장
+        index = SparseBM25Index.build(
+            tokenized_docs,
+            meta={'doc_count': len(tokenized_docs)},
+            ids=all_docs['ids']
+        )
+        try:
+            index.save(BM25_INDEX_DIR / col_name)
+        except Exception as e:
+            logger.warning(f"  BM25 snapshot save failed: {e}")
+
+        self.bm25_index[col_name] = index
+        tracer.annotate(collection=col_name, snapshot=False, documents=len(tokenized_docs))
         logger.info(f"  BM25 index built: {len(tokenized_docs)} documents")
 
+    def _fetch_documents(self, col_name: str, chunk_ids: List[str]) -> Dict[str, tuple]:
+        """청크 ID로 본문/메타데이터/임베딩 조회 (BM25 전용 결과용, 캐시 사용)"""
+        cache = self.doc_cache.setdefault(col_name, {})
+        missing = [cid for cid in chunk_ids if cid not in cache]
+        if missing:
+            fetched = self.collections[col_name].get(ids=missing, include=['documents', 'metadatas', 'embeddings'])
+            for cid, doc, meta, embedding in zip(fetched['ids'], fetched['documents'], fetched['metadatas'],
+                                                 fetched['embeddings']):
+                cache[cid] = (doc, meta, embedding)
+        return {cid: cache[cid] for cid in chunk_ids if cid in cache}
+
+    def _bm25_allowed(self, col_name: str, where: dict):
+        """where 필터에 맞는 청크의 BM25 문서 인덱스 (오름차순)"""
+        index = self.bm25_index[col_name]
+        positions = self._bm25_positions.get(col_name)
+        if positions is None or len(positions) != index.corpus_size:
+            positions = {chunk_id: i for i, chunk_id in enumerate(index.ids)}
+            self._bm25_positions[col_name] = positions
+            self._bm25_allowed_cache.pop(col_name, None)
+
+        # 같은 필터(통합 모드의 source_type, 라우팅 doc_id)는 반복되므로 결과를 캐시
+        cache = self._bm25_allowed_cache.setdefault(col_name, {})
+        key = json.dumps(where, sort_keys=True)
+        allowed = cache.get(key)
+        if allowed is None:
+            matched = self.collections[col_name].get(where=where, include=[])['ids']
+            allowed = np.array(sorted(positions[cid] for cid in matched if cid in positions), dtype=np.int64)
+            if len(cache) >= 256:
+                cache.clear()
+            cache[key] = allowed
+        return allowed
+
+    def _plan(self, collections: List[str] = None, where: Dict[str, dict] = None) -> Dict[str, Optional[dict]]:
+        """
+        검색할 소스 컬렉션 + 소스별 where → 실제로 질의할 컬렉션별 where
+
+        통합 모드에서는 소스 선택/필터를 source_type where 하나로 합쳐 regulatory_corpus만 질의
+        """
+        if collections is None:
+            collections = self.sources
+        collections = [name for name in collections if name in self.sources]
+        where = where or {}
+        if self.unified:
+            return {UNIFIED_COLLECTION: source_filter(collections, where)} if collections else {}
+        return {name: where.get(name) for name in collections}
+
+    @tracer.traced("search_collection")
+    def _search_collection(self, col_name: str, queries: List[str], query_embeddings: List[List[float]],
+                           n_candidates: int, hybrid: bool, where: dict = None) -> List[CollectionCandidates]:
+        """
+        단일 컬렉션 검색 (벡터 + BM25)
+
+        여러 쿼리를 Chroma 한 번의 query 호출과 BM25 점수 행렬로 처리
+        where가 주어지면 벡터/BM25 모두 필터에 맞는 청크만 후보로 사용
+        Returns: 쿼리별 후보 (벡터 점수 / BM25 원점수 + 적응형 깊이용 floor)
+        """
+        col = self.collections[col_name]
+        pools = [CollectionCandidates(name=col_name, depth=n_candidates) for _ in queries]
+
+        # 1. 벡터 검색 (쿼리 임베딩 여러 개를 한 번에)
+        query_args = {'where': where} if where else {}
+        with tracer.span("vector_query", collection=col_name, n_candidates=n_candidates) as span:
+            vector_results = col.query(
+                query_embeddings=query_embeddings,
+                n_results=n_candidates,
+                include=['documents', 'metadatas', 'distances', 'embeddings'],  # 임베딩은 MMR용
+                **query_args
+            )
+            span.set(hits=sum(len(ids) for ids in vector_results['ids']))
+
+        # 벡터 결과 저장
+        for q, pool in enumerate(pools):
+            for i in range(len(vector_results['ids'][q])):
+                doc_id = vector_results['ids'][q][i]
+                vector_dist = vector_results['distances'][q][i]
+                vector_score = max(0, 1 - vector_dist)
+                metadata = vector_results['metadatas'][q][i]
+
+                pool.items[doc_id] = {
+                    'doc_id': metadata.get('doc_id', 'unknown'),
+                    'content': vector_results['documents'][q][i],
+                    'source_file': metadata.get('source_file', ''),
+                    'source_type': metadata.get('source_type', ''),
+                    'page_num': metadata.get('page_num'),
+                    'embedding': vector_results['embeddings'][q][i],
+                    'vector_score': vector_score,
+                    'bm25_raw': None
+                }
+                if len(vector_results['ids'][q]) >= n_candidates:
+                    pool.vector_floor = vector_score  # 마지막 값 = 더 가져올 후보의 상한
+
+        if hybrid:
+            # 2. BM25 독립 검색 (쿼리 토큰 포스팅만 점수화 + top-k 선택)
+            self._build_bm25_index(col_name)
+            index = self.bm25_index[col_name]
+            with tracer.span("bm25_query", collection=col_name, n_candidates=n_candidates):
+                allowed = self._bm25_allowed(col_name, where) if where else None
+                top_many = index.top_k_many([self._tokenize(query) for query in queries], n_candidates, allowed)
+
+            top_ids_list = [[index.ids[idx] for idx in top[0]] for top in top_many]
+            docs = self._fetch_documents(col_name, list(dict.fromkeys(
+                cid for pool, top_ids in zip(pools, top_ids_list)
+                for cid in top_ids if cid not in pool.items
+            )))
+
+            for pool, top_ids, (_, top_bm25_scores, max_bm25) in zip(pools, top_ids_list, top_many):
+                pool.bm25_max = max_bm25
+                if len(top_ids) >= n_candidates and top_bm25_scores:
+                    pool.bm25_floor = top_bm25_scores[-1]
+
+                for doc_id, score in zip(top_ids, top_bm25_scores):
+                    if doc_id in pool.items:
+                        # 이미 벡터 검색에서 나온 결과 - BM25 점수 추가
+                        pool.items[doc_id]['bm25_raw'] = score
+                    elif doc_id in docs:
+                        # BM25에서만 나온 새 결과
+                        document, metadata, embedding = docs[doc_id]
+                        pool.items[doc_id] = {
+                            'doc_id': metadata.get('doc_id', 'unknown'),
+                            'content': document,
+                            'source_file': metadata.get('source_file', ''),
+                            'source_type': metadata.get('source_type', ''),
+                            'page_num': metadata.get('page_num'),
+                            'embedding': embedding,
+                            'vector_score': None,
+                            'bm25_raw': score
+                        }
+
+        tracer.annotate(collection=col_name, candidates=sum(len(pool.items) for pool in pools))
+        return pools
+
+    def _fan_out(self, collections: List[str], task, timeout: Optional[float] = None,
+                 parallel: bool = True) -> Dict[str, object]:
+        """
+        컬렉션별 작업을 스레드 풀에서 병렬 실행
+
+        timeout 내에 끝나지 않은 컬렉션은 경고 후 제외 (부분 결과 반환)
+        반환 dict는 요청한 컬렉션 순서를 유지 (결정적 병합)
+        """
+        if not parallel or len(collections) <= 1:
+            return {name: task(name) for name in collections}
+
+        futures = {name: self.executor.submit(tracer.wrap(task), name) for name in collections}
+        done, not_done = wait(futures.values(), timeout=timeout)
+
+        outputs = {}
+        for name, future in futures.items():
+            if future in not_done:
+                future.cancel()
+                logger.warning(f"  {name} search timed out after {timeout}s - partial results")
+                continue
+            try:
+                outputs[name] = future.result()
+            except Exception as e:
+                logger.warning(f"  {name} search failed: {e}")
+        return outputs
+
+    @tracer.traced("search")
     def search(self, query: str, collections: List[str] = None, n_results: int = 5,
-               hybrid: bool = True, vector_weight: float = 0.5, rerank: bool = False) -> List[SearchResult]:
+               hybrid: bool = True, vector_weight: float = 0.5, rerank: bool = False,
+               query_embedding: List[float] = None, parallel: bool = True,
+               collection_timeout: Optional[float] = None, fusion: str = 'weighted',
+               adaptive_depth: bool = False, where: Dict[str, dict] = None, mmr: bool = False,
+               mmr_lambda: float = 0.7, max_per_doc: Optional[int] = None) -> List[SearchResult]:
         """
-        하이브리드 검색 (벡터 + BM25 독립 검색 후 병합) + 옵션 리랭킹
+        하이브리드 검색 (벡터 + BM25 독립 검색 후 병합) + 옵션 리랭킹/다양화
 
         Args:
             query: 검색어
@@ -240,100 +779,178 @@ class VectorSearch:
             hybrid: 하이브리드 검색 사용 여부
             vector_weight: 벡터 검색 가중치 (0~1, 나머지는 BM25)
             rerank: 리랭킹 적용 여부
+            query_embedding: 미리 계산된 쿼리 임베딩 (없으면 캐시에서 조회/계산)
+            parallel: 컬렉션별 검색을 스레드 풀에서 병렬 실행
+            collection_timeout: 컬렉션별 제한 시간 (초, 초과 시 해당 컬렉션 제외)
+            fusion: 점수 융합 방식 ('weighted' 기존 가중합, 'rrf', 'zscore')
+            adaptive_depth: 후보를 필요한 만큼만 가져옴 (n_results부터 시작해 최대 n_results * 3,
+                            결과는 전체 깊이와 동일 - weighted만 적용, rrf/zscore는 전체 깊이)
+                            깊어질 때마다 컬렉션을 다시 질의하므로 top-k가 얕은 후보로 확정되는
+                            경우가 아니면 전체 깊이 1회보다 느림
+            where: 컬렉션별 Chroma 메타데이터 필터 (예: {'fcc_kdb': {'doc_id': 'KDB_789033'}})
+            mmr: MMR로 최종 top-k 다양화 (저장된 청크 임베딩 사용)
+            mmr_lambda: MMR 관련도 비중 (0~1, 낮을수록 다양성 우선)
+            max_per_doc: 문서(파일)별 최대 청크 수
         """
-        if collections is None:
-            collections = list(self.collections.keys())
+        plan = self._plan(collections, where)
+        collections = list(plan)
 
-        all_results = {}  # doc_id -> result (중복 제거용)
+        # 쿼리 임베딩은 컬렉션 수와 무관하게 한 번만 계산
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
 
-        for col_name in collections:
-            if col_name not in self.collections:
-                continue
+        strategy = get_fusion(fusion)
+        weight = vector_weight if hybrid else 1.0
+        diversify = mmr or max_per_doc is not None
+        # 리랭킹(상위 2배)/다양화(상위 3배)는 후보를 더 사용 - 이 범위까지 전체 깊이와 같은 결과 보장
+        if rerank and self.reranker:
+            target = n_results * 2
+        elif diversify:
+            target = n_results * 3
+        else:
+            target = n_results
+        max_depth = n_results * 3
+        # 순위/통계 기반 전략(rrf, zscore)은 깊이에 따라 점수가 달라지므로 전체 깊이로 가져옴
+        adaptive_depth = adaptive_depth and strategy.exact_tail
+        depths = {name: (target if adaptive_depth else max_depth) for name in collections}
+
+        pools = {}
+        fused = []  # 검색할 컬렉션이 없으면 (선택 없음/미존재 컬렉션) 빈 결과
+        pending = list(collections)
+        while pending:
+            fetched = self._fan_out(
+                pending,
+                lambda name: self._search_collection(name, [query], [query_embedding], depths[name], hybrid,
+                                                     plan[name])[0],
+                timeout=collection_timeout,
+                parallel=parallel
+            )
+            pools.update(fetched)
+            ordered = [pools[name] for name in collections if name in pools]
+            with tracer.span("fuse", strategy=strategy.name):
+                fused = strategy.fuse(ordered, weight)
+            if not adaptive_depth:
+                break
 
-            col = self.collections[col_name]
+            # 더 깊이 가져와도 top-k 점수/순서가 바뀔 수 없는 컬렉션은 중단
+            # (top-k 후보에 빠진 신호가 남아 있으면 그 후보 점수가 확정될 때까지 계속)
+            ranked = sorted(fused, key=lambda x: x[2], reverse=True)
+            kth_score = ranked[target - 1][2] if len(ranked) >= target else -math.inf
+            pending = []
+            for name in fetched:
+                pool = pools[name]
+                if pool.depth >= max_depth or pool.exhausted:
+                    continue
+                if strategy.tail_bound(pool, weight) >= kth_score:
+                    depths[name] = min(pool.depth * 2, max_depth)
+                    pending.append(name)
 
-            # 1. 벡터 검색
-            query_embedding = self.model.encode([query]).tolist()
-            vector_results = col.query(
-                query_embeddings=query_embedding,
-                n_results=n_results * 3,
-                include=['documents', 'metadatas', 'distances']
-            )
+        if adaptive_depth:
+            logger.info(f"Candidate depth ({strategy.name}): " +
+                        ", ".join(f"{name}={pools[name].depth}" for name in collections if name in pools))
 
-            # 벡터 결과 저장
-            for i in range(len(vector_results['ids'][0])):
-                doc_id = vector_results['ids'][0][i]
-                vector_dist = vector_results['distances'][0][i]
-                vector_score = max(0, 1 - vector_dist)
+        final_results = self._to_search_results(fused)
 
-                all_results[doc_id] = {
-                    'doc_id': vector_results['metadatas'][0][i].get('doc_id', 'unknown'),
-                    'content': vector_results['documents'][0][i],
-                    'source_file': vector_results['metadatas'][0][i].get('source_file', ''),
-                    'source_type': vector_results['metadatas'][0][i].get('source_type', ''),
-                    'vector_score': vector_score,
-                    'bm25_score': 0
-                }
+        # 리랭킹 적용 (옵션)
+        if rerank and self.reranker:
+            # 리랭킹을 위해 더 많은 후보를 가져옴
+            candidates = final_results[:n_results * 2]
+            final_results = self.reranker.rerank(query, candidates, top_k=None if diversify else n_results,
+                                                 cutoff=n_results)
 
-            if hybrid:
-                # 2. BM25 독립 검색
-                self._build_bm25_index(col_name)
-                query_tokens = self._tokenize(query)
-                bm25_scores = self.bm25_index[col_name].get_scores(query_tokens)
-                cache = self.doc_cache[col_name]
+        # 다양화 적용 (옵션) - 중복 청크 제외 + 문서별 상한
+        if diversify:
+            final_results = self._diversify(final_results, fused, n_results, mmr_lambda if mmr else 1.0,
+                                            max_per_doc)
 
-                # BM25 상위 결과 가져오기
-                max_bm25 = max(bm25_scores) if max(bm25_scores) > 0 else 1
-                top_bm25_indices = sorted(range(len(bm25_scores)),
-                                         key=lambda x: bm25_scores[x], reverse=True)[:n_results * 3]
+        tracer.annotate(collections=len(collections), fusion=strategy.name, candidates=len(fused),
+                        results=min(len(final_results), n_results))
+        return final_results[:n_results]
 
-                for idx in top_bm25_indices:
-                    doc_id = cache['ids'][idx]
-                    bm25_norm = bm25_scores[idx] / max_bm25
+    @tracer.traced("diversify")
+    def _diversify(self, results: List[SearchResult], fused: List[tuple], n_results: int,
+                   mmr_lambda: float, max_per_doc: Optional[int]) -> List[SearchResult]:
+        """MMR 선택 (임베딩은 벡터 검색/BM25 조회 시 함께 받아 온 저장 임베딩을 재사용)"""
+        embeddings = {chunk_id: data.get('embedding') for chunk_id, data, _ in fused}
+        return mmr_select(results[:n_results * 3], embeddings, n_results, mmr_lambda, max_per_doc)
+
+    @tracer.traced("search_many")
+    def search_many(self, queries: List[str], collections: List[str] = None, n_results: int = 5,
+                    hybrid: bool = True, vector_weight: float = 0.5, rerank: bool = False,
+                    parallel: bool = True, collection_timeout: Optional[float] = None,
+                    fusion: str = 'weighted', mmr: bool = False, mmr_lambda: float = 0.7,
+                    max_per_doc: Optional[int] = None) -> List[List[SearchResult]]:
+        """
+        여러 쿼리 일괄 검색 (평가 스크립트/Q&A 생성기용)
 
-                    if doc_id in all_results:
-                        # 이미 벡터 검색에서 나온 결과 - BM25 점수 추가
-                        all_results[doc_id]['bm25_score'] = bm25_norm
-                    else:
-                        # BM25에서만 나온 새 결과
-                        all_results[doc_id] = {
-                            'doc_id': cache['metadatas'][idx].get('doc_id', 'unknown'),
-                            'content': cache['documents'][idx],
-                            'source_file': cache['metadatas'][idx].get('source_file', ''),
-                            'source_type': cache['metadatas'][idx].get('source_type', ''),
-                            'vector_score': 0,
-                            'bm25_score': bm25_norm
-                        }
+        쿼리 임베딩 1회 배치 → 컬렉션별 Chroma query 1회 → BM25 점수 행렬
+        → CrossEncoder 1회 배치 순으로 처리하며, 결과는 search()를 쿼리별로
+        호출한 것과 같음
 
-        # 3. 하이브리드 점수 계산 및 결과 생성
-        final_results = []
-        for doc_id, data in all_results.items():
-            if hybrid:
-                hybrid_score = (data['vector_score'] * vector_weight) + \
-                              (data['bm25_score'] * (1 - vector_weight))
-            else:
-                hybrid_score = data['vector_score']
+        Returns:
+            쿼리 순서대로 SearchResult 리스트
+        """
+        if not queries:
+            return []
+        plan = self._plan(collections)
+        collections = list(plan)
 
+        query_embeddings = self.embedding_cache.encode_many(queries)
+
+        per_collection = self._fan_out(
+            collections,
+            lambda name: self._search_collection(name, queries, query_embeddings, n_results * 3, hybrid,
+                                                 plan[name]),
+            timeout=collection_timeout,
+            parallel=parallel
+        )
+
+        strategy = get_fusion(fusion)
+        weight = vector_weight if hybrid else 1.0
+        fused_list = [strategy.fuse([pools[q] for pools in per_collection.values()], weight)
+                      for q in range(len(queries))]
+        final_list = [self._to_search_results(fused) for fused in fused_list]
+        diversify = mmr or max_per_doc is not None
+
+        # 리랭킹 적용 (옵션) - 모든 쿼리의 (query, chunk) 쌍을 한 번에 점수화
+        if rerank and self.reranker:
+            candidates_list = [final_results[:n_results * 2] for final_results in final_list]
+            final_list = self.reranker.rerank_many(queries, candidates_list,
+                                                   top_k=None if diversify else n_results, cutoff=n_results)
+
+        if diversify:
+            final_list = [self._diversify(final_results, fused, n_results, mmr_lambda if mmr else 1.0, max_per_doc)
+                          for final_results, fused in zip(final_list, fused_list)]
+
+        tracer.annotate(queries=len(queries), collections=len(collections))
+        return [final_results[:n_results] for final_results in final_list]
+
+    def _to_search_results(self, fused: List[tuple]) -> List[SearchResult]:
+        """융합 점수 → SearchResult (거리 = 1 - 점수, 안정 정렬)"""
+        final_results = []
+        for chunk_id, data, score in fused:
             final_results.append(SearchResult(
                 doc_id=data['doc_id'],
                 content=data['content'],
                 source_file=data['source_file'],
                 source_type=data['source_type'],
-                distance=1 - hybrid_score  # 낮을수록 좋음
+                distance=1 - score,  # 낮을수록 좋음
+                chunk_id=chunk_id,
+                page_num=data.get('page_num')
             ))
 
         # 거리 기준 정렬
         final_results.sort(key=lambda x: x.distance)
+        return final_results
 
-        # 리랭킹 적용 (옵션)
-        if rerank and self.reranker:
-            # 리랭킹을 위해 더 많은 후보를 가져옴
-            candidates = final_results[:n_results * 2]
-            final_results = self.reranker.rerank(query, candidates, top_k=n_results)
-
-        return final_results[:n_results]
+    def submit_search_qa(self, query: str, n_results: int = 3, threshold: float = 0.6,
+                         query_embedding: List[float] = None) -> Future:
+        """Q&A 검색을 검색 스레드 풀에 제출 (문서 검색과 겹쳐서 실행)"""
+        return self.executor.submit(tracer.wrap(self.search_qa), query, n_results, threshold, query_embedding)
 
-    def search_qa(self, query: str, n_results: int = 3, threshold: float = 0.6) -> List[dict]:
+    @tracer.traced("search_qa")
+    def search_qa(self, query: str, n_results: int = 3, threshold: float = 0.6,
+                  query_embedding: List[float] = None) -> List[dict]:
         """
         Q&A 컬렉션에서 검색
 
@@ -341,6 +958,7 @@ class VectorSearch:
             query: 검색어
             n_results: 반환할 Q&A 수
             threshold: 최소 유사도 (0~1, 높을수록 엄격)
+            query_embedding: 미리 계산된 쿼리 임베딩 (없으면 캐시에서 조회/계산)
 
         Returns:
             매칭된 Q&A 리스트 [{"question": ..., "answer": ..., "similarity": ...}, ...]
@@ -349,9 +967,10 @@ class VectorSearch:
             return []
 
         try:
-            query_embedding = self.model.encode([query]).tolist()
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             results = self.qa_collection.query(
-                query_embeddings=query_embedding,
+                query_embeddings=[query_embedding],
                 n_results=n_results,
                 include=['documents', 'metadatas', 'distances']
             )
@@ -372,25 +991,227 @@ class VectorSearch:
                         'similarity': similarity
                     })
 
+            tracer.annotate(matches=len(qa_matches),
+                            top_similarity=round(qa_matches[0]['similarity'], 4) if qa_matches else None)
             return qa_matches
         except Exception as e:
             logger.warning(f"Q&A search error: {e}")
             return []
 
+    @tracer.traced("search")
+    async def asearch(self, query: str, collections: List[str] = None, n_results: int = 5,
+                      hybrid: bool = True, vector_weight: float = 0.5, rerank: bool = False,
+                      query_embedding: List[float] = None,
+                      collection_timeout: Optional[float] = None, fusion: str = 'weighted',
+                      where: Dict[str, dict] = None, mmr: bool = False, mmr_lambda: float = 0.7,
+                      max_per_doc: Optional[int] = None) -> List[SearchResult]:
+        """
+        search()의 asyncio 버전
+
+        임베딩/컬렉션 검색/리랭킹(CPU 작업)은 검색 스레드 풀로 넘기고
+        이벤트 루프는 다른 요청을 처리할 수 있도록 양보
+        """
+        loop = asyncio.get_running_loop()
+        plan = self._plan(collections, where)
+        collections = list(plan)
+
+        if query_embedding is None:
+            query_embedding = await loop.run_in_executor(self.executor, tracer.wrap(self.embed_query), query)
+
+        async def search_collection(name: str):
+            future = loop.run_in_executor(self.executor, tracer.wrap(self._search_collection),
+                                          name, [query], [query_embedding], n_results * 3, hybrid, plan[name])
+            return await asyncio.wait_for(future, timeout=collection_timeout)
+
+        outputs = await asyncio.gather(*(search_collection(name) for name in collections),
+                                       return_exceptions=True)
+
+        per_collection = []
+        for name, output in zip(collections, outputs):
+            if isinstance(output, asyncio.TimeoutError):
+                logger.warning(f"  {name} search timed out after {collection_timeout}s - partial results")
+            elif isinstance(output, Exception):
+                logger.warning(f"  {name} search failed: {output}")
+            else:
+                per_collection.append(output[0])
+
+        with tracer.span("fuse", strategy=fusion):
+            fused = get_fusion(fusion).fuse(per_collection, vector_weight if hybrid else 1.0)
+        final_results = self._to_search_results(fused)
+        diversify = mmr or max_per_doc is not None
+
+        # 리랭킹 적용 (옵션)
+        if rerank and self.reranker:
+            candidates = final_results[:n_results * 2]
+            final_results = await loop.run_in_executor(self.executor, tracer.wrap(self.reranker.rerank),
+                                                       query, candidates, None if diversify else n_results,
+                                                       n_results)
+
+        if diversify:
+            final_results = self._diversify(final_results, fused, n_results, mmr_lambda if mmr else 1.0,
+                                            max_per_doc)
+
+        tracer.annotate(collections=len(collections), fusion=fusion, candidates=len(fused),
+                        results=min(len(final_results), n_results))
+        return final_results[:n_results]
+
+    async def asearch_qa(self, query: str, n_results: int = 3, threshold: float = 0.6,
+                         query_embedding: List[float] = None) -> List[dict]:
+        """search_qa()의 asyncio 버전"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, tracer.wrap(self.search_qa),
+                                          query, n_results, threshold, query_embedding)
+
+    def lookup_citations(self, query: str) -> List[SearchResult]:
+        """
+        쿼리에 명시된 조항 인용을 색인에서 바로 조회 (임베딩/BM25 없이 dict 조회)
+
+        Returns:
+            조항 전체 본문 SearchResult (distance 0, 인용 순서)
+        """
+        results = []
+        seen = set()
+        for raw, key in citation_keys(query):
+            entry = self.section_index.lookup(key)
+            if entry is None or (entry.text_file, entry.start) in seen:
+                continue
+            seen.add((entry.text_file, entry.start))
+            try:
+                content = self.section_index.section_text(entry)
+            except OSError as e:
+                logger.warning(f"  Section text unavailable for {entry.key}: {e}")
+                continue
+            logger.info(f"  Citation {raw} -> {entry.key} ({entry.doc_id}, {len(entry.chunk_ids)} chunks)")
+            results.append(SearchResult(
+                doc_id=entry.doc_id,
+                content=content,
+                source_file=entry.source_file,
+                source_type=entry.source_type,
+                distance=0.0
+            ))
+        return results
+
+    def with_citations(self, citations: List[SearchResult], results: List[SearchResult]) -> List[SearchResult]:
+        """인용 조항을 앞에 두고, 그 조항 본문에 포함된 검색 청크는 제외"""
+        if not citations:
+            return results
+        remaining = [
+            r for r in results
+            if not any(r.source_file == c.source_file and r.content[:200] in c.content for c in citations)
+        ]
+        return citations + remaining
+
+    def check_citations(self, text: str) -> List[CitationCheck]:
+        """생성된 답변의 인용이 실제 색인된 조항인지 확인"""
+        return self.section_index.check_citations(text)
+
+    def route(self, query: str, collections: List[str] = None) -> RoutingDecision:
+        """쿼리 라우팅 (로드된 소스 컬렉션 범위 안으로 제한) + 결정 로그"""
+        if collections is None:
+            collections = self.sources
+        collections = [name for name in collections if name in self.sources]
+        decision = self.router.route(query, collections)
+        logger.info(f"Routing: {decision.describe()}")
+        return decision
+
+    def _top_up(self, results: List[SearchResult], extra: List[SearchResult],
+                n_results: int, max_per_doc: Optional[int] = None) -> List[SearchResult]:
+        """필터 결과가 부족하면 필터 없는 결과로 보충 (수집되지 않은 doc_id 등, 청크 ID로 중복 제거)"""
+        seen = {r.chunk_id or (r.doc_id, r.source_file, r.content) for r in results}
+        per_doc = {}
+        for r in results:
+            per_doc[document_key(r)] = per_doc.get(document_key(r), 0) + 1
+        for r in extra:
+            if len(results) >= n_results:
+                break
+            if (r.chunk_id or (r.doc_id, r.source_file, r.content)) in seen:
+                continue
+            if max_per_doc is not None and per_doc.get(document_key(r), 0) >= max_per_doc:
+                continue
+            per_doc[document_key(r)] = per_doc.get(document_key(r), 0) + 1
+            results.append(r)
+        return results
+
+    def search_routed(self, query: str, decision: RoutingDecision = None, n_results: int = 5,
+                      hybrid: bool = True, rerank: bool = False, query_embedding: List[float] = None,
+                      fusion: str = 'weighted', adaptive_depth: bool = False, mmr: bool = False,
+                      max_per_doc: Optional[int] = None) -> List[SearchResult]:
+        """
+        라우팅 결정(컬렉션/where 필터/가중치)을 적용한 검색
+
+        필터에 맞는 청크가 n_results보다 적으면 같은 컬렉션의 필터 없는 결과로 보충
+        """
+        if decision is None:
+            decision = self.route(query)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+
+        options = dict(n_results=n_results, hybrid=hybrid, vector_weight=decision.vector_weight,
+                       rerank=rerank, query_embedding=query_embedding, fusion=fusion,
+                       adaptive_depth=adaptive_depth, mmr=mmr, max_per_doc=max_per_doc)
+        results = self.search(query, collections=decision.collections, where=decision.where, **options)
+        if decision.where and len(results) < n_results:
+            logger.info(f"  Routed filter returned {len(results)} results - topping up without filter")
+            results = self._top_up(results, self.search(query, collections=decision.collections, **options),
+                                   n_results, max_per_doc)
+        return results
+
+    async def asearch_routed(self, query: str, decision: RoutingDecision = None, n_results: int = 5,
+                             hybrid: bool = True, rerank: bool = False, query_embedding: List[float] = None,
+                             fusion: str = 'weighted', mmr: bool = False,
+                             max_per_doc: Optional[int] = None) -> List[SearchResult]:
+        """search_routed()의 asyncio 버전"""
+        if decision is None:
+            decision = self.route(query)
+
+        options = dict(n_results=n_results, hybrid=hybrid, vector_weight=decision.vector_weight,
+                       rerank=rerank, query_embedding=query_embedding, fusion=fusion,
+                       mmr=mmr, max_per_doc=max_per_doc)
+        results = await self.asearch(query, collections=decision.collections, where=decision.where, **options)
+        if decision.where and len(results) < n_results:
+            logger.info(f"  Routed filter returned {len(results)} results - topping up without filter")
+            results = self._top_up(results, await self.asearch(query, collections=decision.collections, **options),
+                                   n_results, max_per_doc)
+        return results
+
 
 class LLMBackend:
     """LLM 백엔드 추상 클래스"""
 
+    context_window = 4096     # 입력+출력 토큰 한도 (프롬프트 패킹 예산 계산용)
+    max_output_tokens = 1024  # 답변용으로 예약할 토큰
+    cacheable = True          # 생성된 답변을 답변 캐시에 저장할지 (Mock 등 고정 응답은 False)
+
     def generate(self, prompt: str) -> str:
+        """전체 응답 생성 (실패 시 LLMBackendError)"""
         raise NotImplementedError
 
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """토큰 스트리밍 생성 (기본: 전체 응답을 한 조각으로 반환, 실패 시 LLMBackendError)"""
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        """비동기 생성 (기본: 동기 generate를 스레드에서 실행)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, prompt)
+
 
 class OllamaBackend(LLMBackend):
     """Ollama 로컬 LLM 백엔드"""
 
-    def __init__(self, model: str = "qwen2:7b"):  # 기본값을 Qwen2로 변경 (한국어 지원)
+    def __init__(self, model: str = "qwen2:7b", base_url: str = "http://localhost:11434",
+                 num_ctx: int = 4096):  # 기본값을 Qwen2로 변경 (한국어 지원)
         self.model = model
-        self.base_url = "http://localhost:11434"
+        self.base_url = base_url
+        self.context_window = num_ctx
+
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"num_ctx": self.context_window}  # 패킹 예산과 같은 컨텍스트 창 사용
+        }
 
     def generate(self, prompt: str) -> str:
         import requests
@@ -398,23 +1219,67 @@ class OllamaBackend(LLMBackend):
         try:
             response = requests.post(
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
+                json=self._payload(prompt, stream=False),
                 timeout=120
             )
             response.raise_for_status()
             return response.json().get('response', '')
         except Exception as e:
             logger.error(f"Ollama error: {e}")
-            return f"[Ollama 오류: {e}]"
+            raise LLMBackendError(f"[Ollama 오류: {e}]") from e
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Ollama NDJSON 스트리밍 (줄마다 {"response": ..., "done": ...})"""
+        import requests
+
+        try:
+            with requests.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt, stream=True),
+                stream=True,
+                timeout=120
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        raise RuntimeError(chunk['error'])
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+        except Exception as e:
+            logger.error(f"Ollama error: {e}")
+            raise LLMBackendError(f"[Ollama 오류: {e}]") from e
+
+    async def agenerate(self, prompt: str) -> str:
+        """httpx 비동기 클라이언트로 생성 (httpx 없으면 스레드 실행으로 대체)"""
+        try:
+            import httpx
+        except ImportError:
+            return await super().agenerate(prompt)
+
+        try:
+            async with httpx.AsyncClient(timeout=120) as client:
+                response = await client.post(
+                    f"{self.base_url}/api/generate",
+                    json=self._payload(prompt, stream=False)
+                )
+                response.raise_for_status()
+                return response.json().get('response', '')
+        except Exception as e:
+            logger.error(f"Ollama error: {e}")
+            raise LLMBackendError(f"[Ollama 오류: {e}]") from e
 
 
 class ClaudeBackend(LLMBackend):
     """Anthropic Claude API 백엔드"""
 
+    context_window = 200000
+    max_output_tokens = 2048
+
     def __init__(self, api_key: str = None, model: str = "claude-3-5-sonnet-20241022"):
         self.model = model
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
@@ -424,13 +1289,48 @@ class ClaudeBackend(LLMBackend):
 
         from anthropic import Anthropic
         self.client = Anthropic(api_key=self.api_key)
+        self.async_client = None  # aask 첫 호출 시 생성
         logger.info(f"Claude API initialized with model: {model}")
 
     def generate(self, prompt: str) -> str:
         try:
             message = self.client.messages.create(
                 model=self.model,
-                max_tokens=2048,
+                max_tokens=self.max_output_tokens,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            return message.content[0].text
+        except Exception as e:
+            logger.error(f"Claude API error: {e}")
+            raise LLMBackendError(f"[Claude API 오류: {e}]") from e
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Claude 스트리밍 이벤트의 텍스트 델타 반환"""
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=self.max_output_tokens,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            logger.error(f"Claude API error: {e}")
+            raise LLMBackendError(f"[Claude API 오류: {e}]") from e
+
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            if self.async_client is None:
+                from anthropic import AsyncAnthropic
+                self.async_client = AsyncAnthropic(api_key=self.api_key)
+
+            message = await self.async_client.messages.create(
+                model=self.model,
+                max_tokens=self.max_output_tokens,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
@@ -438,12 +1338,14 @@ class ClaudeBackend(LLMBackend):
             return message.content[0].text
         except Exception as e:
             logger.error(f"Claude API error: {e}")
-            return f"[Claude API 오류: {e}]"
+            raise LLMBackendError(f"[Claude API 오류: {e}]") from e
 
 
 class MockLLMBackend(LLMBackend):
     """테스트용 Mock LLM (LLM 없이 검색 결과만 반환)"""
 
+    cacheable = False  # 고정 안내 문구 - 답변 캐시에 저장하지 않음
+
     def generate(self, prompt: str) -> str:
         # 프롬프트에서 컨텍스트와 질문 추출해서 요약 형태로 반환
         return "[Mock LLM] 검색된 문서 기반으로 답변이 생성됩니다. 실제 LLM 연동 후 자연어 답변이 제공됩니다."
@@ -452,14 +1354,91 @@ class MockLLMBackend(LLMBackend):
 class RAGSystem:
     """RAG Q&A 시스템"""
 
-    def __init__(self, llm_backend: LLMBackend = None):
-        self.search_engine = VectorSearch()
+    def __init__(self, llm_backend: LLMBackend = None, context_packer: ContextPacker = None,
+                 search_engine: 'VectorSearch' = None, answer_cache: Optional[SemanticAnswerCache] = None,
+                 qa_direct_threshold: Optional[float] = 0.9, qa_short_threshold: Optional[float] = 0.75,
+                 short_prompt_contexts: int = 2):
+        """
+        Args:
+            search_engine: 이미 만든 검색 엔진 공유 (None이면 새로 생성)
+            answer_cache: 생성된 답변의 의미 기반 캐시 (None이면 기본 설정으로 생성)
+            qa_direct_threshold: 최상위 Q&A 유사도가 이 이상이면 LLM 없이 검증된 답변 반환 (None이면 비활성)
+            qa_short_threshold: 이 이상 ~ qa_direct_threshold 미만이면 축약 프롬프트 사용 (None이면 비활성)
+            short_prompt_contexts: 축약 프롬프트에 넣을 참고 문서 수
+
+        Q&A 유사도는 1 - 제곱 L2 거리 (정규화 임베딩에서 2·cos - 1, 0.9 ≈ 코사인 0.95)
+        """
+        self.search_engine = search_engine or VectorSearch()
         self.llm = llm_backend or MockLLMBackend()
+        self.context_packer = context_packer or ContextPacker()
+        self.answer_cache = answer_cache if answer_cache is not None else SemanticAnswerCache()
+        self.qa_direct_threshold = qa_direct_threshold
+        self.qa_short_threshold = qa_short_threshold
+        self.short_prompt_contexts = short_prompt_contexts
+
+        # 빠른 경로 통계 (답변 캐시 통계는 answer_cache.stats())
+        self._stats_lock = threading.Lock()
+        self._answer_counts = {'llm': 0, 'llm_short': 0, 'qa': 0, 'cache': 0}
+        self._qa_saved_seconds = 0.0
+        self._generation_seconds = 0.0
 
     def build_prompt(self, query: str, contexts: List[SearchResult], qa_matches: List[dict] = None) -> str:
         """LLM 프롬프트 생성 - 구체적인 답변 유도"""
+        return self.build_prompt_with_stats(query, contexts, qa_matches)[0]
 
-        # Q&A 매칭 결과 섹션
+    @tracer.traced("build_prompt")
+    def build_prompt_with_stats(self, query: str, contexts: List[SearchResult],
+                                qa_matches: List[dict] = None, short: bool = False) -> tuple:
+        """
+        LLM 프롬프트 생성 + 토큰 통계
+
+        참고 문서는 ContextPacker로 백엔드 컨텍스트 창에 맞게 패킹
+        (컨텍스트 창 - 출력 예약 - 지시문/Q&A 토큰 = 컨텍스트 예산)
+        short=True면 축약 템플릿 + 상위 short_prompt_contexts개 문서만 사용
+
+        Returns:
+            (prompt, stats) - stats에 prompt_tokens, context_tokens, raw_context_tokens 등
+        """
+        qa_section = self._format_qa_section(qa_matches)
+        render = self._render_short_prompt if short else self._render_prompt
+        if short:
+            contexts = contexts[:self.short_prompt_contexts]
+
+        count_tokens = self.context_packer.count_tokens
+        template_tokens = count_tokens(render(query, "", qa_section))
+        budget = self.llm.context_window - self.llm.max_output_tokens - template_tokens
+        packed = self.context_packer.pack(contexts, budget)
+
+        context_text = "\n\n---\n\n".join([
+            self.context_packer.format_passage(c)
+            for c in packed.passages
+        ])
+        prompt = render(query, context_text, qa_section)
+
+        raw_context = "\n\n---\n\n".join(self.context_packer.format_passage(c) for c in contexts)
+        stats = {
+            'prompt_tokens': count_tokens(prompt),
+            'context_tokens': packed.context_tokens,
+            'raw_context_tokens': count_tokens(raw_context),
+            'budget_tokens': packed.budget_tokens,
+            'input_chunks': packed.input_count,
+            'packed_chunks': len(packed.passages),
+            'merged': packed.merged,
+            'deduplicated': packed.deduplicated,
+            'dropped': packed.dropped,
+            'prompt_mode': 'short' if short else 'full'
+        }
+        tracer.annotate(prompt_tokens=stats['prompt_tokens'], context_tokens=stats['context_tokens'],
+                        packed_chunks=stats['packed_chunks'], prompt_mode=stats['prompt_mode'])
+        logger.info(
+            f"Prompt ({stats['prompt_mode']}): {stats['prompt_tokens']} tokens (context {stats['context_tokens']}/{stats['budget_tokens']}, "
+            f"unpacked {stats['raw_context_tokens']}; chunks {stats['packed_chunks']}/{stats['input_chunks']}, "
+            f"merged {packed.merged}, dedup {packed.deduplicated}, dropped {packed.dropped})"
+        )
+        return prompt, stats
+
+    def _format_qa_section(self, qa_matches: List[dict] = None) -> str:
+        """Q&A 매칭 결과 섹션"""
         qa_section = ""
         if qa_matches:
             qa_items = []
@@ -472,12 +1451,10 @@ class RAGSystem:
 
 ---
 """
+        return qa_section
 
-        context_text = "\n\n---\n\n".join([
-            f"[출처: {c.doc_id} - {c.source_file}]\n{c.content}"
-            for c in contexts
-        ])
-
+    def _render_prompt(self, query: str, context_text: str, qa_section: str) -> str:
+        """프롬프트 템플릿"""
         prompt = f"""당신은 FCC/ISED RF 인증 시험 전문가입니다. 아래 참고 문서를 기반으로 질문에 **구체적이고 실용적으로** 답변하세요.
 {qa_section}
 ## 참고 문서
@@ -548,30 +1525,353 @@ class RAGSystem:
 """
         return prompt
 
-    def ask(self, query: str, n_results: int = 5, hybrid: bool = True, rerank: bool = False) -> RAGResponse:
-        """질문에 대한 답변 생성"""
-        logger.info(f"Query: {query}")
+    def _render_short_prompt(self, query: str, context_text: str, qa_section: str) -> str:
+        """축약 프롬프트 템플릿 (검증된 Q&A가 질문과 거의 일치할 때 - 지시문/형식 예시 생략)"""
+        return f"""당신은 FCC/ISED RF 인증 시험 전문가입니다. 아래 검증된 Q&A를 우선 근거로, 참고 문서로 보완해 질문에 간결하게 답변하세요.
+{qa_section}
+## 참고 문서
+
+{context_text}
+
+## 질문
+
+{query}
+
+## 규칙
+- 수치(dBm, MHz 등)와 규격 조항(예: 47 CFR § 15.407(a)(1), RSS-247 Section 5.4)을 구체적으로 명시
+- 문서에 없는 내용은 "참고 문서에서 확인되지 않음"으로 명시
+
+## 답변:
+"""
+
+    # ---------- 빠른 경로 (검증된 Q&A / 답변 캐시) ----------
+
+    def _answer_scope(self, retrieval: Retrieval) -> str:
+        """
+        답변 캐시 범위 - 백엔드/모델 + 검색된 출처 문서
+
+        백엔드/모델이 바뀌거나 검색된 문서가 다르면 (예: 앱에서 RSS만 선택 vs KDB만 선택)
+        이전 답변을 재사용하지 않음 - 답변 아래 표시되는 출처와 답변 근거가 항상 일치
+        """
+        documents = sorted({source.doc_id for source in retrieval.sources})
+        return f"{type(self.llm).__name__}:{getattr(self.llm, 'model', '')}:{'|'.join(documents)}"
+
+    def _mean_generation_seconds(self) -> float:
+        """지금까지 LLM 생성 시간 평균 (Q&A 바로 답변의 절약 시간 추정용)"""
+        with self._stats_lock:
+            generated = self._answer_counts['llm'] + self._answer_counts['llm_short']
+            return self._generation_seconds / generated if generated else 0.0
+
+    def _format_qa_answer(self, qa: dict) -> str:
+        """검증된 Q&A 답변 + 출처"""
+        source = f"출처: {qa['source_doc_id']} - " if qa.get('source_doc_id') else ""
+        return f"{qa['answer']}\n\n({source}검증된 Q&A, 유사 질문: \"{qa['question']}\")"
+
+    def _fast_answer(self, retrieval: Retrieval) -> Optional[tuple]:
+        """
+        LLM 없이 답할 수 있으면 (answer, answer_source, latency_saved), 아니면 None
 
-        # 1. Q&A 검색 (유사 질문 매칭)
-        qa_matches = self.search_engine.search_qa(query, n_results=2, threshold=0.5)
+        1. 최상위 Q&A 유사도 >= qa_direct_threshold → 검증된 답변 (출처 문서 ID 포함)
+        2. 의미 기반 답변 캐시 히트 → 이전에 생성한 답변
+        """
+        qa = retrieval.qa_matches[0] if retrieval.qa_matches else None
+        if qa and self.qa_direct_threshold is not None and qa['similarity'] >= self.qa_direct_threshold:
+            saved = self._mean_generation_seconds()
+            with self._stats_lock:
+                self._answer_counts['qa'] += 1
+                self._qa_saved_seconds += saved
+            logger.info(f"Q&A direct answer (similarity {qa['similarity']:.3f}, {qa['source_doc_id']})")
+            return self._format_qa_answer(qa), 'qa', saved
+
+        if self.answer_cache is not None:
+            cached = self.answer_cache.lookup(retrieval.query_embedding, self._answer_scope(retrieval))
+            if cached is not None:
+                with self._stats_lock:
+                    self._answer_counts['cache'] += 1
+                logger.info(f"Answer cache hit (similarity {cached.similarity:.3f}, \"{cached.query}\")")
+                return cached.answer, 'cache', cached.generation_seconds
+        return None
+
+    def _prepare_prompt(self, query: str, retrieval: Retrieval) -> tuple:
+        """(prompt, prompt_stats, answer_source) - Q&A 유사도가 중간 구간이면 축약 프롬프트"""
+        qa = retrieval.qa_matches[0] if retrieval.qa_matches else None
+        short = (qa is not None and self.qa_short_threshold is not None
+                 and qa['similarity'] >= self.qa_short_threshold)
+        prompt, prompt_stats = self.build_prompt_with_stats(query, retrieval.sources, retrieval.qa_matches,
+                                                            short=short)
+        return prompt, prompt_stats, 'llm_short' if short else 'llm'
+
+    def _generate(self, prompt: str) -> tuple:
+        """LLM 전체 응답 생성 → (answer, error) - 백엔드 오류는 답변 자리에 오류 메시지"""
+        try:
+            return self.llm.generate(prompt), None
+        except LLMBackendError as e:
+            return str(e), str(e)
+
+    async def _agenerate(self, prompt: str) -> tuple:
+        """_generate()의 asyncio 버전"""
+        try:
+            return await self.llm.agenerate(prompt), None
+        except LLMBackendError as e:
+            return str(e), str(e)
+
+    def _record_generation(self, retrieval: Retrieval, answer: str, seconds: float, answer_source: str,
+                           error: Optional[str] = None):
+        """LLM 생성 결과 기록 + 답변 캐시 저장 (백엔드 오류/캐시 불가 백엔드는 저장하지 않음)"""
+        if error is not None:
+            logger.info("LLM backend failed - answer not recorded or cached")
+            return
+        with self._stats_lock:
+            self._answer_counts[answer_source] += 1
+            self._generation_seconds += seconds
+        if self.answer_cache is not None and self.llm.cacheable:
+            self.answer_cache.put(retrieval.query, retrieval.query_embedding, answer, seconds,
+                                  self._answer_scope(retrieval))
+
+    def answer_stats(self) -> dict:
+        """답변 경로별 횟수 + 답변 캐시 hit/miss + 절약한 LLM 시간 추정치"""
+        cache = self.answer_cache.stats() if self.answer_cache is not None else {}
+        with self._stats_lock:
+            stats = dict(self._answer_counts)
+            stats['saved_seconds'] = self._qa_saved_seconds + cache.get('saved_seconds', 0.0)
+        stats['cache_hits'] = cache.get('hits', 0)
+        stats['cache_misses'] = cache.get('misses', 0)
+        stats['cache_size'] = cache.get('size', 0)
+        return stats
+
+    @tracer.traced("retrieve")
+    def retrieve(self, query: str, collections: List[str] = None, n_results: int = 5,
+                 hybrid: bool = True, rerank: bool = False, fusion: str = 'weighted',
+                 adaptive_depth: bool = False, route: bool = False, mmr: bool = False,
+                 max_per_doc: Optional[int] = None) -> Retrieval:
+        """
+        검색 단계만 수행 (Q&A + 문서)
+
+        반환된 Retrieval을 ask/ask_stream/aask에 넘기면 같은 후보로 답변을 생성
+        (UI에 표시한 출처 = LLM이 본 출처, 검색/리랭킹 중복 실행 방지)
+        route=True면 쿼리 라우터가 collections 범위 안에서 컬렉션/필터/가중치를 결정
+        mmr/max_per_doc은 중복에 가까운 청크와 한 문서 쏠림을 줄임 (프롬프트 토큰 절약)
+        """
+        # 0. 쿼리 임베딩 (한 번만 계산해 Q&A/문서 검색에 공유)
+        query_embedding = self.search_engine.embed_query(query)
+
+        # 1. Q&A 검색 (유사 질문 매칭) - 문서 검색과 병렬 실행
+        qa_future = self.search_engine.submit_search_qa(query, n_results=2, threshold=0.5,
+                                                        query_embedding=query_embedding)
+
+        # 2. 하이브리드 검색 (+ 옵션 라우팅/리랭킹)
+        routing = None
+        if route:
+            routing = self.search_engine.route(query, collections)
+            search_results = self.search_engine.search_routed(query, routing, n_results=n_results,
+                                                              hybrid=hybrid, rerank=rerank,
+                                                              query_embedding=query_embedding,
+                                                              fusion=fusion, adaptive_depth=adaptive_depth,
+                                                              mmr=mmr, max_per_doc=max_per_doc)
+        else:
+            search_results = self.search_engine.search(query, collections=collections, n_results=n_results,
+                                                        hybrid=hybrid, rerank=rerank,
+                                                        query_embedding=query_embedding,
+                                                        fusion=fusion, adaptive_depth=adaptive_depth,
+                                                        mmr=mmr, max_per_doc=max_per_doc)
+        logger.info(f"Found {len(search_results)} relevant documents")
+
+        # 3. 조항 인용은 색인에서 조항 전체를 바로 가져와 앞에 배치
+        search_results = self.search_engine.with_citations(self.search_engine.lookup_citations(query),
+                                                           search_results)
+
+        qa_matches = qa_future.result()
         if qa_matches:
             logger.info(f"Found {len(qa_matches)} matching Q&A pairs")
 
-        # 2. 하이브리드 검색 (+ 옵션 리랭킹)
-        search_results = self.search_engine.search(query, n_results=n_results, hybrid=hybrid, rerank=rerank)
+        tracer.annotate(sources=len(search_results), qa_matches=len(qa_matches))
+        return Retrieval(query=query, sources=search_results, qa_matches=qa_matches,
+                         query_embedding=query_embedding, routing=routing, trace_id=tracer.trace_id())
+
+    @tracer.traced("retrieve")
+    async def aretrieve(self, query: str, collections: List[str] = None, n_results: int = 5,
+                        hybrid: bool = True, rerank: bool = False, fusion: str = 'weighted',
+                        route: bool = False, mmr: bool = False, max_per_doc: Optional[int] = None) -> Retrieval:
+        """retrieve()의 asyncio 버전"""
+        loop = asyncio.get_running_loop()
+
+        # 0. 쿼리 임베딩 (스레드 풀에서 계산)
+        query_embedding = await loop.run_in_executor(self.search_engine.executor,
+                                                     tracer.wrap(self.search_engine.embed_query), query)
+
+        # 1~2. Q&A 검색 + 하이브리드 검색 동시 실행
+        routing = self.search_engine.route(query, collections) if route else None
+        if routing:
+            document_search = self.search_engine.asearch_routed(query, routing, n_results=n_results,
+                                                                hybrid=hybrid, rerank=rerank,
+                                                                query_embedding=query_embedding, fusion=fusion,
+                                                                mmr=mmr, max_per_doc=max_per_doc)
+        else:
+            document_search = self.search_engine.asearch(query, collections=collections, n_results=n_results,
+                                                         hybrid=hybrid, rerank=rerank,
+                                                         query_embedding=query_embedding, fusion=fusion,
+                                                         mmr=mmr, max_per_doc=max_per_doc)
+        qa_matches, search_results = await asyncio.gather(
+            self.search_engine.asearch_qa(query, n_results=2, threshold=0.5, query_embedding=query_embedding),
+            document_search
+        )
+        if qa_matches:
+            logger.info(f"Found {len(qa_matches)} matching Q&A pairs")
         logger.info(f"Found {len(search_results)} relevant documents")
+        search_results = self.search_engine.with_citations(self.search_engine.lookup_citations(query),
+                                                           search_results)
+
+        tracer.annotate(sources=len(search_results), qa_matches=len(qa_matches))
+        return Retrieval(query=query, sources=search_results, qa_matches=qa_matches,
+                         query_embedding=query_embedding, routing=routing, trace_id=tracer.trace_id())
+
+    def _llm_attrs(self) -> dict:
+        """LLM span 속성 (백엔드/모델)"""
+        return {'backend': type(self.llm).__name__, 'model': getattr(self.llm, 'model', '')}
 
-        # 3. 프롬프트 생성 (Q&A 포함)
-        prompt = self.build_prompt(query, search_results, qa_matches)
+    @tracer.traced("rag.ask")
+    def ask(self, query: str, n_results: int = 5, hybrid: bool = True, rerank: bool = False,
+            collections: List[str] = None, retrieval: Retrieval = None) -> RAGResponse:
+        """질문에 대한 답변 생성 (retrieval이 주어지면 검색 생략)"""
+        logger.info(f"Query: {query}")
+
+        # 1~2. 검색 (또는 이미 수행한 검색 결과 재사용)
+        if retrieval is None:
+            retrieval = self.retrieve(query, collections=collections, n_results=n_results,
+                                      hybrid=hybrid, rerank=rerank)
+
+        # 3. 빠른 경로 (검증된 Q&A 바로 답변 / 답변 캐시)
+        fast = self._fast_answer(retrieval)
+        if fast:
+            answer, answer_source, saved = fast
+            tracer.annotate(answer_source=answer_source)
+            return RAGResponse(answer=answer, sources=retrieval.sources, query=query,
+                               qa_matches=retrieval.qa_matches,
+                               citations=self.search_engine.check_citations(answer),
+                               answer_source=answer_source, latency_saved=saved,
+                               trace=_trace_summary(retrieval.trace_id, tracer.trace_id()))
+
+        # 4. 프롬프트 생성 (Q&A 포함, 토큰 예산 내 패킹)
+        prompt, prompt_stats, answer_source = self._prepare_prompt(query, retrieval)
+
+        # 5. LLM 응답 생성
+        started = time.perf_counter()
+        with tracer.span("llm.generate", **self._llm_attrs()) as span:
+            answer, error = self._generate(prompt)
+            span.set(answer_chars=len(answer), error=error is not None)
+        self._record_generation(retrieval, answer, time.perf_counter() - started, answer_source, error)
+        tracer.annotate(answer_source=answer_source)
+
+        return RAGResponse(
+            answer=answer,
+            sources=retrieval.sources,
+            query=query,
+            qa_matches=retrieval.qa_matches,  # Q&A 매칭 결과 추가
+            prompt_stats=prompt_stats,
+            citations=self.search_engine.check_citations(answer),  # 답변 인용 검증
+            answer_source=answer_source,
+            trace=_trace_summary(retrieval.trace_id, tracer.trace_id()),
+            error=error
+        )
+
+    def ask_stream(self, query: str, n_results: int = 5, hybrid: bool = True, rerank: bool = False,
+                   collections: List[str] = None, retrieval: Retrieval = None) -> StreamingAnswer:
+        """
+        스트리밍 답변 생성
+
+        검색은 즉시 수행하고(retrieval이 주어지면 재사용), 반환된 StreamingAnswer를 순회하면
+        LLM 토큰이 도착하는 대로 전달 (TTFT = 요청 시작부터 첫 토큰까지)
+        """
+        started_at = time.perf_counter()
+        logger.info(f"Query: {query}")
+
+        # 루트 span은 스트림을 끝까지 소비했을 때 종료 (LLM 생성 시간 포함)
+        root = tracer.start("rag.ask_stream")
+        with tracer.activate(root):
+            if retrieval is None:
+                retrieval = self.retrieve(query, collections=collections, n_results=n_results,
+                                          hybrid=hybrid, rerank=rerank)
+
+            fast = self._fast_answer(retrieval)
+            if fast:
+                answer, answer_source, saved = fast
+                root.set(answer_source=answer_source)
+                tracer.finish(root)
+                return StreamingAnswer(iter([answer]), sources=retrieval.sources, query=query,
+                                       qa_matches=retrieval.qa_matches, started_at=started_at,
+                                       citation_checker=self.search_engine.check_citations,
+                                       answer_source=answer_source, latency_saved=saved,
+                                       trace_ids=(retrieval.trace_id, root.trace_id))
+
+            prompt, prompt_stats, answer_source = self._prepare_prompt(query, retrieval)
+            llm_span = tracer.start("llm.generate_stream", **self._llm_attrs())
+
+        def on_complete(answer: str, seconds: float, error: Optional[str]):
+            # 끝까지 스트리밍된 답변만 기록/캐시 저장 (중단된 스트림/백엔드 오류는 저장하지 않음)
+            llm_span.set(answer_chars=len(answer), ttft_ms=round((stream.time_to_first_token or 0) * 1000, 1),
+                         error=error is not None)
+            tracer.finish(llm_span)
+            root.set(answer_source=answer_source)
+            tracer.finish(root)
+            self._record_generation(retrieval, answer, seconds, answer_source, error)
+
+        stream = StreamingAnswer(
+            self.llm.generate_stream(prompt),
+            sources=retrieval.sources,
+            query=query,
+            qa_matches=retrieval.qa_matches,
+            started_at=started_at,
+            prompt_stats=prompt_stats,
+            citation_checker=self.search_engine.check_citations,
+            answer_source=answer_source,
+            on_complete=on_complete,
+            trace_ids=(retrieval.trace_id, root.trace_id)
+        )
+        return stream
+
+    @tracer.traced("rag.ask")
+    async def aask(self, query: str, n_results: int = 5, hybrid: bool = True, rerank: bool = False,
+                   collections: List[str] = None, retrieval: Retrieval = None) -> RAGResponse:
+        """ask()의 asyncio 버전 - 한 프로세스에서 여러 요청이 교차 실행됨"""
+        logger.info(f"Query: {query}")
 
-        # 4. LLM 응답 생성
-        answer = self.llm.generate(prompt)
+        # 1~2. Q&A 검색 + 하이브리드 검색 동시 실행 (또는 재사용)
+        if retrieval is None:
+            retrieval = await self.aretrieve(query, collections=collections, n_results=n_results,
+                                             hybrid=hybrid, rerank=rerank)
+
+        # 3. 빠른 경로 (검증된 Q&A 바로 답변 / 답변 캐시)
+        fast = self._fast_answer(retrieval)
+        if fast:
+            answer, answer_source, saved = fast
+            tracer.annotate(answer_source=answer_source)
+            return RAGResponse(answer=answer, sources=retrieval.sources, query=query,
+                               qa_matches=retrieval.qa_matches,
+                               citations=self.search_engine.check_citations(answer),
+                               answer_source=answer_source, latency_saved=saved,
+                               trace=_trace_summary(retrieval.trace_id, tracer.trace_id()))
+
+        # 4. 프롬프트 생성 (Q&A 포함, 토큰 예산 내 패킹)
+        prompt, prompt_stats, answer_source = self._prepare_prompt(query, retrieval)
+
+        # 5. LLM 응답 생성 (비동기 HTTP)
+        started = time.perf_counter()
+        with tracer.span("llm.generate", **self._llm_attrs()) as span:
+            answer, error = await self._agenerate(prompt)
+            span.set(answer_chars=len(answer), error=error is not None)
+        self._record_generation(retrieval, answer, time.perf_counter() - started, answer_source, error)
+        tracer.annotate(answer_source=answer_source)
 
         return RAGResponse(
             answer=answer,
-            sources=search_results,
+            sources=retrieval.sources,
             query=query,
-            qa_matches=qa_matches  # Q&A 매칭 결과 추가
+            qa_matches=retrieval.qa_matches,
+            prompt_stats=prompt_stats,
+            citations=self.search_engine.check_citations(answer),
+            answer_source=answer_source,
+            trace=_trace_summary(retrieval.trace_id, tracer.trace_id()),
+            error=error
         )
 
     def interactive_mode(self):
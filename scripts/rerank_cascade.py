@@ -0,0 +1,121 @@
+"""
+AI 자동화 시스템 - 리랭커 캐스케이드
+CrossEncoder 호출을 결과가 바뀔 수 있는 구간으로 제한
+
+- split_band: 융합 점수 차이로 top-k 포함이 확정된 상위/제외가 확정된 하위를 나누고
+  경계 근처(애매한 중간 구간)만 리랭킹 대상으로 선택
+- query_window: 청크 전체 대신 쿼리 단어가 가장 많이 모인 구간만 잘라 점수화
+- ScoreCache: (쿼리 해시, 청크 ID) → CrossEncoder 점수 LRU
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+_WORD = re.compile(r'\w[\w.\-]*\w|\w')
+
+
+def split_band(scores: List[float], cutoff: int, margin_ratio: float = 0.25) -> Tuple[int, int]:
+    """
+    리랭킹할 중간 구간 결정 (scores는 내림차순 융합 점수)
+
+    margin = margin_ratio * (최고 - 최저 점수)  (가중합/RRF/z-score 스케일과 무관)
+    - [0, head): 경계 밖 최고 후보보다 margin 이상 높음 → top-k 확정
+    - [head, band): 경계 근처 → 리랭킹
+    - [band, n): k번째보다 margin 이상 낮음 → 제외 확정
+
+    Returns:
+        (head, band) - head == band면 리랭킹 생략 (k번째와 k+1번째 점수 차이가 이미 충분)
+    """
+    n = len(scores)
+    if cutoff <= 0 or cutoff >= n:
+        return n, n  # 후보가 모두 포함됨 - 순위가 바뀌어도 답변에 들어가는 청크는 같음
+
+    spread = max(scores) - min(scores)
+    if spread <= 0:
+        return 0, n  # 전부 동점 - 점수만으로는 판단 불가
+    margin = margin_ratio * spread
+
+    kth, next_score = scores[cutoff - 1], scores[cutoff]
+    if kth - next_score >= margin:
+        return cutoff, cutoff
+
+    head = sum(1 for s in scores if s >= next_score + margin)
+    band = sum(1 for s in scores if s > kth - margin)
+    return head, band
+
+
+def query_window(query: str, text: str, window_chars: int = 400) -> str:
+    """
+    쿼리 단어가 가장 많이 포함된 window_chars 길이 구간 (단어 경계 기준)
+
+    쿼리 단어가 없으면 앞부분, 텍스트가 짧으면 그대로 반환
+    """
+    if window_chars <= 0 or len(text) <= window_chars:
+        return text
+
+    terms = {t for t in _WORD.findall(query.lower()) if len(t) > 1}
+    lowered = text.lower()
+    hits = sorted(m.start() for m in _WORD.finditer(lowered) if m.group(0) in terms)
+    if not hits:
+        start = 0
+    else:
+        # 창 안에 들어오는 단어 수가 최대인 시작 위치 (투 포인터)
+        best_count, best_start, right = 0, hits[0], 0
+        for left, position in enumerate(hits):
+            while right < len(hits) and hits[right] < position + window_chars:
+                right += 1
+            if right - left > best_count:
+                best_count, best_start = right - left, position
+        # 매칭 구간을 창 가운데에 배치
+        span_end = max(h for h in hits if best_start <= h < best_start + window_chars)
+        start = max(0, min(len(text) - window_chars, (best_start + span_end) // 2 - window_chars // 2))
+
+    end = min(len(text), start + window_chars)
+    # 단어 중간에서 잘리지 않도록 경계로 이동
+    if start > 0:
+        space = text.find(' ', start, start + 40)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(' ', end - 40, end)
+        end = space if space > start else end
+    return text[start:end]
+
+
+class ScoreCache:
+    """(쿼리 해시, 청크 ID) → CrossEncoder 점수 LRU (스레드 안전)"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, chunk_id: str, content: str) -> tuple:
+        query_hash = hashlib.md5(query.encode('utf-8')).hexdigest()
+        # 청크 ID가 없는 결과(조항 인용 등)는 본문 해시로 구분
+        return query_hash, chunk_id or hashlib.md5(content.encode('utf-8')).hexdigest()
+
+    def get(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._scores.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: tuple, score: float):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._scores)
@@ -0,0 +1,441 @@
+"""
+AI 자동화 시스템 - 조항 인용 색인
+eCFR(# 헤딩 + (a)(1) 문단), RSS 절 번호, KDB 헤딩을 수집 시점에 파싱해
+인용(예: "15.407(a)(1)", "RSS-247 5.4", "KDB 905462 D01 7.2") → 바이트 구간 + 청크 ID로 매핑
+"""
+
+import re
+import json
+import bisect
+import logging
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 색인 포맷 버전 (파싱 규칙이 바뀌면 올려서 재구축 유도)
+INDEX_VERSION = 1
+
+_UNIT_GUARD = r'(?!\s*(?:[GMk]?Hz|dBm?|dBi|[mµu]?W|V|%|ms|µs|us|cm|mm|km)\b)'
+
+# 인용 패턴 (질문/답변 텍스트에서 추출)
+CFR_CITATION = re.compile(
+    r'(?:(?:§+\s*|\b47\s*CFR\s*(?:§\s*)?|\b[Ss]ection\s+)(\d{1,2})\.(\d{1,4})'
+    r'|\b(\d{1,2})\.(\d{3,4}))(?![.\d])' + _UNIT_GUARD +
+    r'((?:\s?\([a-zA-Z0-9]{1,4}\))*)'
+)
+RSS_CITATION = re.compile(
+    r'\bRSS\s*-?\s*(\d{1,3}|GEN)\b,?\s*(?:(?:[Ss]ection|[Ss]ec\.|§)\s*)?(\d{1,2}(?:\.\d{1,2}){0,3})(?![.\d])' + _UNIT_GUARD,
+    re.IGNORECASE
+)
+KDB_CITATION = re.compile(
+    r'\bKDB\s*(\d{6})(?:\s*(D\d{2}))?(?:\s*v\d{2}(?:r\d{2})?)?,?\s*(?:(?:[Ss]ection|[Ss]ec\.|§)\s*)?'
+    r'(\d{1,2}(?:\.\d{1,2}){0,3})(?![.\d])' + _UNIT_GUARD,
+    re.IGNORECASE
+)
+
+# 헤딩 패턴 (수집 텍스트 파싱)
+_MD_HEADING = re.compile(r'^(#+)\s*(.*?)\s*$')
+_CFR_SECTION_HEADING = re.compile(r'^§+\s*(\d{1,2})\.(\d{1,4})\b\s*(.*)$')
+_PARAGRAPH_MARKERS = re.compile(r'^\s*((?:\([a-zA-Z0-9]{1,4}\)\s?)+)')
+_NUMBERED_HEADING = re.compile(r'^\s*(?:Section\s+)?(\d{1,2}(?:\.\d{1,2}){0,3})\.?\s+([A-Z][^\n]{2,100})$')
+_TOC_LINE = re.compile(r'(?:\.\s*){4,}\s*\d+\s*$')
+
+# eCFR 문단 단계: (a) → (1) → (i) → (A) → (1) → (i)
+_LEVEL_TYPES = ['lower', 'digit', 'roman', 'upper', 'digit', 'roman']
+_ROMAN = {'i': 1, 'v': 5, 'x': 10, 'l': 50}
+
+
+def _roman_value(text: str) -> Optional[int]:
+    if not text or any(c not in _ROMAN for c in text):
+        return None
+    total = 0
+    for i, c in enumerate(text):
+        value = _ROMAN[c]
+        total += -value if i + 1 < len(text) and _ROMAN[text[i + 1]] > value else value
+    return total
+
+
+def _marker_value(marker: str, level_type: str) -> Optional[int]:
+    """문단 기호가 해당 단계 형식이면 순번 (아니면 None)"""
+    if level_type == 'digit':
+        return int(marker) if marker.isdigit() else None
+    if level_type == 'lower':
+        return ord(marker) - ord('a') + 1 if len(marker) == 1 and 'a' <= marker <= 'z' else None
+    if level_type == 'upper':
+        return ord(marker) - ord('A') + 1 if len(marker) == 1 and 'A' <= marker <= 'Z' else None
+    return _roman_value(marker)
+
+
+def _parent_key(key: str) -> Optional[str]:
+    """상위 조항 키 (15.407(a)(1) → 15.407(a), 5.4.2 → 5.4)"""
+    if key.endswith(')'):
+        return key[:key.rindex('(')]
+    head, _, number = key.rpartition(' ')
+    if '.' in number and not key.startswith('CFR '):
+        return f"{head} {number.rsplit('.', 1)[0]}"
+    return None
+
+
+def citation_keys(text: str) -> List[Tuple[str, str]]:
+    """
+    텍스트에서 인용 추출
+
+    Returns:
+        [(원문 표기, 정규화 키), ...] - 등장 순서, 중복 제거
+    """
+    found = []
+    for match in RSS_CITATION.finditer(text):
+        found.append((match.start(), match.end(), match.group(0).strip(),
+                      f"RSS-{match.group(1).upper()} {match.group(2)}"))
+    for match in KDB_CITATION.finditer(text):
+        attachment = f" {match.group(2).upper()}" if match.group(2) else ""
+        found.append((match.start(), match.end(), match.group(0).strip(),
+                      f"KDB {match.group(1)}{attachment} {match.group(3)}"))
+    taken = [(start, end) for start, end, _, _ in found]
+    for match in CFR_CITATION.finditer(text):
+        if any(start < match.end() and match.start() < end for start, end in taken):
+            continue  # "RSS-247 section 5.4"의 절 번호는 CFR 조항이 아님
+        part, section = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        parens = re.sub(r'\s', '', match.group(5) or '')
+        found.append((match.start(), match.end(), match.group(0).strip(), f"CFR {part}.{section}{parens}"))
+
+    seen, result = set(), []
+    for _, _, raw, key in sorted(found):
+        if key not in seen:
+            seen.add(key)
+            result.append((raw, key))
+    return result
+
+
+@dataclass
+class SectionEntry:
+    """색인된 조항 하나"""
+    key: str                  # 정규화된 인용 키 (예: "CFR 15.407(a)(1)")
+    title: str
+    doc_id: str
+    source_file: str
+    source_type: str
+    text_file: str            # 색인 디렉토리 내 문서 텍스트 파일
+    start: int                # 바이트 시작 (UTF-8)
+    end: int                  # 바이트 끝
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CitationCheck:
+    """답변 인용 검증 결과"""
+    citation: str             # 답변에 쓰인 표기
+    key: str                  # 정규화 키
+    found: bool               # 색인에 정확히 있는 조항인지 (상위 조항만 있으면 False)
+    matched_key: str = ""     # 실제로 매칭된 키 (found=False면 확인된 상위 조항)
+    doc_id: str = ""
+    title: str = ""
+
+
+class SectionIndex:
+    """
+    조항 인용 색인
+
+    - sections: 인용 키 -> SectionEntry 목록 (dict 조회 O(1), 상위 조항으로 fallback)
+    - 문서 텍스트는 색인 디렉토리에 함께 저장하고 바이트 구간으로 조항 전체를 읽음
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else None
+        self.sections: Dict[str, List[SectionEntry]] = {}
+        self.documents: Dict[str, dict] = {}   # text_file -> 문서 정보
+
+    # ---------- 수집 시점 ----------
+
+    def add_document(self, doc_id: str, source_type: str, source_file: str, text: str,
+                     chunk_spans: List[Tuple[str, int, int]] = None) -> int:
+        """
+        문서 하나를 파싱해 조항 등록 (같은 파일을 다시 넣으면 교체)
+
+        Args:
+            text: 청킹에 사용한 문서 전체 텍스트
+            chunk_spans: [(청크 ID, 문자 시작, 문자 끝), ...] - text 기준 위치
+
+        Returns:
+            등록된 조항 수
+        """
+        text_file = self._text_file_name(doc_id, source_type, source_file)
+        self.remove_document(text_file)
+
+        if source_type == 'ecfr':
+            spans = self._parse_ecfr(text)
+        elif source_type == 'rss':
+            number = self._rss_number(doc_id, source_file)
+            spans = [(f"RSS-{number} {num}", title, s, e) for num, title, s, e in self._parse_numbered(text)] \
+                if number else []
+        elif source_type == 'kdb':
+            spans = []
+            number = re.search(r'(\d{6})', doc_id)
+            if number:
+                attachment = re.search(r'(?:^|[^A-Za-z0-9])(D\d{2})(?!\d)', source_file, re.IGNORECASE)
+                for num, title, s, e in self._parse_numbered(text):
+                    if attachment:
+                        spans.append((f"KDB {number.group(1)} {attachment.group(1).upper()} {num}", title, s, e))
+                    spans.append((f"KDB {number.group(1)} {num}", title, s, e))
+        else:
+            spans = []
+
+        if not spans:
+            return 0
+
+        chunk_spans = sorted(chunk_spans or [], key=lambda c: c[1])
+        chunk_starts = [c[1] for c in chunk_spans]
+        byte_offsets = self._byte_offsets(text, [p for _, _, s, e in spans for p in (s, e)])
+
+        for key, title, start, end in spans:
+            # 조항 구간과 겹치는 청크 (청크 시작 < 조항 끝 and 청크 끝 > 조항 시작)
+            last = bisect.bisect_left(chunk_starts, end)
+            chunk_ids = [cid for cid, c_start, c_end in chunk_spans[:last] if c_end > start]
+            self.sections.setdefault(key, []).append(SectionEntry(
+                key=key, title=title, doc_id=doc_id, source_file=source_file, source_type=source_type,
+                text_file=text_file, start=byte_offsets[start], end=byte_offsets[end], chunk_ids=chunk_ids
+            ))
+
+        self.documents[text_file] = {'doc_id': doc_id, 'source_type': source_type,
+                                     'source_file': source_file, 'text': text}
+        return len(spans)
+
+    def remove_document(self, text_file: str):
+        if text_file not in self.documents:
+            return
+        del self.documents[text_file]
+        for key in list(self.sections):
+            entries = [e for e in self.sections[key] if e.text_file != text_file]
+            if entries:
+                self.sections[key] = entries
+            else:
+                del self.sections[key]
+
+    def remove_source(self, doc_id: str, source_type: str, source_file: str):
+        """원본 파일 기준 제거 (증분 색인에서 삭제된 파일 정리)"""
+        self.remove_document(self._text_file_name(doc_id, source_type, source_file))
+
+    def _text_file_name(self, doc_id: str, source_type: str, source_file: str) -> str:
+        return re.sub(r'[^\w.-]', '_', f"{source_type}__{doc_id}__{source_file}") + ".txt"
+
+    def _rss_number(self, doc_id: str, source_file: str) -> Optional[str]:
+        match = re.search(r'RSS[-_ ]?(\d{1,3}|GEN)\b', f"{doc_id} {source_file}", re.IGNORECASE)
+        return match.group(1).upper() if match else None
+
+    def _byte_offsets(self, text: str, positions: List[int]) -> Dict[int, int]:
+        """문자 위치 → UTF-8 바이트 위치 (정렬 후 구간별 누적 인코딩)"""
+        offsets, previous, total = {}, 0, 0
+        for position in sorted(set(positions)):
+            total += len(text[previous:position].encode('utf-8'))
+            offsets[position] = total
+            previous = position
+        return offsets
+
+    def _lines(self, text: str):
+        """(줄 시작 위치, 줄 내용) 순회"""
+        position = 0
+        for line in text.split('\n'):
+            yield position, line
+            position += len(line) + 1
+
+    def _parse_ecfr(self, text: str) -> List[Tuple[str, str, int, int]]:
+        """# 헤딩의 § 조항 + 조항 내 (a)(1)(i) 문단 구간"""
+        spans = []
+        section = None       # (키, 제목, 시작)
+        open_paragraphs = [] # 단계별 [(키, 제목, 시작, 기호, 순번)]
+
+        def close(end: int, depth: int = 0):
+            while len(open_paragraphs) > depth:
+                key, title, start, _, _ = open_paragraphs.pop()
+                spans.append((key, title, start, end))
+
+        for position, line in self._lines(text):
+            heading = _MD_HEADING.match(line)
+            if heading:
+                close(position)
+                if section:
+                    spans.append((section[0], section[1], section[2], position))
+                    section = None
+                cfr = _CFR_SECTION_HEADING.match(heading.group(2))
+                if cfr:
+                    section = (f"CFR {cfr.group(1)}.{cfr.group(2)}", cfr.group(3).strip(), position)
+                continue
+
+            if not section:
+                continue
+            markers = _PARAGRAPH_MARKERS.match(line)
+            if not markers:
+                continue
+            for marker in re.findall(r'\(([a-zA-Z0-9]{1,4})\)', markers.group(1)):
+                depth = self._paragraph_depth(open_paragraphs, marker)
+                if depth is None:
+                    break  # 문단 시작이 아닌 괄호 (예: "(2) of this section" 참조)
+                close(position, depth)
+                parent = open_paragraphs[-1][0] if open_paragraphs else section[0]
+                value = _marker_value(marker, _LEVEL_TYPES[depth])
+                title = line.strip()[:80]
+                open_paragraphs.append((f"{parent}({marker})", title, position, marker, value))
+
+        end = len(text)
+        close(end)
+        if section:
+            spans.append((section[0], section[1], section[2], end))
+        return spans
+
+    def _paragraph_depth(self, open_paragraphs: list, marker: str) -> Optional[int]:
+        """
+        문단 기호의 단계 결정
+
+        열린 단계 중 순번이 이어지는 가장 깊은 단계, 없으면 한 단계 아래의 첫 기호
+        ((i)는 (h) 다음이면 영문자, 아니면 로마 숫자)
+        """
+        for depth in range(len(open_paragraphs) - 1, -1, -1):
+            value = _marker_value(marker, _LEVEL_TYPES[depth])
+            if value is not None and value == open_paragraphs[depth][4] + 1:
+                return depth
+        depth = len(open_paragraphs)
+        if depth < len(_LEVEL_TYPES) and _marker_value(marker, _LEVEL_TYPES[depth]) == 1:
+            return depth
+        return None
+
+    def _parse_numbered(self, text: str) -> List[Tuple[str, str, int, int]]:
+        """
+        번호 헤딩(5.4 / 7.2.1) 구간 - RSS(# 헤딩 또는 본문 줄), KDB(PDF 추출 텍스트)
+
+        절차 단계("1. Set RBW") 오인식을 막기 위해 직전 헤딩의 다음 번호만 인정
+        (같은 단계 +1, 하위 .1, 상위 단계 +1), 목차 줄은 제외
+        """
+        headings = []  # (번호 튜플, 제목, 시작, 줄 끝)
+        for position, line in self._lines(text):
+            heading = _MD_HEADING.match(line)
+            content = heading.group(2) if heading else line
+            match = _NUMBERED_HEADING.match(content)
+            if not match or _TOC_LINE.search(content):
+                continue
+            number = tuple(int(n) for n in match.group(1).split('.'))
+            if headings and not self._is_successor(headings[-1][0], number):
+                if number == (1,) and self._looks_like_toc(text, headings):
+                    headings = []  # 목차 뒤 본문 시작
+                else:
+                    continue
+            elif not headings and number[0] != 1:
+                continue
+            headings.append((number, match.group(2).strip(), position, position + len(line)))
+
+        spans = []
+        for i, (number, title, start, _) in enumerate(headings):
+            end = len(text)
+            for next_number, _, next_start, _ in headings[i + 1:]:
+                if next_number[:len(number)] != number:  # 하위 절이 아닌 첫 헤딩에서 종료
+                    end = next_start
+                    break
+            spans.append(('.'.join(str(n) for n in number), title, start, end))
+        return spans
+
+    def _is_successor(self, previous: tuple, number: tuple) -> bool:
+        if number == previous + (1,):
+            return True
+        for depth in range(len(previous), 0, -1):
+            if number == previous[:depth - 1] + (previous[depth - 1] + 1,):
+                return True
+        return False
+
+    def _looks_like_toc(self, text: str, headings: list) -> bool:
+        """지금까지 인식한 헤딩이 목차처럼 본문 없이 연달아 나왔으면 True"""
+        return all(not text[prev[3]:cur[2]].strip() for prev, cur in zip(headings, headings[1:]))
+
+    # ---------- 조회 ----------
+
+    def lookup(self, citation: str) -> Optional[SectionEntry]:
+        """
+        인용 → 조항 (정확히 없으면 상위 조항)
+
+        citation은 원문 표기("§15.407(a)(1)") 또는 정규화 키("CFR 15.407(a)(1)")
+        """
+        keys = citation_keys(citation)
+        key = keys[0][1] if keys else citation
+        while key:
+            entries = self.sections.get(key)
+            if entries:
+                return entries[0]
+            key = _parent_key(key)
+        return None
+
+    def section_text(self, entry: SectionEntry) -> str:
+        """조항 전체 텍스트 (문서 텍스트 파일의 바이트 구간)"""
+        document = self.documents.get(entry.text_file)
+        if document and 'text' in document:
+            data = document['text'].encode('utf-8')[entry.start:entry.end]
+            return data.decode('utf-8', errors='ignore').strip()
+        with open(self.path / "texts" / entry.text_file, 'rb') as f:
+            f.seek(entry.start)
+            return f.read(entry.end - entry.start).decode('utf-8', errors='ignore').strip()
+
+    def check_citations(self, text: str) -> List[CitationCheck]:
+        """
+        답변 등 텍스트의 인용이 색인된 조항인지 확인 (정규식 + dict 조회)
+
+        정확한 키만 found - 지어낸 하위 항목(§15.407(z)(9))은 상위 조항(15.407)이 있어도
+        미확인으로 보고하고 상위 조항은 matched_key/doc_id/title로 첨부
+        """
+        checks = []
+        for raw, key in citation_keys(text):
+            entry = self.lookup(key)
+            checks.append(CitationCheck(
+                citation=raw, key=key, found=key in self.sections,
+                matched_key=entry.key if entry else "",
+                doc_id=entry.doc_id if entry else "",
+                title=entry.title if entry else ""
+            ))
+        return checks
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    # ---------- 저장/로드 ----------
+
+    def save(self, path: Path = None):
+        """색인 저장 (sections.json + texts/*.txt)"""
+        path = Path(path or self.path)
+        texts_dir = path / "texts"
+        texts_dir.mkdir(parents=True, exist_ok=True)
+        (path / "sections.json").unlink(missing_ok=True)  # 기록 중에는 무효 처리
+
+        documents = {}
+        for text_file, document in self.documents.items():
+            if 'text' in document:
+                with open(texts_dir / text_file, 'wb') as f:
+                    f.write(document['text'].encode('utf-8'))
+            documents[text_file] = {k: v for k, v in document.items() if k != 'text'}
+
+        data = {
+            'version': INDEX_VERSION,
+            'documents': documents,
+            'sections': {key: [asdict(e) for e in entries] for key, entries in self.sections.items()}
+        }
+        with open(path / "sections.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        self.path = path
+        logger.info(f"Section index saved: {len(self.sections)} citations, {len(documents)} documents")
+
+    @classmethod
+    def load(cls, path: Path) -> 'SectionIndex':
+        """색인 로드 (없거나 버전이 다르면 빈 색인)"""
+        index = cls(path)
+        index_file = Path(path) / "sections.json"
+        if not index_file.exists():
+            return index
+
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            logger.warning("Section index version mismatch - rebuild with vectordb_pipeline.py --full")
+            return index
+
+        index.documents = data['documents']
+        index.sections = {
+            key: [SectionEntry(**e) for e in entries] for key, entries in data['sections'].items()
+        }
+        return index
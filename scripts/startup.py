@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - 지연 로딩 / 시작 시간 측정
+무거운 import와 모델 로드를 첫 사용 시점으로 미루고(백그라운드 예열 가능)
+단계별 소요 시간을 프로세스 단위로 기록해 콜드 스타트 회귀를 추적
+
+사용법:
+    python startup.py                # 새 프로세스 콜드 스타트 측정 + startup_times.jsonl에 기록
+    python startup.py --no-warmup    # 생성자까지만 측정 (지연 로딩 확인용)
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_timings = OrderedDict()  # 단계 -> 누적 초 (기록 순서 유지)
+_timings_lock = threading.Lock()
+
+
+def record(stage: str, seconds: float):
+    """단계 소요 시간 기록 (같은 단계는 누적)"""
+    with _timings_lock:
+        _timings[stage] = _timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    """with 블록 소요 시간을 stage로 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def breakdown() -> dict:
+    """지금까지 기록된 단계별 소요 시간 (초)"""
+    with _timings_lock:
+        return dict(_timings)
+
+
+def format_breakdown(timings: dict = None) -> str:
+    timings = breakdown() if timings is None else timings
+    lines = [f"  {stage:<40}{seconds * 1000:>10.1f} ms" for stage, seconds in timings.items()]
+    return "\n".join(lines)
+
+
+class LazyModel:
+    """
+    첫 사용 시 로드되는 모델 프록시
+
+    encode/predict 등 속성에 처음 접근할 때 loader()를 한 번 실행 (스레드 안전)
+    prewarm()은 같은 로드를 백그라운드 스레드에서 미리 시작 - 로드 중 들어온 요청은 완료를 기다림
+    """
+
+    def __init__(self, stage: str, loader: Callable):
+        self._stage = stage
+        self._loader = loader
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with timed(self._stage):
+                        self._model = self._loader()
+                    logger.info(f"{self._stage}: loaded")
+        return self._model
+
+    def prewarm(self) -> threading.Thread:
+        """백그라운드 로드 시작 (실패하면 경고만 남기고 첫 사용 시 다시 시도)"""
+        def load():
+            try:
+                self.get()
+            except Exception as e:
+                logger.warning(f"{self._stage}: prewarm failed: {e}")
+
+        thread = threading.Thread(target=load, name=f"prewarm-{self._stage}", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+def measure(warmup: bool = True, query: str = "DFS 테스트 절차는 무엇인가요?") -> dict:
+    """이 프로세스의 콜드 스타트 측정 (import → 생성자 → warmup → 첫 검색)"""
+    started = time.perf_counter()
+    with timed("import rag_system"):
+        from rag_system import VectorSearch
+
+    with timed("VectorSearch()"):
+        search_engine = VectorSearch()
+    if warmup:
+        with timed("warmup() total"):
+            search_engine.warmup()
+
+    with timed("first search"):
+        search_engine.search(query, n_results=5)
+    record("total", time.perf_counter() - started)
+    return breakdown()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="콜드 스타트 시간 측정")
+    parser.add_argument('--no-warmup', action='store_true', help="warmup() 없이 첫 검색에서 지연 로드")
+    parser.add_argument('--output', type=Path, help="측정 결과를 추가할 JSONL 파일 (기본: logs/startup_times.jsonl)")
+    args = parser.parse_args()
+
+    timings = measure(warmup=not args.no_warmup)  # rag_system import도 측정 대상
+    from rag_system import LOGS_DIR
+    args.output = args.output or LOGS_DIR / "startup_times.jsonl"
+    print("\n[Startup breakdown]")
+    print(format_breakdown(timings))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'timestamp': datetime.now().isoformat(timespec='seconds'),
+                            'warmup': not args.no_warmup, 'timings': timings}, ensure_ascii=False) + "\n")
+    print(f"\nAppended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
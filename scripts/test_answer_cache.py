@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""의미 기반 답변 캐시 테스트 (합성 임베딩, 모델/LLM 불필요)"""
+import sys
+import time
+sys.path.insert(0, '.')
+from checks import expect, finish
+from types import SimpleNamespace
+from answer_cache import SemanticAnswerCache
+from rag_system import LLMBackend, LLMBackendError, RAGSystem, Retrieval, SearchResult
+
+DFS = [1.0, 0.0, 0.0, 0.0]
+DFS_PARAPHRASE = [0.98, 0.1, 0.0, 0.0]   # 코사인 ≈ 0.995
+DFS_RELATED = [0.8, 0.6, 0.0, 0.0]       # 코사인 0.8 - 다른 질문
+PSD = [0.0, 0.0, 1.0, 0.0]
+
+# 1. 임계값 이상만 히트
+cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=60, max_size=3)
+cache.put("DFS 테스트 절차는?", DFS, "DFS 답변", generation_seconds=8.0)
+hit = cache.lookup(DFS_PARAPHRASE)
+expect("paraphrase hit", hit is not None and hit.answer == "DFS 답변", f"(similarity {hit and hit.similarity:.3f})")
+expect("related question miss", cache.lookup(DFS_RELATED) is None)
+expect("saved seconds", cache.stats()['saved_seconds'] == 8.0, cache.stats())
+
+# 2. 범위(백엔드/모델)가 다르면 재사용하지 않음
+expect("scope isolation", cache.lookup(DFS, scope="ClaudeBackend:claude") is None)
+
+# 3. 빈 답변은 저장하지 않음
+cache.put("빈 답변", PSD, "  ", generation_seconds=1.0)
+expect("empty answer skipped", cache.lookup(PSD) is None)
+
+# 4. LRU 제거 (최근 사용한 DFS 유지)
+cache.put("PSD 제한은?", PSD, "PSD 답변", 5.0)
+cache.put("q3", [0.0, 0.0, 0.0, 1.0], "a3", 1.0)
+cache.lookup(DFS)
+cache.put("q4", [0.0, 1.0, 0.0, 0.0], "a4", 1.0)  # PSD 제거
+expect("lru eviction", cache.lookup(PSD) is None and cache.lookup(DFS) is not None and len(cache) == 3,
+       cache.stats())
+
+# 5. TTL 만료
+cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=0.05)
+cache.put("DFS 테스트 절차는?", DFS, "DFS 답변", 8.0)
+time.sleep(0.1)
+expect("ttl expiry", cache.lookup(DFS) is None and cache.stats()['expired'] == 1, cache.stats())
+
+# 6. 스트림 도중 백엔드 오류 - 부분 답변 + 오류 표시, 캐시에는 저장하지 않음
+class FailingBackend(LLMBackend):
+    model = "failing"
+
+    def generate(self, prompt):
+        raise LLMBackendError("[Ollama 오류: connection reset]")
+
+    def generate_stream(self, prompt):
+        yield "DFS 테스트는 "
+        raise LLMBackendError("[Ollama 오류: connection reset]")
+
+
+engine = SimpleNamespace(check_citations=lambda answer: [])
+rag = RAGSystem(llm_backend=FailingBackend(), search_engine=engine,
+                answer_cache=SemanticAnswerCache(threshold=0.95, ttl_seconds=60))
+retrieval = Retrieval(query="DFS 테스트 절차는?", sources=[], qa_matches=[], query_embedding=DFS)
+stream = rag.ask_stream(retrieval.query, retrieval=retrieval)
+answer = "".join(stream)
+expect("stream error flagged", stream.error == "[Ollama 오류: connection reset]"
+       and answer.startswith("DFS 테스트는 ") and answer.endswith(stream.error), repr(answer))
+expect("stream error not cached", len(rag.answer_cache) == 0 and stream.to_response().error == stream.error)
+response = rag.ask(retrieval.query, retrieval=retrieval)
+expect("ask error not cached", response.error is not None and len(rag.answer_cache) == 0
+       and rag.answer_stats()['llm'] == 0, rag.answer_stats())
+
+# 7. 같은 질문이라도 검색된 출처 문서가 다르면 (앱에서 RSS만 / KDB만 선택) 캐시 재사용 안 함
+class EchoBackend(LLMBackend):
+    model = "echo"
+
+    def generate(self, prompt):
+        return "RSS-247 기준 답변" if "[RSS-247 본문]" in prompt else "KDB 905462 기준 답변"
+
+
+def source(doc_id):
+    return SearchResult(doc_id=doc_id, content=f"[{doc_id} 본문] DFS 요구사항", source_file=f"{doc_id}.txt",
+                        source_type="", distance=0.2)
+
+
+rag = RAGSystem(llm_backend=EchoBackend(), search_engine=engine, qa_direct_threshold=None,
+                answer_cache=SemanticAnswerCache(threshold=0.95, ttl_seconds=60))
+rss = Retrieval(query="DFS 테스트 절차는?", sources=[source("RSS-247")], qa_matches=[], query_embedding=DFS)
+kdb = Retrieval(query="DFS 테스트 절차는?", sources=[source("KDB 905462")], qa_matches=[], query_embedding=DFS)
+first = rag.ask(rss.query, retrieval=rss)
+other = rag.ask(kdb.query, retrieval=kdb)
+again = rag.ask(rss.query, retrieval=rss)
+expect("scope by sources", other.answer_source == "llm" and other.answer == "KDB 905462 기준 답변"
+       and again.answer_source == "cache" and again.answer == first.answer,
+       f"({other.answer_source}, {again.answer_source})")
+
+finish()
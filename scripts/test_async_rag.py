@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""비동기 RAG 파이프라인 (aask) 동시 요청 테스트"""
+import sys
+import time
+import asyncio
+sys.path.insert(0, '.')
+from rag_system import RAGSystem, MockLLMBackend
+
+print("RAG System loading...")
+rag = RAGSystem(llm_backend=MockLLMBackend())
+
+queries = ['DFS 테스트 절차', 'RF 노출 제한', 'Part 15E UNII', 'RSS-247 power limit']
+
+
+async def main():
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(rag.aask(q, n_results=3) for q in queries))
+    elapsed = time.perf_counter() - start
+
+    for response in responses:
+        print(f'\n=== Query: {response.query} ===')
+        for i, src in enumerate(response.sources):
+            print(f'  [{i+1}] {src.doc_id} ({src.source_type}) - {(1-src.distance)*100:.1f}%')
+
+    print(f'\n{len(queries)} concurrent queries: {elapsed:.2f}s')
+
+    # 동기 ask와 검색 결과 비교
+    for query, response in zip(queries, responses):
+        sync = rag.ask(query, n_results=3)
+        same = [s.doc_id for s in sync.sources] == [s.doc_id for s in response.sources]
+        print(f'  {query}: sync/async sources {"match" if same else "DIFFER"}')
+
+
+asyncio.run(main())
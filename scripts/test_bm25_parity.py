@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""희소 BM25 역색인 vs BM25Okapi 점수/순위 패리티 테스트"""
+import sys
+import random
+import tempfile
+sys.path.insert(0, '.')
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+from bm25_index import SparseBM25Index
+from checks import fail, finish
+
+random.seed(42)
+
+# 규격 문서와 비슷한 분포의 합성 코퍼스 (일부 용어는 절반 이상 문서에 등장 → 음수 IDF)
+common = ['fcc', 'part', 'section', 'limit', 'dbm']
+vocab = ['unii', 'dfs', 'radar', '15', '407', '247', 'rss', 'kdb', '905462', 'psd', 'eirp',
+         'mhz', 'ghz', 'spurious', 'emission', 'rbw', 'vbw', 'peak', 'average', '6e', 'uwb', 'bt']
+corpus = []
+for _ in range(2000):
+    doc = random.choices(common, k=random.randint(0, 6)) + random.choices(vocab, k=random.randint(0, 40))
+    corpus.append(doc)
+
+queries = [['part', '15e'], ['unii', 'dfs', 'radar'], ['rss', '247', 'rss'], ['fcc'],
+           ['kdb', '905462', 'psd', 'eirp'], ['없는', '토큰'], [], ['spurious', 'emission', 'limit']]
+
+okapi = BM25Okapi(corpus)
+index = SparseBM25Index.build(corpus, ids=[f"chunk_{i}" for i in range(len(corpus))])
+
+with tempfile.TemporaryDirectory() as tmp:
+    index.save(tmp)
+    mapped = SparseBM25Index.load(tmp)
+
+    for query in queries:
+        expected = okapi.get_scores(query)
+        expected_top = sorted(range(len(expected)), key=lambda x: expected[x], reverse=True)
+        expected_max = max(expected) if max(expected) > 0 else 1
+
+        for name, idx in [('built', index), ('mmap', mapped)]:
+            scores = idx.get_scores(query)
+            same_scores = np.array_equal(scores, expected)
+
+            for k in [1, 5, 15, 30, 2000]:
+                top, top_scores, max_score = idx.top_k(query, k)
+                same_rank = (top == expected_top[:k] and max_score == expected_max
+                             and top_scores == [float(expected[i]) for i in top])
+                if not (same_scores and same_rank):
+                    fail(f"[{name}] {query} k={k}: scores={same_scores} rank={same_rank}")
+
+        print(f"Query {query}: top3 {expected_top[:3]} OK")
+
+    # 다중 쿼리 점수 행렬 (search_many용)
+    for query, (top, _, _) in zip(queries, index.top_k_many(queries, 15)):
+        expected = okapi.get_scores(query)
+        if top != sorted(range(len(expected)), key=lambda x: expected[x], reverse=True)[:15]:
+            fail(f"[many] {query}")
+    print("top_k_many checked")
+
+    # 메타데이터 필터 (허용 문서 인덱스만 후보)
+    allowed = np.arange(0, len(corpus), 7)
+    for query in queries:
+        expected = okapi.get_scores(query)
+        expected_top = sorted(allowed.tolist(), key=lambda x: expected[x], reverse=True)
+        for k in [1, 15, len(allowed) + 10]:
+            top, _, _ = mapped.top_k(query, k, allowed=allowed)
+            if top != expected_top[:k]:
+                fail(f"[allowed] {query} k={k}")
+    print("Filtered top_k checked")
+
+    # 수집 파이프라인이 컬렉션을 바꾸면 스냅샷 무효화 (다음 로드는 None → 재구축)
+    if not (SparseBM25Index.invalidate(tmp) and SparseBM25Index.load(tmp) is None
+            and not SparseBM25Index.invalidate(tmp)):
+        fail("[invalidate] snapshot still loadable")
+    print("Snapshot invalidation checked")
+
+# 모든 용어가 대부분 문서에 등장하는 소규모 코퍼스 (평균 IDF 음수 → 음수 점수)
+tiny = [['dfs', 'radar'], ['dfs', 'radar', 'unii'], ['dfs'], ['radar', 'unii', 'dfs'], []]
+tiny_okapi = BM25Okapi(tiny)
+tiny_index = SparseBM25Index.build(tiny)
+for query in [['dfs'], ['radar', 'unii'], ['dfs', 'dfs']]:
+    expected = tiny_okapi.get_scores(query)
+    expected_top = sorted(range(len(expected)), key=lambda x: expected[x], reverse=True)
+    top, _, _ = tiny_index.top_k(query, len(tiny))
+    if not (np.array_equal(tiny_index.get_scores(query), expected) and top == expected_top):
+        fail(f"[tiny] {query}: {top} != {expected_top}")
+print("Tiny corpus (negative IDF) checked")
+
+finish()
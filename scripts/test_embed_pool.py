@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""임베딩 풀 테스트 (프로세스 수 결정/단일 프로세스 전환, 길이순 encode 순서 복원 - 모델 불필요)"""
+import sys
+import numpy as np
+sys.path.insert(0, '.')
+from checks import expect, finish
+from embed_pool import resolve_embed_workers, encode_sorted, auto_batch_size, WORKER_MEMORY_BYTES
+
+GB = 2 ** 30
+
+# 1. 프로세스 수 결정
+expect("default single process", resolve_embed_workers(1, 16, 64 * GB) == (1, None))
+expect("requested fits", resolve_embed_workers(4, 16, 64 * GB) == (4, 4), resolve_embed_workers(4, 16, 64 * GB))
+expect("auto uses cores / 2", resolve_embed_workers(0, 16, 64 * GB) == (8, 2), resolve_embed_workers(0, 16, 64 * GB))
+expect("capped by cores", resolve_embed_workers(8, 8, 64 * GB) == (4, 2), resolve_embed_workers(8, 8, 64 * GB))
+expect("capped by RAM", resolve_embed_workers(8, 32, 3 * WORKER_MEMORY_BYTES) == (3, 10),
+       resolve_embed_workers(8, 32, 3 * WORKER_MEMORY_BYTES))
+expect("small machine degrades", resolve_embed_workers(4, 2, 64 * GB) == (1, None), resolve_embed_workers(4, 2, 64 * GB))
+expect("low RAM degrades", resolve_embed_workers(4, 16, WORKER_MEMORY_BYTES) == (1, None))
+expect("unknown RAM uses cores", resolve_embed_workers(4, 8, None) == (4, 2))
+
+# 2. 프로세스별 RAM으로 배치 크기 계산 (프로세스가 많으면 배치가 작아짐)
+expect("batch shrinks with workers", auto_batch_size(256, 384, 8 * GB // 4) < auto_batch_size(256, 384, 8 * GB))
+
+
+# 3. 길이순으로 encode하고 원래 순서로 복원
+class LengthModel:
+    """토크나이저 없음 (문자 수로 정렬), 임베딩 = [글자 수, 호출 내 위치]"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype='float32')
+
+
+model = LengthModel()
+texts = ["x" * n for n in (30, 5, 12, 1, 20)]
+embeddings = encode_sorted(model, texts, batch_size=2)
+expect("encoded in length order", [len(t) for t in model.calls[0]] == [1, 5, 12, 20, 30])
+expect("original order restored", [e[0] for e in embeddings] == [30, 5, 12, 1, 20], embeddings)
+expect("plain lists", all(isinstance(e, list) for e in embeddings))
+
+finish()
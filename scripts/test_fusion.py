@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""점수 융합 / 적응형 후보 깊이 테스트 (메모리 내 가짜 컬렉션, 벡터DB 불필요)"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, '.')
+from checks import expect, finish
+import numpy as np
+from bm25_index import SparseBM25Index
+from rag_system import VectorSearch
+
+COLLECTIONS = ['fcc_kdb', 'fcc_ecfr', 'ised_rss', 'fcc_testreport']
+WORDS = ["dfs", "psd", "power", "limit", "unii", "radar", "channel", "bandwidth", "antenna", "gain",
+         "sar", "exposure", "emission", "spurious", "band", "edge", "eirp", "duty", "cycle", "test"]
+
+
+class FakeCollection:
+    """Chroma 컬렉션 query/get/count 최소 구현 (L2 거리 정확 검색)"""
+
+    def __init__(self, ids, documents, metadatas, embeddings):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.embeddings = np.asarray(embeddings, dtype=np.float64)
+
+    def count(self):
+        return len(self.ids)
+
+    def query(self, query_embeddings, n_results, include, where=None):
+        out = {'ids': [], 'distances': [], 'documents': [], 'metadatas': [], 'embeddings': []}
+        for query in query_embeddings:
+            dist = np.sum((self.embeddings - np.asarray(query)) ** 2, axis=1)
+            order = sorted(range(len(self.ids)), key=lambda i: (dist[i], i))[:n_results]
+            out['ids'].append([self.ids[i] for i in order])
+            out['distances'].append([float(dist[i]) for i in order])
+            out['documents'].append([self.documents[i] for i in order])
+            out['metadatas'].append([self.metadatas[i] for i in order])
+            out['embeddings'].append([self.embeddings[i].tolist() for i in order])
+        return out
+
+    def get(self, ids=None, include=None, where=None):
+        rows = [self.ids.index(cid) for cid in ids] if ids is not None else range(len(self.ids))
+        return {
+            'ids': [self.ids[i] for i in rows],
+            'documents': [self.documents[i] for i in rows],
+            'metadatas': [self.metadatas[i] for i in rows],
+            'embeddings': [self.embeddings[i].tolist() for i in rows],
+        }
+
+
+def fake_search(seed: int = 0, docs_per_collection: int = 40) -> VectorSearch:
+    """모델/DB 없이 search()만 쓸 수 있는 VectorSearch"""
+    rng = np.random.default_rng(seed)
+    vs = object.__new__(VectorSearch)
+    vs.unified = False
+    vs.reranker = None
+    vs.executor = ThreadPoolExecutor(max_workers=4)
+    vs.collections, vs.bm25_index, vs.doc_cache = {}, {}, {}
+    vs._bm25_locks, vs._bm25_positions, vs._bm25_allowed_cache = {}, {}, {}
+    for name in COLLECTIONS:
+        ids = [f"{name}_{i}" for i in range(docs_per_collection)]
+        documents = [" ".join(rng.choice(WORDS, size=rng.integers(5, 15))) for _ in ids]
+        metadatas = [{'doc_id': name.upper(), 'source_file': f"{name}.txt", 'source_type': name} for _ in ids]
+        embeddings = rng.normal(size=(len(ids), 8)) / 4
+        vs.collections[name] = FakeCollection(ids, documents, metadatas, embeddings)
+        vs.bm25_index[name] = SparseBM25Index.build([vs._tokenize(d) for d in documents],
+                                                    meta={'doc_count': len(ids)}, ids=ids)
+    vs.sources = list(vs.collections)
+    return vs
+
+
+vs = fake_search()
+query_embedding = [0.0] * 8
+
+# 1. 검색할 컬렉션이 없으면 빈 결과 (선택 없음 / 없는 컬렉션 / 라우팅된 선택 컬렉션 미존재)
+for collections in ([], ['nonexistent']):
+    for adaptive in (False, True):
+        results = vs.search("dfs", collections=collections, query_embedding=query_embedding,
+                            adaptive_depth=adaptive)
+        expect(f"empty plan collections={collections} adaptive={adaptive}", results == [])
+
+# 2. 적응형 깊이 = 전체 깊이 (순서/거리까지 동일) - 전략/하이브리드/다양화 조합
+rng = np.random.default_rng(1)
+for fusion in ('weighted', 'rrf', 'zscore'):
+    for hybrid, mmr in ((True, False), (False, False), (True, True)):
+        mismatched = 0
+        for _ in range(100):
+            query = " ".join(rng.choice(WORDS, size=3))
+            embedding = (rng.normal(size=8) / 4).tolist()
+            args = dict(collections=COLLECTIONS, n_results=5, query_embedding=embedding, hybrid=hybrid,
+                        fusion=fusion, mmr=mmr)
+            full = [(r.chunk_id, r.distance) for r in vs.search(query, adaptive_depth=False, **args)]
+            adaptive = [(r.chunk_id, r.distance) for r in vs.search(query, adaptive_depth=True, **args)]
+            mismatched += full != adaptive
+        expect(f"adaptive parity fusion={fusion} hybrid={hybrid} mmr={mmr}", mismatched == 0,
+               f"{mismatched}/100 queries differ")
+
+finish()
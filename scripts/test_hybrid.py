@@ -9,11 +9,11 @@ rag = RAGSystem(llm_backend=MockLLMBackend())
 
 queries = ['FCC part 15E', 'Part 15E UNII', '15.407', 'U-NII 5GHz power limit']
 
-for query in queries:
-    print(f'\n=== Query: {query} ===')
+# 하이브리드 검색 (기본값) - 전체 쿼리 일괄 처리
+results_list = rag.search_engine.search_many(queries, n_results=5, hybrid=True)
 
-    # 하이브리드 검색 (기본값)
-    results = rag.search_engine.search(query, n_results=5, hybrid=True)
+for query, results in zip(queries, results_list):
+    print(f'\n=== Query: {query} ===')
     print('Hybrid (vector 50% + BM25 50%):')
     for i, r in enumerate(results[:3]):
         print(f'  [{i+1}] {r.doc_id} ({r.source_type}) - score: {(1-r.distance)*100:.1f}%')
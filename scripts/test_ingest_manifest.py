@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""증분 색인 manifest 테스트 (임시 폴더, 모델/ChromaDB 불필요)"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, '.')
+from checks import expect, finish
+from ingest_manifest import IngestManifest, content_hash
+
+CHUNKER = {'chunk_size': 800, 'overlap': 100}
+root = Path(tempfile.mkdtemp())
+manifest_path = root / "vector_db" / "ingest_manifest.json"
+report = root / "Testreport" / "r1.pdf"
+report.parent.mkdir(parents=True)
+report.write_text("page one\fpage two", encoding='utf-8')
+
+# 1. 처음 보는 파일은 변경됨, 기록 후에는 그대로
+manifest = IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:torch", CHUNKER, root)
+expect("new file is changed", not manifest.unchanged("fcc_testreport", report))
+chunks = {"r1_p1_0000": content_hash("page one"), "r1_p2_0000": content_hash("page two")}
+manifest.record("fcc_testreport", report, "r1", "testreport", chunks)
+manifest.save()
+expect("recorded file unchanged", manifest.unchanged("fcc_testreport", report))
+expect("key is relative", "fcc_testreport:Testreport/r1.pdf" in manifest.files, list(manifest.files))
+
+# 2. 저장/로드 왕복
+manifest = IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:torch", CHUNKER, root)
+expect("reload unchanged", manifest.unchanged("fcc_testreport", report))
+expect("chunk hashes restored", manifest.chunk_hashes("fcc_testreport", report) == chunks)
+
+# 3. 수정 시각만 바뀌면 해시로 판단 (그대로)
+stat = report.stat()
+os.utime(report, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+expect("touch only unchanged", manifest.unchanged("fcc_testreport", report))
+
+# 4. 내용이 바뀌면 변경됨
+report.write_text("page one\fpage 2 revised", encoding='utf-8')
+expect("edited file changed", not manifest.unchanged("fcc_testreport", report))
+
+# 5. 모델/청킹 파라미터가 바뀌면 이전 청크 해시를 쓰지 않음 (전부 다시 임베딩), 삭제 대상 ID는 유지
+other = IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:onnx", CHUNKER, root)
+expect("model change invalidates", other.chunk_hashes("fcc_testreport", report) == {})
+expect("previous ids kept", sorted(other.previous_chunk_ids("fcc_testreport", report)) == sorted(chunks))
+
+# 6. 컬렉션별로 따로 추적
+expect("other collection changed", not manifest.unchanged("regulatory_corpus", report))
+
+# 7. 이번 실행에서 보이지 않은 파일
+missing = manifest.missing("fcc_testreport", "testreport", seen=[])
+expect("missing file listed", list(missing) == ["fcc_testreport:Testreport/r1.pdf"], list(missing))
+expect("seen file not missing",
+       not manifest.missing("fcc_testreport", "testreport", seen=[manifest.key("fcc_testreport", report)]))
+
+# 8. 통합 컬렉션 이전 - 옮긴 기록은 regulatory_corpus에서 그대로, 소스 컬렉션 키는 남지 않음
+kdb = root / "kdb" / "KDB_905462" / "d02.pdf"
+kdb.parent.mkdir(parents=True)
+kdb.write_text("kdb page", encoding='utf-8')
+manifest = IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:torch", CHUNKER, root)
+manifest.record("fcc_testreport", report, "r1", "testreport", chunks)
+manifest.record("fcc_kdb", kdb, "KDB_905462", "kdb", {"d02_p1_0000": content_hash("kdb page")})
+moved = manifest.move_collection(["fcc_kdb", "fcc_ecfr", "ised_rss", "fcc_testreport"], "regulatory_corpus")
+manifest.save()
+migrated = IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:torch", CHUNKER, root)
+expect("migrated files up to date", moved == 2 and migrated.unchanged("regulatory_corpus", report)
+       and migrated.unchanged("regulatory_corpus", kdb)
+       and migrated.chunk_hashes("regulatory_corpus", report) == chunks)
+expect("source keys removed", all(key.startswith("regulatory_corpus:") for key in migrated.files)
+       and not migrated.missing("fcc_kdb", "kdb", seen=[]), list(migrated.files))
+expect("migrated files purgeable", sorted(migrated.missing("regulatory_corpus", "kdb", seen=[]))
+       == ["regulatory_corpus:kdb/KDB_905462/d02.pdf"])
+
+# 9. 손상된 manifest는 빈 상태 (전체 재색인)
+manifest_path.write_text("{broken", encoding='utf-8')
+expect("corrupt manifest ignored",
+       IngestManifest.load(manifest_path, "all-MiniLM-L6-v2:torch", CHUNKER, root).files == {})
+
+finish()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""스트리밍 수집 파이프라인 테스트 (순서, backpressure, 배치 flush, 예외 전파 - 모델/DB 불필요)"""
+import sys
+import time
+import threading
+sys.path.insert(0, '.')
+from checks import expect, finish
+from ingest_stream import StreamingPipeline, format_stats
+
+# 1. 배치 스테이지 + 느린 쓰기 스테이지: 순서 유지, 큐 깊이 제한, 처리 중인 항목 수 일정 (메모리 flat)
+QUEUE_SIZE = 4
+produced, written = [0], []
+in_flight_max = [0]
+batch = []
+
+
+def source():
+    for i in range(200):
+        produced[0] += 1
+        in_flight_max[0] = max(in_flight_max[0], produced[0] - len(written))
+        yield i
+
+
+def embed(item, emit):
+    batch.append(item)
+    if len(batch) >= 8:
+        emit(list(batch))
+        batch.clear()
+        return 8
+    return 0
+
+
+def flush(emit):
+    count = len(batch)
+    if batch:
+        emit(list(batch))
+        batch.clear()
+    return count
+
+
+def write(items, emit):
+    time.sleep(0.002)  # 느린 쓰기 - 상류가 막혀야 함
+    written.extend(items)
+    return len(items)
+
+
+stats = StreamingPipeline(queue_size=QUEUE_SIZE) \
+    .stage("embed", embed, flush=flush, unit_name="chunks") \
+    .stage("write", write, unit_name="chunks") \
+    .run(source(), source_name="extract")
+print(format_stats(stats))
+extract, embed_stats, write_stats = stats
+expect("order preserved", written == list(range(200)))
+expect("flush emits tail", write_stats.units == 200 and embed_stats.units == 200, (embed_stats.units, write_stats.units))
+expect("queue depth bounded", all(s.max_depth <= QUEUE_SIZE for s in stats), [s.max_depth for s in stats])
+# 처리 중인 항목 = 큐 2개 + 배치 + 스테이지가 들고 있는 항목 → 입력 크기와 무관
+bound = QUEUE_SIZE + QUEUE_SIZE * 8 + 8 + 8 + 2
+expect("in-flight items bounded", in_flight_max[0] <= bound, f"(max {in_flight_max[0]}, bound {bound})")
+expect("backpressure recorded", extract.blocked_seconds > 0 and write_stats.busy_seconds > 0,
+       f"(extract blocked {extract.blocked_seconds:.3f}s)")
+
+# 2. 스테이지 예외는 run()에서 다시 발생, 상류는 막히지 않고 종료
+def failing(item, emit):
+    if item == 50:
+        raise ValueError("bad chunk")
+    emit(item)
+
+
+result = {}
+
+
+def run_failing():
+    try:
+        StreamingPipeline(queue_size=2).stage("embed", failing).stage("write", lambda item, emit: None) \
+            .run(iter(range(1000)))
+    except ValueError as e:
+        result['error'] = str(e)
+
+
+thread = threading.Thread(target=run_failing, daemon=True)
+thread.start()
+thread.join(timeout=10)
+expect("error propagated without deadlock", not thread.is_alive() and result.get('error') == "bad chunk", result)
+
+# 3. source 예외도 전파
+def broken_source():
+    yield 1
+    raise RuntimeError("extract failed")
+
+
+try:
+    StreamingPipeline().stage("write", lambda item, emit: None).run(broken_source())
+    expect("source error propagated", False)
+except RuntimeError as e:
+    expect("source error propagated", str(e) == "extract failed")
+
+finish()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""MMR 다양화 / 문서별 상한 테스트 (합성 임베딩, 벡터DB 불필요)"""
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, '.')
+from checks import expect, finish
+from diversity import mmr_select
+
+REPORT = "S-4791615583-E11V1 FCC Report UNII(6E) WLAN.pdf"
+
+
+def result(chunk_id, source_file, distance):
+    return SimpleNamespace(chunk_id=chunk_id, source_file=source_file, doc_id=source_file, distance=distance)
+
+
+# 같은 Test Report 청크가 2~5위를 채운 경우 (거의 같은 점수/임베딩)
+results = [
+    result("kdb_0", "KDB_905462 D02.pdf", 0.40),
+    result("rep_0", REPORT, 0.646),
+    result("rep_1", REPORT, 0.646),
+    result("rep_2", REPORT, 0.647),
+    result("rep_3", REPORT, 0.647),
+    result("ecfr_0", "CFR_Part_15E.txt", 0.66),
+    result("rss_0", "RSS-247.txt", 0.70),
+]
+embeddings = {
+    "kdb_0": [1.0, 0.0, 0.0, 0.0],
+    "rep_0": [0.0, 1.0, 0.0, 0.0],
+    "rep_1": [0.0, 1.0, 0.01, 0.0],
+    "rep_2": [0.0, 0.99, 0.0, 0.05],
+    "rep_3": [0.0, 0.97, 0.2, 0.0],
+    "ecfr_0": [0.3, 0.0, 1.0, 0.0],
+    "rss_0": [0.2, 0.1, 0.0, 1.0],
+}
+
+def expect_ids(name, picked, expected):
+    ids = [r.chunk_id for r in picked]
+    expect(name, ids == expected, ids)
+
+
+# 1. MMR: 중복에 가까운 Report 청크 대신 다른 문서 선택
+expect_ids("mmr", mmr_select(results, embeddings, 5, lambda_mult=0.7),
+       ["kdb_0", "rep_0", "ecfr_0", "rss_0", "rep_3"])
+
+# 2. MMR + 문서별 상한 1
+expect_ids("mmr + max_per_doc=1", mmr_select(results, embeddings, 5, lambda_mult=0.7, max_per_doc=1),
+       ["kdb_0", "rep_0", "ecfr_0", "rss_0"])
+
+# 3. 상한만 적용 (λ=1, 관련도 순서 유지 + 거의 동일한 청크 제외)
+expect_ids("max_per_doc=2 only", mmr_select(results, embeddings, 5, lambda_mult=1.0, max_per_doc=2),
+       ["kdb_0", "rep_0", "rep_3", "ecfr_0", "rss_0"])
+
+# 4. 임베딩 없는 후보 (조항 인용 등)는 유사도 0으로 취급
+expect_ids("missing embeddings", mmr_select(results[:3], {}, 3, lambda_mult=0.7),
+       ["kdb_0", "rep_0", "rep_1"])
+
+finish()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Ollama 스트리밍 테스트 - 로컬 대역 HTTP 서버가 Ollama NDJSON 청크를 전송"""
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, '.')
+from rag_system import OllamaBackend
+
+TOKENS = ['### DFS ', '테스트 ', '절차\n', '- KDB 905462 ', 'D02 참고']
+TOKEN_DELAY = 0.2  # 토큰 간 지연 (초)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """/api/generate 요청에 Ollama 형식 청크를 지연을 두고 스트리밍 (chunked 전송, 실제 Ollama와 동일)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def write_chunk(self, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') + b'\n'
+        self.wfile.write(f'{len(data):X}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        if not request.get('stream', True):
+            self.write_chunk({'model': request['model'], 'response': ''.join(TOKENS), 'done': True})
+        else:
+            for token in TOKENS:
+                self.write_chunk({'model': request['model'], 'response': token, 'done': False})
+                time.sleep(TOKEN_DELAY)
+            self.write_chunk({'model': request['model'], 'response': '', 'done': True})
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+backend = OllamaBackend(model='qwen2:7b', base_url=f'http://127.0.0.1:{server.server_address[1]}')
+
+print('=== generate_stream ===')
+start = time.perf_counter()
+first_token = None
+chunks = []
+for chunk in backend.generate_stream('DFS 테스트 절차'):
+    if first_token is None:
+        first_token = time.perf_counter() - start
+    chunks.append(chunk)
+total = time.perf_counter() - start
+
+print(f'  chunks: {chunks}')
+print(f'  TTFT: {first_token:.3f}s, total: {total:.3f}s')
+
+ok = ''.join(chunks) == ''.join(TOKENS) and first_token < TOKEN_DELAY < total
+ok = ok and backend.generate('DFS 테스트 절차') == ''.join(TOKENS)
+server.shutdown()
+
+print(f"\n{'PASS' if ok else 'FAIL'}")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""리랭커 캐스케이드 구성요소 테스트 (모델 불필요)"""
+import sys
+sys.path.insert(0, '.')
+from checks import expect, finish
+from rerank_cascade import ScoreCache, query_window, split_band
+
+# 1. 중간 구간 결정 (top-5, 후보 10개)
+settled = [0.90, 0.85, 0.80, 0.78, 0.75, 0.40, 0.38, 0.35, 0.33, 0.30]
+expect("gap settles top-k", split_band(settled, 5) == (5, 5), split_band(settled, 5))
+
+# 같은 Test Report 청크가 비슷한 점수로 몰린 경우 - 경계 근처만 리랭킹
+ambiguous = [0.80, 0.60, 0.36, 0.354, 0.354, 0.354, 0.353, 0.352, 0.20, 0.10]
+head, band = split_band(ambiguous, 5)
+expect("ambiguous middle band", (head, band) == (2, 9), (head, band))
+
+expect("fewer candidates than cutoff", split_band([0.5, 0.4], 5) == (2, 2))
+expect("all tied", split_band([0.3, 0.3, 0.3], 2) == (0, 3))
+
+# RRF 점수처럼 스케일이 작아도 같은 결과 (상대 margin)
+rrf = [s / 60 for s in ambiguous]
+expect("scale invariant", split_band(rrf, 5) == (head, band), split_band(rrf, 5))
+
+# 2. 쿼리 중심 구간
+text = ("General information about the measurement setup and equipment list. " * 8 +
+        "The DFS radar detection threshold for U-NII devices is -64 dBm. " +
+        "Annex tables follow with calibration data. " * 8)
+window = query_window("DFS detection threshold", text, 200)
+expect("window contains query terms", "DFS radar detection threshold" in window and len(window) <= 200,
+       f"({len(window)} chars)")
+expect("window on word boundary", window[0].isalnum() and not text[text.index(window) - 1].isalnum())
+expect("short text unchanged", query_window("dfs", "short passage", 200) == "short passage")
+expect("no hits → head of text", query_window("zzz", text, 100) == text[:text.rfind(' ', 60, 100)])
+
+# 3. 점수 LRU
+cache = ScoreCache(max_size=2)
+k1, k2, k3 = (ScoreCache.key("q", cid, "") for cid in ("a", "b", "c"))
+cache.put(k1, 1.0)
+cache.put(k2, 2.0)
+cache.get(k1)          # k1 최근 사용
+cache.put(k3, 3.0)     # k2 제거
+expect("lru eviction", cache.get(k2) is None and cache.get(k1) == 1.0 and cache.get(k3) == 3.0)
+expect("content key without chunk id",
+       ScoreCache.key("q", "", "text a") != ScoreCache.key("q", "", "text b"))
+
+finish()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""쿼리 라우터 규칙 테스트 (벡터DB 불필요)"""
+import sys
+sys.path.insert(0, '.')
+from checks import expect, fail, finish
+from query_router import QueryRouter, ALL_COLLECTIONS
+
+router = QueryRouter()
+
+# (쿼리, 기대 컬렉션, 기대 where, 식별자 가중치 여부)
+cases = [
+    ("KDB 789033 D02 측정 절차", ['fcc_kdb'], {'fcc_kdb': {'doc_id': 'KDB_789033'}}, True),
+    ("RSS-247 PSD limit", ['ised_rss'], {'ised_rss': {'doc_id': 'RSS-247'}}, True),
+    ("RSS 247 5.8 GHz 출력", ['ised_rss'], {'ised_rss': {'doc_id': 'RSS-247'}}, True),
+    ("RSS-Gen 8.9 수신기 스퓨리어스", ['ised_rss'], {'ised_rss': {'doc_id': 'RSS-GEN'}}, True),
+    ("§15.407 DFS 요구사항", ['fcc_ecfr'], {'fcc_ecfr': {'doc_id': 'CFR_Part_15E'}}, True),
+    ("15.247 conducted power", ['fcc_ecfr'], {'fcc_ecfr': {'doc_id': 'CFR_Part_15C'}}, True),
+    ("47 CFR 2.1093 SAR", ['fcc_ecfr'], {'fcc_ecfr': {'doc_id': 'CFR_Part_2'}}, True),
+    ("test report UNII 6E", ['fcc_testreport'], {}, False),
+    ("Part 15E test report", ['fcc_testreport'], {}, True),
+    ("KDB 905462 vs RSS-247 DFS", ['fcc_kdb', 'ised_rss'],
+     {'fcc_kdb': {'doc_id': 'KDB_905462'}, 'ised_rss': {'doc_id': 'RSS-247'}}, True),
+    ("KDB 662911 KDB 789033", ['fcc_kdb'], {'fcc_kdb': {'doc_id': {'$in': ['KDB_662911', 'KDB_789033']}}}, True),
+    ("DFS 테스트 절차 알려줘", ALL_COLLECTIONS, {}, False),
+    ("2.4 GHz 대역 출력 제한", ALL_COLLECTIONS, {}, False),
+]
+
+searched = 0
+for query, collections, where, identifier in cases:
+    decision = router.route(query)
+    expected_weight = router.identifier_weight if identifier else router.default_weight
+    ok = (decision.collections == collections and decision.where == where
+          and decision.vector_weight == expected_weight)
+    searched += len(decision.collections)
+    expect(query, ok, f"\n     {decision.describe()}")
+
+# 사용자 선택 범위 밖으로 라우팅되면 선택 범위 전체 검색
+decision = router.route("RSS-247 PSD", collections=['fcc_kdb', 'fcc_ecfr'])
+if decision.collections != ['fcc_kdb', 'fcc_ecfr'] or decision.where:
+    fail(f"outside selection: {decision.describe()}")
+
+print(f"\nANN 검색 컬렉션 수: {searched} / {len(cases) * len(ALL_COLLECTIONS)} (라우팅 없음)")
+finish()
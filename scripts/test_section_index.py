@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""조항 인용 색인 테스트 - eCFR / RSS / KDB 형식의 합성 문서"""
+import sys
+import tempfile
+sys.path.insert(0, '.')
+from checks import expect, finish
+from section_index import SectionIndex, citation_keys
+
+ECFR = """# Title 47
+
+## Subpart E—Unlicensed National Information Infrastructure Devices
+
+### § 15.403 Definitions.
+
+(a) Access point (AP). A U-NII transceiver that operates either as a bridge.
+(b) Client device. A U-NII device whose transmissions are generally under the control of an AP.
+
+### § 15.407 General technical requirements.
+
+(a) Power limits for U-NII devices.
+(1) For the band 5.15-5.25 GHz.
+(i) For an outdoor access point operating in the band 5.15-5.25 GHz, the maximum conducted output power shall not exceed 1 W.
+(ii) For an indoor access point operating in the band 5.15-5.25 GHz, the maximum conducted output power shall not exceed 1 W.
+(2) For client devices in the 5.25-5.35 GHz band, the maximum conducted output power shall not exceed 250 mW.
+(b) Undesirable emission limits.
+(1) For transmitters operating in the 5.15-5.25 GHz band: all emissions outside of the band shall not exceed an e.i.r.p. of -27 dBm/MHz.
+"""
+
+RSS = """# RSS-247 — Digital Transmission Systems (DTSs), Frequency Hopping Systems (FHSs)
+
+# Contents
+1 Scope
+2 General information
+3 Measurement method
+
+## 1 Scope
+This Radio Standards Specification sets out certification requirements for digital transmission systems.
+
+## 2 General information
+Devices shall be certified in accordance with RSS-Gen and this standard for each band of operation.
+
+### 2.1 Related documents
+ISED publications listed here can be found on the Spectrum Management and Telecommunications website.
+
+## 3 Measurement method
+3.1 Bandwidth
+The 6 dB bandwidth shall be measured with the following settings applied to the analyzer.
+1. Set RBW to 100 kHz
+2. Set VBW to 300 kHz
+3.2 Power spectral density
+The power spectral density shall not exceed 8 dBm in any 3 kHz band.
+"""
+
+KDB_PAGES = [
+    "TABLE OF CONTENTS\n1 INTRODUCTION ........ 2\n2 DFS REQUIREMENTS ........ 3\n2.1 Radar Types ........ 4",
+    "1 INTRODUCTION\nThis document describes the compliance measurement procedures for DFS.\n"
+    "2 DFS REQUIREMENTS\nThe U-NII device shall detect radar waveforms.\n"
+    "2.1 Radar Types\nShort pulse radar types 1 through 4 are used for testing.\n"
+    "1. Configure the generator\n2. Record detection",
+]
+
+# 1. 인용 추출 (단위가 붙은 주파수는 인용이 아님)
+keys = [key for _, key in citation_keys(
+    "See §15.407(a)(1) and 47 CFR 2.1093, RSS-247 section 5.4, RSS-GEN 8.9, KDB 905462 D01 7.2, "
+    "15.247 (b)(3); 5.725 GHz, RSS-247 5.8 GHz"
+)]
+expect("citation extraction", keys == ['CFR 15.407(a)(1)', 'CFR 2.1093', 'RSS-247 5.4', 'RSS-GEN 8.9',
+                                       'KDB 905462 D01 7.2', 'CFR 15.247(b)(3)'])
+
+# 2. 색인 구축 (청크 구간은 오프셋 기준)
+index = SectionIndex()
+ecfr_chunks = [("ecfr_0", 0, 400), ("ecfr_1", 350, 800), ("ecfr_2", 750, len(ECFR))]
+index.add_document("CFR_Part_15E", "ecfr", "CFR_Part_15E.txt", ECFR, ecfr_chunks)
+index.add_document("RSS-247", "rss", "RSS-247.txt", RSS)
+kdb_text = "\n\n".join(KDB_PAGES)
+index.add_document("KDB_905462", "kdb", "KDB_905462_1_905462 D02 UNII DFS Compliance.pdf", kdb_text)
+
+with tempfile.TemporaryDirectory() as tmp:
+    index.save(tmp)
+    loaded = SectionIndex.load(tmp)
+
+    for name, idx in [('built', index), ('loaded', loaded)]:
+        entry = idx.lookup("15.407(a)(1)")
+        text = idx.section_text(entry)
+        expect(f"[{name}] CFR paragraph span",
+               text.startswith("(1) For the band 5.15-5.25 GHz.") and "(ii) For an indoor" in text
+               and "(2) For client" not in text)
+        expect(f"[{name}] CFR roman sub-paragraph", idx.lookup("§ 15.407(a)(1)(ii)").key == "CFR 15.407(a)(1)(ii)")
+        expect(f"[{name}] CFR parent fallback", idx.lookup("15.407(b)(9)").key == "CFR 15.407(b)")
+        expect(f"[{name}] CFR chunk ids", idx.lookup("15.407").chunk_ids == ["ecfr_0", "ecfr_1", "ecfr_2"]
+               and "ecfr_0" not in idx.lookup("15.407(b)").chunk_ids)
+
+        rss = idx.section_text(idx.lookup("RSS-247 3.1"))
+        expect(f"[{name}] RSS section with procedure steps",
+               rss.startswith("3.1 Bandwidth") and "2. Set VBW" in rss and "3.2" not in rss)
+        expect(f"[{name}] RSS table of contents skipped", idx.section_text(idx.lookup("RSS-247 1")).startswith("## 1 Scope"))
+
+        kdb = idx.lookup("KDB 905462 D02 2.1")
+        expect(f"[{name}] KDB heading", kdb is not None and idx.section_text(kdb).startswith("2.1 Radar Types"))
+        expect(f"[{name}] KDB without attachment", idx.lookup("KDB 905462 2").title == "DFS REQUIREMENTS")
+
+    # 3. 답변 인용 검증
+    checks = loaded.check_citations("§15.407(a)(2)에 따라 250 mW, RSS-247 3.2 및 RSS-247 9.9 참고")
+    expect("answer citation check", [c.found for c in checks] == [True, True, False])
+    # 지어낸 하위 항목은 상위 조항이 있어도 미확인 (상위 조항은 첨부)
+    fabricated = loaded.check_citations("§15.407(z)(9)")
+    expect("fabricated sub-paragraph unverified", len(fabricated) == 1 and not fabricated[0].found
+           and fabricated[0].matched_key == "CFR 15.407")
+
+finish()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""span 추적 테스트 (중첩, 스레드 풀 전파, p50/p95, Chrome trace 형식)"""
+import sys
+import json
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, '.')
+from checks import expect, finish
+from tracing import Tracer
+
+tracer = Tracer()
+executor = ThreadPoolExecutor(max_workers=4)
+
+
+def search_collection(name):
+    with tracer.span("search_collection", collection=name):
+        time.sleep(0.01)
+
+
+# 1. 요청 하나 = 루트 span + 하위 span (스레드 풀 작업도 같은 trace)
+with tracer.span("rag.ask") as root:
+    with tracer.span("search") as search:
+        futures = [executor.submit(tracer.wrap(search_collection), name) for name in ("kdb", "ecfr", "rss")]
+        [f.result() for f in futures]
+        search.set(candidates=42)
+
+spans = tracer.spans(root.trace_id)
+children = [s for s in spans if s.name == "search_collection"]
+expect("thread pool spans joined to request", len(children) == 3 and all(s.parent_id == search.span_id for s in children))
+expect("root has no parent", root.parent_id is None and search.parent_id == root.span_id)
+
+summary = tracer.stage_summary(root.trace_id)
+expect("stage summary", summary["search_collection"]["count"] == 3 and summary["search"]["candidates"] == 42,
+       {k: round(v["ms"], 1) for k, v in summary.items()})
+
+# 2. 다른 요청과 섞이지 않음
+with tracer.span("rag.ask") as other:
+    pass
+expect("separate traces", other.trace_id != root.trace_id and len(tracer.spans(other.trace_id)) == 1)
+
+# 3. 예외도 기록
+try:
+    with tracer.span("llm.generate"):
+        raise TimeoutError()
+except TimeoutError:
+    pass
+expect("error recorded", tracer.spans()[-1].attrs.get("error") == "TimeoutError")
+
+# 4. rolling p50/p95
+for ms in range(1, 101):
+    span = tracer.start("embed_query")
+    span.start_us -= ms * 1000
+    tracer.finish(span)
+stats = tracer.percentiles()["embed_query"]
+expect("percentiles", 49 <= stats["p50_ms"] <= 52 and 94 <= stats["p95_ms"] <= 97, stats)
+
+# 5. Chrome trace / JSONL
+with tempfile.TemporaryDirectory() as tmp:
+    count = tracer.export_chrome_trace(Path(tmp) / "trace.json", trace_id=root.trace_id)
+    events = json.load(open(Path(tmp) / "trace.json", encoding="utf-8"))["traceEvents"]
+    expect("chrome trace events", count == len(spans) and all(e["ph"] == "X" and e["dur"] >= 0 for e in events))
+    tracer.export_jsonl(Path(tmp) / "spans.jsonl")
+    lines = open(Path(tmp) / "spans.jsonl", encoding="utf-8").read().splitlines()
+    expect("jsonl lines", len(lines) == len(tracer.spans()) and json.loads(lines[0])["name"])
+
+# 6. 비활성화 시 기록 없음
+tracer.enabled = False
+before = len(tracer.spans())
+with tracer.span("search") as span:
+    span.set(candidates=1)
+expect("disabled", len(tracer.spans()) == before)
+
+executor.shutdown()
+finish()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+AI 자동화 시스템 - RAG 파이프라인 단계별 지연 추적
+요청 단위 span(임베딩, 컬렉션 검색, BM25 구축, 융합, 리랭킹, 프롬프트, LLM)을 기록하고
+프로세스 내 rolling p50/p95를 유지, Chrome trace(chrome://tracing, Perfetto) / JSONL로 내보내기
+
+사용법:
+    from tracing import tracer
+    with tracer.span("search", n_results=5) as span:
+        ...
+        span.set(candidates=len(fused))
+
+    tracer.export_chrome_trace("rag_trace.json")   # chrome://tracing 또는 ui.perfetto.dev에서 열기
+    tracer.export_jsonl("rag_spans.jsonl")
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import functools
+import itertools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("rag_current_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """측정 구간 (시작/종료는 perf_counter 기준 마이크로초)"""
+
+    __slots__ = ('name', 'span_id', 'trace_id', 'parent_id', 'start_us', 'duration_us', 'thread_id', 'attrs')
+
+    def __init__(self, name: str, parent: Optional['Span'], attrs: dict):
+        self.name = name
+        self.span_id = next(_ids)
+        self.trace_id = parent.trace_id if parent else self.span_id  # 루트 span ID = 요청 ID
+        self.parent_id = parent.span_id if parent else None
+        self.start_us = time.perf_counter_ns() // 1000
+        self.duration_us = None
+        self.thread_id = threading.get_ident()
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs):
+        """후보 수, 토큰 수 등 속성 추가"""
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.duration_us or 0) / 1000
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name, 'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id,
+            'start_us': self.start_us, 'duration_ms': round(self.duration_ms, 3), 'thread_id': self.thread_id,
+            'attrs': self.attrs
+        }
+
+
+class Tracer:
+    """
+    span 기록기 (스레드/asyncio 안전)
+
+    - 부모 span은 contextvars로 전달 (스레드 풀 작업은 wrap()으로 감싸야 같은 요청에 묶임)
+    - 완료된 span은 최근 max_spans개만 보관 (내보내기용)
+    - span 이름별 최근 window개 소요 시간으로 p50/p95 계산
+    """
+
+    def __init__(self, max_spans: int = 20000, window: int = 1000, enabled: bool = True):
+        self.enabled = enabled
+        self.window = window
+        self._spans = deque(maxlen=max_spans)
+        self._durations: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """with 블록을 현재 span의 하위 span으로 기록"""
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span(name, _current_span.get(), attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.finish(span)
+
+    def start(self, name: str, **attrs) -> Span:
+        """수동 종료 span (스트리밍처럼 with 블록으로 감쌀 수 없는 구간) - finish()로 종료"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(name, _current_span.get(), attrs)
+
+    def finish(self, span: Span):
+        if span is _NULL_SPAN or span.duration_us is not None:
+            return
+        span.duration_us = time.perf_counter_ns() // 1000 - span.start_us
+        with self._lock:
+            self._spans.append(span)
+            durations = self._durations.get(span.name)
+            if durations is None:
+                durations = self._durations[span.name] = deque(maxlen=self.window)
+            durations.append(span.duration_ms)
+
+    @contextmanager
+    def activate(self, span: Span):
+        """수동 span을 현재 span으로 설정 (하위 span이 이 span 아래에 기록됨)"""
+        token = _current_span.set(span if span is not _NULL_SPAN else _current_span.get())
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def traced(self, name: str = None):
+        """함수 전체를 span으로 기록하는 데코레이터 (async 함수 지원)"""
+        def decorator(fn):
+            span_name = name or fn.__qualname__
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def annotate(**attrs):
+        """현재 span에 속성 추가 (span 밖이면 무시)"""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attrs)
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current_span.get()
+
+    @staticmethod
+    def trace_id() -> Optional[int]:
+        """현재 요청(루트 span) ID"""
+        span = _current_span.get()
+        return span.trace_id if span is not None else None
+
+    @staticmethod
+    def wrap(fn: Callable) -> Callable:
+        """현재 컨텍스트(부모 span)를 유지한 채 다른 스레드에서 실행할 함수 (작업 하나당 한 번 감쌀 것)"""
+        context = contextvars.copy_context()
+        return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+    # ---------- 조회 ----------
+
+    def spans(self, trace_id: int = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        return spans if trace_id is None else [s for s in spans if s.trace_id == trace_id]
+
+    def stage_summary(self, trace_id: int) -> Dict[str, dict]:
+        """요청 하나의 단계별 합계 {이름: {'ms', 'count', ...마지막 속성}} (시작 순서)"""
+        summary = {}
+        for span in sorted(self.spans(trace_id), key=lambda s: s.start_us):
+            entry = summary.setdefault(span.name, {'ms': 0.0, 'count': 0})
+            entry['ms'] += span.duration_ms
+            entry['count'] += 1
+            entry.update(span.attrs)
+        return summary
+
+    def percentiles(self) -> Dict[str, dict]:
+        """span 이름별 최근 window개 p50/p95/mean (ms)"""
+        with self._lock:
+            snapshot = {name: list(values) for name, values in self._durations.items()}
+        stats = {}
+        for name, values in snapshot.items():
+            values = np.asarray(values)
+            stats[name] = {
+                'count': len(values),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'mean_ms': float(values.mean())
+            }
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._durations.clear()
+
+    # ---------- 내보내기 ----------
+
+    def export_chrome_trace(self, path: Path, trace_id: int = None) -> int:
+        """Chrome trace 이벤트 형식 (ph='X' 완료 이벤트, 스레드별 타임라인)"""
+        spans = self.spans(trace_id)
+        pid = os.getpid()
+        events = [{
+            'name': s.name, 'cat': 'rag', 'ph': 'X', 'ts': s.start_us, 'dur': s.duration_us,
+            'pid': pid, 'tid': s.thread_id,
+            'args': {'trace_id': s.trace_id, 'span_id': s.span_id, 'parent_id': s.parent_id,
+                     **{k: _jsonable(v) for k, v in s.attrs.items()}}
+        } for s in spans]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        logger.info(f"Chrome trace: {len(events)} spans → {path}")
+        return len(events)
+
+    def export_jsonl(self, path: Path, trace_id: int = None) -> int:
+        """span 하나당 한 줄 (추가 모드 - 여러 세션 누적 분석용)"""
+        spans = self.spans(trace_id)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=_jsonable) + "\n")
+        return len(spans)
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class _NullSpan(Span):
+    """추적 비활성화 시 반환되는 span (set 무시)"""
+
+    def __init__(self):
+        super().__init__("null", None, {})
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+# 프로세스 전역 tracer
+tracer = Tracer()
@@ -0,0 +1,482 @@
+"""
+AI 자동화 시스템 - 벡터 저장소 백엔드
+- chroma: 기존 ChromaDB (HNSW + SQLite 메타데이터)
+- numpy: Chroma 컬렉션을 .npy/컬럼 파일로 내보내 memory-map, 전체 소스를 한 번의 행렬-벡터 곱으로 정확 검색
+  (옵션 int8 양자화로 임베딩 메모리 1/4)
+
+두 백엔드 모두 VectorSearch가 쓰는 Collection 인터페이스(query/get/count)를 제공
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 저장 포맷 버전
+STORE_VERSION = 1
+
+# 통합 컬렉션: 네 소스를 한 컬렉션에 저장하고 source_type 메타데이터로 구분
+UNIFIED_COLLECTION = "regulatory_corpus"
+COLLECTION_SOURCE_TYPES = {
+    "fcc_kdb": "kdb",
+    "fcc_ecfr": "ecfr",
+    "ised_rss": "rss",
+    "fcc_testreport": "testreport",
+}
+
+# 컬렉션 구성 기록 - 수집 파이프라인/이전 스크립트가 쓰고 검색 엔진이 읽음
+# (통합 컬렉션이 있다는 것만으로 판단하면 소스별 컬렉션에 수집한 내용을 검색이 못 봄)
+LAYOUT_FILE = "collection_layout.json"
+LAYOUT_SEPARATE = "separate"  # 소스별 4개 컬렉션
+LAYOUT_UNIFIED = "unified"    # regulatory_corpus 1개 + source_type 필터
+
+
+def read_layout(db_dir: Path) -> str:
+    """벡터DB의 컬렉션 구성 (기록이 없으면 소스별 구성)"""
+    try:
+        with open(Path(db_dir) / LAYOUT_FILE, 'r', encoding='utf-8') as f:
+            layout = json.load(f).get('layout')
+    except FileNotFoundError:
+        return LAYOUT_SEPARATE
+    except Exception as e:
+        logger.warning(f"Collection layout unreadable: {e}")
+        return LAYOUT_SEPARATE
+    return layout if layout in (LAYOUT_SEPARATE, LAYOUT_UNIFIED) else LAYOUT_SEPARATE
+
+
+def write_layout(db_dir: Path, layout: str):
+    """컬렉션 구성 기록 (이후 검색과 기본 수집 대상이 이 구성을 따름)"""
+    if layout not in (LAYOUT_SEPARATE, LAYOUT_UNIFIED):
+        raise ValueError(f"Unknown collection layout: {layout}")
+    path = Path(db_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / LAYOUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'layout': layout}, f)
+
+
+def source_filter(collections: List[str], where: Dict[str, dict] = None) -> Optional[dict]:
+    """
+    소스 컬렉션 선택 + 컬렉션별 where → 통합 컬렉션 where 필터
+
+    예: ['fcc_kdb', 'ised_rss'] + {'ised_rss': {'doc_id': 'RSS-247'}}
+        → {'$or': [{'source_type': 'kdb'}, {'$and': [{'source_type': 'rss'}, {'doc_id': 'RSS-247'}]}]}
+    전체 소스를 필터 없이 선택하면 None (필터 없는 ANN 검색)
+    """
+    where = where or {}
+    names = [name for name in COLLECTION_SOURCE_TYPES if name in collections]
+    if not names:
+        return None
+    if not any(where.get(name) for name in names):
+        if len(names) == len(COLLECTION_SOURCE_TYPES):
+            return None
+        types = [COLLECTION_SOURCE_TYPES[name] for name in names]
+        return {'source_type': types[0] if len(types) == 1 else {'$in': types}}
+
+    clauses = []
+    for name in names:
+        clause = {'source_type': COLLECTION_SOURCE_TYPES[name]}
+        if where.get(name):
+            clause = {'$and': [clause, where[name]]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+class VectorStore:
+    """벡터 저장소 기본 클래스 - 이름으로 Collection을 반환"""
+
+    backend = "base"
+
+    def get_collection(self, name: str):
+        raise NotImplementedError
+
+    def list_collections(self) -> List[str]:
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    """ChromaDB PersistentClient 래퍼"""
+
+    backend = "chroma"
+
+    def __init__(self, path: Path):
+        import chromadb
+        from chromadb.config import Settings
+        self.client = chromadb.PersistentClient(
+            path=str(path),
+            settings=Settings(anonymized_telemetry=False)
+        )
+
+    def get_collection(self, name: str):
+        return self.client.get_collection(name)
+
+    def list_collections(self) -> List[str]:
+        return [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    memory-map NumPy 벡터 저장소
+
+    모든 컬렉션의 임베딩을 하나의 행렬에 이어 붙이고 컬렉션은 행 범위로 구분
+    쿼리 임베딩 하나당 전체 행렬과 한 번만 곱하고(스레드 간 공유), 컬렉션은 결과를 잘라 씀
+    거리는 Chroma 기본 공간과 같은 제곱 L2 (|q|^2 + |x|^2 - 2 q.x)
+    """
+
+    backend = "numpy"
+
+    def __init__(self, path: Path, manifest: dict, embeddings: np.ndarray, scales: Optional[np.ndarray],
+                 sq_norms: np.ndarray, ids: List[str], doc_offsets: np.ndarray, doc_blob: np.ndarray,
+                 metadata: Dict[str, object], score_cache_size: int = 64):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.embeddings = embeddings          # float32 (N, D) 또는 int8 (N, D)
+        self.scales = scales                  # int8일 때 행별 스케일 (N,)
+        self.sq_norms = sq_norms              # 원본 임베딩 제곱 노름 (N,)
+        self.ids = ids
+        self.doc_offsets = doc_offsets        # 문서 본문 UTF-8 오프셋 (N + 1,)
+        self.doc_blob = doc_blob              # 문서 본문 UTF-8 바이트 (memory-map)
+        self.metadata = metadata              # 컬럼명 -> np.ndarray(int) 또는 list(str)
+        self.ranges = {name: tuple(span) for name, span in manifest['collections'].items()}
+        self.id_to_row = {chunk_id: row for row, chunk_id in enumerate(ids)}
+
+        # 쿼리 임베딩 -> 전체 거리 벡터 (컬렉션 병렬 검색 시 한 번만 계산)
+        self._score_cache = OrderedDict()
+        self._score_cache_size = score_cache_size
+        self._score_lock = threading.Lock()
+        self._pending = {}                    # 계산 중인 키 -> Event
+        self._mask_cache = {}
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+    def get_collection(self, name: str) -> 'NumpyCollection':
+        if name not in self.ranges:
+            raise ValueError(f"Collection {name} does not exist in {self.path}")
+        return NumpyCollection(self, name, *self.ranges[name])
+
+    def list_collections(self) -> List[str]:
+        return list(self.ranges)
+
+    def memory_bytes(self) -> int:
+        """임베딩 행렬 크기 (바이트)"""
+        size = self.embeddings.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+    # ---------- 검색 ----------
+
+    def distances(self, query_embedding) -> np.ndarray:
+        """전체 행에 대한 제곱 L2 거리 (행렬-벡터 곱 1회, 같은 쿼리는 재사용)"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        key = query.tobytes()
+
+        while True:
+            with self._score_lock:
+                cached = self._score_cache.get(key)
+                if cached is not None:
+                    self._score_cache.move_to_end(key)
+                    return cached
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            event.wait()  # 다른 컬렉션 스레드가 계산 중 → 결과 대기
+
+        try:
+            if self.quantized:
+                dots = (self.embeddings @ query) * self.scales
+            else:
+                dots = self.embeddings @ query
+            result = np.maximum(float(query @ query) + self.sq_norms - 2 * dots, 0)
+            with self._score_lock:
+                self._score_cache[key] = result
+                while len(self._score_cache) > self._score_cache_size:
+                    self._score_cache.popitem(last=False)
+            return result
+        finally:
+            with self._score_lock:
+                self._pending.pop(key).set()
+
+    def where_mask(self, where: dict, start: int, end: int) -> np.ndarray:
+        """Chroma where 필터 → 행 범위 내 bool 마스크 ($eq, $ne, $in, $nin, $and, $or 지원)"""
+        key = (json.dumps(where, sort_keys=True), start, end)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = self._evaluate(where, start, end)
+            if len(self._mask_cache) > 256:
+                self._mask_cache.clear()
+            self._mask_cache[key] = mask
+        return mask
+
+    def _evaluate(self, where: dict, start: int, end: int) -> np.ndarray:
+        mask = np.ones(end - start, dtype=bool)
+        for field, condition in where.items():
+            if field == '$and':
+                for sub in condition:
+                    mask &= self._evaluate(sub, start, end)
+                continue
+            if field == '$or':
+                any_mask = np.zeros(end - start, dtype=bool)
+                for sub in condition:
+                    any_mask |= self._evaluate(sub, start, end)
+                mask &= any_mask
+                continue
+
+            column = self.metadata.get(field)
+            if column is None:
+                mask[:] = False
+                continue
+            values = np.asarray(column[start:end], dtype=object)
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for op, operand in condition.items():
+                if op == '$eq':
+                    mask &= values == operand
+                elif op == '$ne':
+                    mask &= values != operand
+                elif op == '$in':
+                    mask &= np.isin(values, list(operand))
+                elif op == '$nin':
+                    mask &= ~np.isin(values, list(operand))
+                else:
+                    raise ValueError(f"Unsupported where operator: {op}")
+        return mask
+
+    def document(self, row: int) -> str:
+        return bytes(self.doc_blob[self.doc_offsets[row]:self.doc_offsets[row + 1]]).decode('utf-8')
+
+    def embedding_rows(self, rows) -> np.ndarray:
+        """행 임베딩 (int8이면 스케일을 곱해 복원)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.asarray(self.embeddings[rows], dtype=np.float32)
+        if self.quantized:
+            vectors *= self.scales[rows][:, None]
+        return vectors
+
+    def metadata_row(self, row: int) -> dict:
+        meta = {}
+        for field, column in self.metadata.items():
+            value = column[row]
+            if value is None:
+                continue
+            meta[field] = int(value) if isinstance(value, np.integer) else value
+        return meta
+
+    # ---------- 저장/로드 ----------
+
+    @classmethod
+    def export(cls, source: VectorStore, path: Path, collections: List[str] = None,
+               quantize: bool = False, batch_size: int = 5000) -> 'NumpyVectorStore':
+        """
+        Chroma 컬렉션을 NumPy 저장소로 내보내기 (임베딩 재계산 없음)
+
+        Files:
+            embeddings.npy (float32) 또는 embeddings_int8.npy + scales.npy
+            sq_norms.npy, ids.json, documents.bin + doc_offsets.npy,
+            meta_<컬럼>.npy(정수) / meta_<컬럼>.json(문자열), manifest.json(마지막에 기록)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "manifest.json").unlink(missing_ok=True)  # 기록 중에는 무효 처리
+
+        names = collections or source.list_collections()
+        vectors, ids, documents, metadatas, ranges = [], [], [], [], {}
+        for name in names:
+            col = source.get_collection(name)
+            total = col.count()
+            start = len(ids)
+            for offset in range(0, total, batch_size):
+                batch = col.get(include=['embeddings', 'documents', 'metadatas'],
+                                limit=batch_size, offset=offset)
+                vectors.append(np.asarray(batch['embeddings'], dtype=np.float32))
+                ids.extend(batch['ids'])
+                documents.extend(batch['documents'])
+                metadatas.extend(batch['metadatas'])
+            ranges[name] = [start, len(ids)]
+            logger.info(f"  Exported {name}: {len(ids) - start} vectors")
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        np.save(path / "sq_norms.npy", np.einsum('ij,ij->i', matrix, matrix).astype(np.float32))
+        if quantize:
+            # 행별 대칭 int8 양자화: x ≈ q * scale, scale = max|x| / 127
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            np.save(path / "embeddings_int8.npy", np.round(matrix / scales[:, None]).astype(np.int8))
+            np.save(path / "scales.npy", scales.astype(np.float32))
+        else:
+            np.save(path / "embeddings.npy", matrix)
+
+        encoded = [(doc or "").encode('utf-8') for doc in documents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(doc) for doc in encoded])
+        np.save(path / "doc_offsets.npy", offsets)
+        with open(path / "documents.bin", 'wb') as f:
+            f.write(b"".join(encoded))
+
+        with open(path / "ids.json", 'w', encoding='utf-8') as f:
+            json.dump(ids, f, ensure_ascii=False)
+
+        # 메타데이터는 컬럼 단위 저장 (정수 컬럼은 npy, 나머지는 json)
+        fields = list(dict.fromkeys(k for meta in metadatas for k in (meta or {})))
+        columns = {}
+        for field in fields:
+            values = [(meta or {}).get(field) for meta in metadatas]
+            if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+                np.save(path / f"meta_{field}.npy", np.asarray(values, dtype=np.int64))
+                columns[field] = 'int'
+            else:
+                with open(path / f"meta_{field}.json", 'w', encoding='utf-8') as f:
+                    json.dump(values, f, ensure_ascii=False)
+                columns[field] = 'json'
+
+        manifest = {
+            'version': STORE_VERSION,
+            'count': len(ids),
+            'dim': int(matrix.shape[1]) if matrix.size else 0,
+            'quantized': quantize,
+            'collections': ranges,
+            'columns': columns
+        }
+        with open(path / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        logger.info(f"NumPy store written: {len(ids)} vectors, dim {manifest['dim']}, "
+                    f"{'int8' if quantize else 'float32'} → {path}")
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> 'NumpyVectorStore':
+        """저장소 로드 (임베딩/본문은 memory-map)"""
+        path = Path(path)
+        manifest_file = path / "manifest.json"
+        if not manifest_file.exists():
+            raise FileNotFoundError(f"NumPy vector store not found: {path} (run vector_store.py export)")
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"NumPy vector store version mismatch: {manifest.get('version')}")
+
+        mode = 'r' if mmap else None
+        if manifest['quantized']:
+            embeddings = np.load(path / "embeddings_int8.npy", mmap_mode=mode)
+            scales = np.load(path / "scales.npy")
+        else:
+            embeddings = np.load(path / "embeddings.npy", mmap_mode=mode)
+            scales = None
+
+        with open(path / "ids.json", 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+
+        metadata = {}
+        for field, kind in manifest['columns'].items():
+            if kind == 'int':
+                metadata[field] = np.load(path / f"meta_{field}.npy")
+            else:
+                with open(path / f"meta_{field}.json", 'r', encoding='utf-8') as f:
+                    metadata[field] = json.load(f)
+
+        doc_blob = np.memmap(path / "documents.bin", dtype=np.uint8, mode='r') \
+            if (path / "documents.bin").stat().st_size else np.zeros(0, dtype=np.uint8)
+
+        return cls(path, manifest, embeddings, scales, np.load(path / "sq_norms.npy"), ids,
+                   np.load(path / "doc_offsets.npy"), doc_blob, metadata)
+
+
+class NumpyCollection:
+    """NumpyVectorStore의 컬렉션 뷰 (Chroma Collection의 query/get/count 부분 호환)"""
+
+    def __init__(self, store: NumpyVectorStore, name: str, start: int, end: int):
+        self.store = store
+        self.name = name
+        self.start = start
+        self.end = end
+
+    def count(self) -> int:
+        return self.end - self.start
+
+    def _rows_result(self, rows, include: List[str]) -> dict:
+        result = {'ids': [self.store.ids[r] for r in rows]}
+        if 'documents' in include:
+            result['documents'] = [self.store.document(r) for r in rows]
+        if 'metadatas' in include:
+            result['metadatas'] = [self.store.metadata_row(r) for r in rows]
+        if 'embeddings' in include:
+            result['embeddings'] = self.store.embedding_rows(rows)
+        return result
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10,
+              include: List[str] = None, where: dict = None) -> dict:
+        include = include or ['documents', 'metadatas', 'distances']
+        output = {'ids': [], 'documents': [], 'metadatas': [], 'distances': [], 'embeddings': []}
+
+        mask = self.store.where_mask(where, self.start, self.end) if where else None
+        for query_embedding in query_embeddings:
+            distances = self.store.distances(query_embedding)[self.start:self.end]
+            if mask is not None:
+                candidates = np.flatnonzero(mask)
+                distances = distances[candidates]
+            else:
+                candidates = None
+
+            k = min(n_results, len(distances))
+            if k <= 0:
+                top = np.zeros(0, dtype=np.int64)
+            else:
+                top = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+                top = top[np.argsort(distances[top], kind='stable')]
+
+            top_distances = distances[top]
+            local = candidates[top] if candidates is not None else top
+            rows = [self.start + int(i) for i in local]
+
+            result = self._rows_result(rows, include)
+            output['ids'].append(result['ids'])
+            output['documents'].append(result.get('documents'))
+            output['metadatas'].append(result.get('metadatas'))
+            output['embeddings'].append(result.get('embeddings'))
+            output['distances'].append([float(d) for d in top_distances])
+
+        return output
+
+    def get(self, ids: List[str] = None, where: dict = None, include: List[str] = None,
+            limit: int = None, offset: int = None) -> dict:
+        include = ['documents', 'metadatas'] if include is None else include
+        if ids is not None:
+            rows = [self.store.id_to_row[i] for i in ids
+                    if i in self.store.id_to_row and self.start <= self.store.id_to_row[i] < self.end]
+        else:
+            rows = np.arange(self.start, self.end)
+            if where:
+                rows = rows[self.store.where_mask(where, self.start, self.end)]
+            rows = rows.tolist()
+        if ids is not None and where:
+            mask = self.store.where_mask(where, self.start, self.end)
+            rows = [r for r in rows if mask[r - self.start]]
+        rows = rows[offset or 0:(offset or 0) + limit if limit else None]
+        return self._rows_result(rows, include)
+
+
+def main():
+    import argparse
+    from rag_system import VECTOR_DB_DIR, VECTOR_STORE_DIR
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="ChromaDB → NumPy 벡터 저장소 내보내기")
+    parser.add_argument('--int8', action='store_true', help="임베딩 int8 양자화 (메모리 1/4)")
+    parser.add_argument('--out', default=str(VECTOR_STORE_DIR), help="출력 디렉토리")
+    args = parser.parse_args()
+
+    store = NumpyVectorStore.export(ChromaVectorStore(VECTOR_DB_DIR), Path(args.out), quantize=args.int8)
+    logger.info(f"Embedding memory: {store.memory_bytes() / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,58 @@
 """
 AI 자동화 시스템 - 벡터DB 파이프라인
 2단계: 문서 → 텍스트 추출 → 청킹 → 임베딩 → ChromaDB 저장
+
+증분 색인: ingest_manifest.json(벡터DB 폴더)에 파일별 내용 해시/청크 ID를 기록해
+재실행 시 바뀐 파일만 다시 처리 (--full: manifest 무시하고 전체 재임베딩)
+대량 수집: --workers N (PDF 추출 프로세스), --embed-workers N (임베딩 프로세스 - 프로세스마다 모델 사본)
 """
 
 import os
 import re
 import json
+import time
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Generator
+from typing import Iterable, Iterator, List, Dict, Optional, Generator, Tuple
 from dataclasses import dataclass, asdict
 
-import fitz  # PyMuPDF
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+
+from bm25_index import SparseBM25Index
+from chunking import TextChunk, PDFExtractor, TextChunker, ExtractResult, extract_and_chunk, split_pdf_tasks
+from section_index import SectionIndex
+from vector_store import UNIFIED_COLLECTION, LAYOUT_SEPARATE, LAYOUT_UNIFIED, read_layout, write_layout
+from ingest_manifest import IngestManifest, content_hash
+from ingest_stream import StreamingPipeline, StageStats, format_stats
+from startup import LazyModel
+from embed_pool import (EmbeddingPool, available_memory_bytes, auto_batch_size, resolve_embed_workers,
+                        load_embedding_model, model_shape, token_lengths, encode_sorted)
 
 # 경로 설정
 BASE_DIR = Path(r"C:\Users\younh\Documents\Ai model")
 RAW_DATA_DIR = BASE_DIR / "aidata" / "raw_data"
 VECTOR_DB_DIR = BASE_DIR / "aidata" / "vector_db"
+SECTION_INDEX_DIR = VECTOR_DB_DIR / "section_index"  # 조항 인용 색인 (rag_system.py와 동일 경로)
+BM25_INDEX_DIR = VECTOR_DB_DIR / "bm25_index"        # BM25 스냅샷 (rag_system.py와 동일 경로)
+MANIFEST_PATH = VECTOR_DB_DIR / "ingest_manifest.json"  # 증분 색인 상태
 LOGS_DIR = BASE_DIR / "logs"
 
+# 임베딩 모델 / 청킹 파라미터 (바뀌면 manifest가 모든 파일을 변경된 것으로 취급)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+
+# 스트리밍 수집: 스테이지 사이 큐 크기 (메모리 상한 = 큐 크기 × 조각/배치 크기)
+QUEUE_SIZE = 8
+
+# 임베딩 배치: 스트리밍 임베딩 스테이지는 encode 배치 SORT_POOL_BATCHES개 분량을 모아 길이순 정렬 (문서 경계와 무관)
+SORT_POOL_BATCHES = 4
+
 VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
 
 # 로깅 설정
@@ -37,156 +67,34 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class TextChunk:
-    """텍스트 청크 데이터 구조"""
-    chunk_id: str
-    source_file: str
-    source_type: str  # kdb, ecfr, rss
-    doc_id: str
-    page_num: Optional[int]
-    chunk_index: int
-    content: str
-    metadata: Dict
-
-
-class PDFExtractor:
-    """
-    PDF 텍스트 추출기
-    - PyMuPDF 사용
-    - 페이지별 텍스트 추출
-    - 테이블 구조 보존 시도
-    """
-
-    def extract(self, pdf_path: Path) -> List[Dict]:
-        """PDF에서 텍스트 추출"""
-        pages = []
-
-        try:
-            doc = fitz.open(pdf_path)
-            for page_num, page in enumerate(doc):
-                text = page.get_text("text")
-                # 빈 페이지 건너뛰기
-                if text.strip():
-                    pages.append({
-                        'page_num': page_num + 1,
-                        'content': self._clean_text(text)
-                    })
-            doc.close()
-            logger.info(f"Extracted {len(pages)} pages from {pdf_path.name}")
-        except Exception as e:
-            logger.error(f"Failed to extract {pdf_path}: {e}")
-
-        return pages
-
-    def _clean_text(self, text: str) -> str:
-        """텍스트 정리"""
-        # 연속 공백 정리
-        text = re.sub(r'[ \t]+', ' ', text)
-        # 연속 줄바꿈 정리
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        return text.strip()
-
-
-class TextChunker:
-    """
-    텍스트 청킹기
-    - 의미 단위로 분할
-    - 오버랩 적용으로 컨텍스트 유지
-    """
-
-    def __init__(self, chunk_size: int = 800, overlap: int = 100):
-        self.chunk_size = chunk_size
-        self.overlap = overlap
-
-    def chunk(self, text: str, metadata: Dict) -> List[TextChunk]:
-        """텍스트를 청크로 분할"""
-        chunks = []
-
-        # 문단 단위로 먼저 분할
-        paragraphs = self._split_paragraphs(text)
-
-        current_chunk = ""
-        chunk_index = 0
-
-        for para in paragraphs:
-            # 현재 청크 + 새 문단이 크기 제한 초과
-            if len(current_chunk) + len(para) > self.chunk_size:
-                if current_chunk:
-                    chunks.append(self._create_chunk(
-                        current_chunk, chunk_index, metadata
-                    ))
-                    chunk_index += 1
-
-                    # 오버랩: 마지막 부분 유지
-                    if len(current_chunk) > self.overlap:
-                        current_chunk = current_chunk[-self.overlap:] + "\n" + para
-                    else:
-                        current_chunk = para
-                else:
-                    # 단일 문단이 크기 초과 - 강제 분할
-                    for sub_chunk in self._force_split(para):
-                        chunks.append(self._create_chunk(
-                            sub_chunk, chunk_index, metadata
-                        ))
-                        chunk_index += 1
-                    current_chunk = ""
-            else:
-                current_chunk += "\n" + para if current_chunk else para
-
-        # 마지막 청크
-        if current_chunk.strip():
-            chunks.append(self._create_chunk(
-                current_chunk, chunk_index, metadata
-            ))
-
-        return chunks
-
-    def _split_paragraphs(self, text: str) -> List[str]:
-        """문단 분할"""
-        # 두 줄 이상 공백으로 분리
-        paragraphs = re.split(r'\n\s*\n', text)
-        return [p.strip() for p in paragraphs if p.strip()]
-
-    def _force_split(self, text: str) -> List[str]:
-        """강제 분할 (긴 문단)"""
-        chunks = []
-        for i in range(0, len(text), self.chunk_size - self.overlap):
-            chunks.append(text[i:i + self.chunk_size])
-        return chunks
-
-    def _create_chunk(self, content: str, index: int, metadata: Dict) -> TextChunk:
-        """청크 객체 생성"""
-        # 고유 ID 생성: doc_id + 파일명 해시 + 페이지 + 인덱스
-        import hashlib
-        source_file = metadata.get('source_file', 'unknown')
-        file_hash = hashlib.md5(source_file.encode()).hexdigest()[:8]
-        page_num = metadata.get('page_num', 0)
-        chunk_id = f"{metadata.get('doc_id', 'unknown')}_{file_hash}_p{page_num}_{index:04d}"
-
-        return TextChunk(
-            chunk_id=chunk_id,
-            source_file=source_file,
-            source_type=metadata.get('source_type', 'unknown'),
-            doc_id=metadata.get('doc_id', ''),
-            page_num=metadata.get('page_num'),
-            chunk_index=index,
-            content=content.strip(),
-            metadata=metadata
-        )
-
-
 class VectorDBBuilder:
     """
     벡터DB 구축기
-    - SentenceTransformers로 임베딩
+    - SentenceTransformers(또는 int8 ONNX)로 임베딩 - 파이프라인 실행당 하나를 모든 소스가 공유
+    - 토큰 길이순 정렬 + RAM 기준 배치 크기로 패딩 낭비 최소화
+    - embed_workers > 1: 대량 수집용 다중 프로세스 임베딩 풀 (프로세스마다 모델 사본, 스레드 수 고정)
     - ChromaDB에 저장
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        logger.info(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = EMBEDDING_MODEL, inference: str = "torch", batch_size: int = None,
+                 embed_workers: int = 1):
+        # 작업 프로세스 수 (코어/RAM이 부족하면 1 - 단일 프로세스)
+        self.embed_workers, self.embed_threads = resolve_embed_workers(embed_workers, os.cpu_count(),
+                                                                       available_memory_bytes())
+        logger.info(f"Embedding model: {model_name} ({inference}, {self.embed_workers} process)")
+        # 첫 임베딩 시 로드 (증분 실행에서 바뀐 파일이 없으면 로드하지 않음)
+        self.model = LazyModel("load embedding model", lambda: load_embedding_model(model_name, inference))
         self.model_name = model_name
+        self.inference = inference
+        self._batch_size = batch_size  # None이면 첫 임베딩 때 가용 RAM으로 결정
+        self._pool = None
+
+        # 임베딩 통계 (embed_seconds: 임베딩이 하나라도 진행 중이던 경과 시간)
+        self.embedded = 0
+        self.embed_seconds = 0.0
+        self._active = 0
+        self._active_since = 0.0
+        self._stats_lock = threading.Lock()
 
         # ChromaDB 초기화
         self.client = chromadb.PersistentClient(
@@ -194,6 +102,51 @@ class VectorDBBuilder:
             settings=Settings(anonymized_telemetry=False)
         )
 
+    @property
+    def pool(self) -> Optional[EmbeddingPool]:
+        """다중 프로세스 임베딩 풀 (embed_workers > 1일 때 첫 임베딩에서 시작, 아니면 None)"""
+        if self._pool is None and self.embed_workers > 1:
+            self._pool = EmbeddingPool(self.model_name, self.inference, self.embed_workers,
+                                       self.embed_threads, self._batch_size)
+        return self._pool
+
+    @property
+    def batch_size(self) -> int:
+        """encode 배치 크기 (지정하지 않았으면 모델 크기와 가용 RAM으로 계산 - 풀은 프로세스 수로 나눈 RAM 기준)"""
+        if self._batch_size is None and self.pool is not None:
+            self._batch_size = self.pool.batch_size
+        if self._batch_size is None:
+            max_length, dim = model_shape(self.model.get())
+            available = available_memory_bytes()
+            self._batch_size = auto_batch_size(max_length, dim, available)
+            logger.info(f"Embedding batch size: {self._batch_size} (max_length={max_length}, dim={dim}, "
+                        f"available RAM={available / 2**30 if available else float('nan'):.1f} GB)")
+        return self._batch_size
+
+    @property
+    def pool_size(self) -> int:
+        """스트리밍 임베딩 스테이지가 모아서 정렬하는 청크 수"""
+        return self.batch_size * SORT_POOL_BATCHES
+
+    @property
+    def in_flight(self) -> int:
+        """결과를 기다리지 않고 제출해 둘 배치 수 (프로세스마다 하나 - 단일 프로세스는 0)"""
+        return self.embed_workers if self.embed_workers > 1 else 0
+
+    @property
+    def embeddings_per_second(self) -> float:
+        return self.embedded / self.embed_seconds if self.embed_seconds > 0 else 0.0
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """토큰 수 (토크나이저가 없으면 문자 수로 근사)"""
+        return token_lengths(self.model.get(), texts)
+
+    def close(self):
+        """임베딩 풀 종료 (단일 프로세스면 할 일 없음)"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
     def get_or_create_collection(self, name: str) -> chromadb.Collection:
         """컬렉션 생성 또는 가져오기"""
         return self.client.get_or_create_collection(
@@ -201,39 +154,81 @@ class VectorDBBuilder:
             metadata={"model": self.model_name}
         )
 
-    def add_chunks(self, collection: chromadb.Collection, chunks: List[TextChunk], batch_size: int = 50):
-        """청크를 벡터DB에 추가"""
+    def add_chunks(self, collection: chromadb.Collection, chunks: List[TextChunk], batch_size: int = None):
+        """청크를 벡터DB에 추가 (같은 ID는 덮어씀 - 재실행해도 중복되지 않음)"""
         if not chunks:
             return
-
+        batch_size = batch_size or self.pool_size
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i:i + batch_size]
-
-            ids = [c.chunk_id for c in batch]
-            documents = [c.content for c in batch]
-            metadatas = [
-                {
-                    'source_file': c.source_file,
-                    'source_type': c.source_type,
-                    'doc_id': c.doc_id,
-                    'page_num': c.page_num or 0,
-                    'chunk_index': c.chunk_index
-                }
-                for c in batch
-            ]
-
-            # 임베딩 생성
-            embeddings = self.model.encode(documents).tolist()
-
-            # ChromaDB에 추가
-            collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
+            self.write(collection, batch, self.embed(batch))
+
+    def embed(self, chunks: List[TextChunk]) -> List[List[float]]:
+        """청크 임베딩 생성 (토큰 길이순으로 batch_size씩 encode 후 원래 순서로 복원)"""
+        return self.embed_async(chunks).result()
+
+    def embed_async(self, chunks: List[TextChunk]) -> Future:
+        """
+        청크 임베딩 제출 → Future (result()는 청크 순서의 임베딩 목록)
+
+        풀이 있으면 작업 프로세스에서 encode, 없으면 현재 프로세스에서 바로 계산한 완료된 Future
+        """
+        texts = [c.content for c in chunks]
+        if not texts:
+            future = Future()
+            future.set_result([])
+            return future
+
+        batch_size = self.batch_size  # 풀 시작/모델 로드는 통계 시간에서 제외
+        self._embed_started()
+        if self.pool is not None:
+            future = self.pool.submit(texts)
+            future.add_done_callback(lambda _: self._embed_finished(len(texts)))
+            return future
+
+        future = Future()
+        try:
+            future.set_result(encode_sorted(self.model.get(), texts, batch_size))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._embed_finished(len(texts))
+        return future
+
+    def _embed_started(self):
+        with self._stats_lock:
+            if self._active == 0:
+                self._active_since = time.perf_counter()
+            self._active += 1
+
+    def _embed_finished(self, count: int):
+        with self._stats_lock:
+            self._active -= 1
+            self.embedded += count
+            if self._active == 0:
+                self.embed_seconds += time.perf_counter() - self._active_since
+
+    def write(self, collection: chromadb.Collection, chunks: List[TextChunk], embeddings: List[List[float]],
+              batch_size: int = 500):
+        """임베딩된 청크를 ChromaDB에 upsert (기존 ID는 갱신)"""
+        for i in range(0, len(chunks), batch_size):
+            batch = chunks[i:i + batch_size]
+            collection.upsert(
+                ids=[c.chunk_id for c in batch],
+                embeddings=embeddings[i:i + batch_size],
+                documents=[c.content for c in batch],
+                metadatas=[
+                    {
+                        'source_file': c.source_file,
+                        'source_type': c.source_type,
+                        'doc_id': c.doc_id,
+                        'page_num': c.page_num or 0,
+                        'chunk_index': c.chunk_index
+                    }
+                    for c in batch
+                ]
             )
-
-            logger.info(f"Added batch {i//batch_size + 1}: {len(batch)} chunks")
+            logger.debug(f"Upserted {len(batch)} chunks")
 
     def search(self, collection: chromadb.Collection, query: str, n_results: int = 5) -> List[Dict]:
         """유사도 검색"""
@@ -256,196 +251,458 @@ class VectorDBBuilder:
         ]
 
 
-def process_kdb_documents():
-    """KDB 문서 처리"""
-    logger.info("=" * 60)
-    logger.info("KDB 문서 벡터화 시작")
-    logger.info("=" * 60)
-
-    extractor = PDFExtractor()
-    chunker = TextChunker(chunk_size=800, overlap=100)
-    builder = VectorDBBuilder()
-
-    collection = builder.get_or_create_collection("fcc_kdb")
+class IncrementalIndexer:
+    """
+    소스 하나(컬렉션 + source_type)의 증분 색인
+
+    - is_current(): manifest 기준 파일이 그대로면 True (추출/청킹/임베딩 모두 생략)
+    - changed_chunks(): 문서 조각마다 호출 - 내용이 바뀌었거나 새로 생긴 청크만 반환 (임베딩 대상)
+    - finish(): 문서의 청크가 모두 쓰인 뒤 호출 - 이번에 없는 이전 청크 ID 삭제, manifest 기록
+    - purge(): 이번 실행에서 보이지 않은 파일(원본 삭제)의 청크와 조항 색인 제거
+    - invalidate_bm25(): 컬렉션을 바꿨으면 BM25 스냅샷 삭제 (청크 ID/문서 수가 같아도 본문이 바뀜)
+    - manifest가 None이면 모든 파일을 처리 (upsert라 재실행해도 중복 없음)
+    - reparse=True면 파일이 그대로여도 다시 추출 (조항 색인 재구축용, 청크 내용이 같으면 임베딩은 생략)
+    """
 
-    kdb_dir = RAW_DATA_DIR / "kdb"
-    total_chunks = 0
-    processed_docs = 0
+    def __init__(self, builder: VectorDBBuilder, collection: chromadb.Collection, source_type: str,
+                 manifest: IngestManifest = None, section_index: SectionIndex = None, reparse: bool = False):
+        self.builder = builder
+        self.collection = collection
+        self.source_type = source_type
+        self.manifest = manifest
+        self.section_index = section_index
+        self.reparse = reparse
+        self.seen = set()
+        self.modified = False  # 이번 실행에서 컬렉션 청크를 쓰거나 삭제했는지
+        self._current: Dict[Path, Dict[str, str]] = {}  # 처리 중인 문서 → 청크 ID → 내용 해시
+        self._changed: Dict[Path, int] = {}
+
+        # 통계
+        self.skipped = 0
+        self.updated = 0
+        self.removed = 0
+        self.embedded_chunks = 0
+        self.deleted_chunks = 0
+        self.total_chunks = 0  # 처리 후 이 소스의 청크 수 (건너뛴 파일 포함)
+
+    def is_current(self, path: Path) -> bool:
+        if self.manifest is None:
+            return False
+        self.seen.add(self.manifest.key(self.collection.name, path))
+        if self.reparse or not self.manifest.unchanged(self.collection.name, path):
+            return False
+        self.skipped += 1
+        self.total_chunks += len(self.manifest.chunk_hashes(self.collection.name, path))
+        return True
+
+    def changed_chunks(self, path: Path, chunks: List[TextChunk]) -> List[TextChunk]:
+        """문서 조각의 청크 중 임베딩이 필요한 것 (manifest가 없으면 전부)"""
+        previous = self.manifest.chunk_hashes(self.collection.name, path) if self.manifest else {}
+        current = self._current.setdefault(path, {})
+        changed = []
+        for chunk in chunks:
+            digest = content_hash(chunk.content)
+            current[chunk.chunk_id] = digest
+            if previous.get(chunk.chunk_id) != digest:
+                changed.append(chunk)
+        self._changed[path] = self._changed.get(path, 0) + len(changed)
+        self.embedded_chunks += len(changed)
+        return changed
+
+    def finish(self, path: Path, doc_id: str):
+        """문서 완료 처리 (추출 실패로 청크가 하나도 없으면 이전 색인 유지)"""
+        current = self._current.pop(path, None)
+        changed = self._changed.pop(path, 0)
+        if not current:
+            return
+        self.updated += 1
+        self.modified = self.modified or changed > 0
+        self.total_chunks += len(current)
+        if self.manifest is None:
+            return
 
-    for kdb_folder in kdb_dir.iterdir():
-        if not kdb_folder.is_dir():
-            continue
+        name = self.collection.name
+        stale = [chunk_id for chunk_id in self.manifest.previous_chunk_ids(name, path) if chunk_id not in current]
+        if stale:
+            self.collection.delete(ids=stale)
+        # 파일마다 저장 - 중단되어도 다음 실행은 끝난 파일부터 건너뜀
+        self.manifest.record(name, path, doc_id, self.source_type, current)
+        self.manifest.save()
+
+        self.deleted_chunks += len(stale)
+        self.modified = self.modified or bool(stale)
+        if changed or stale:
+            logger.info(f"{Path(path).name}: {changed}개 청크 임베딩, {len(stale)}개 삭제 "
+                        f"({len(current) - changed}개 유지)")
+
+    def purge(self) -> int:
+        """원본이 사라진 파일 정리 → 제거한 파일 수"""
+        if self.manifest is None:
+            return 0
+        missing = self.manifest.missing(self.collection.name, self.source_type, self.seen)
+        for key, record in missing.items():
+            if record['chunks']:
+                self.collection.delete(ids=list(record['chunks']))
+                self.deleted_chunks += len(record['chunks'])
+            if self.section_index is not None:
+                self.section_index.remove_source(record['doc_id'], record['source_type'], record['source_file'])
+            self.manifest.forget(key)
+            logger.info(f"Removed {key}: {len(record['chunks'])} chunks")
+        if missing:
+            self.manifest.save()
+            self.modified = True
+        self.removed = len(missing)
+        return self.removed
+
+    def invalidate_bm25(self) -> bool:
+        """컬렉션이 바뀌었으면 BM25 스냅샷 삭제 (검색 엔진이 다음 로드에서 재구축)"""
+        if not self.modified or not SparseBM25Index.invalidate(BM25_INDEX_DIR / self.collection.name):
+            return False
+        logger.info(f"BM25 snapshot invalidated: {self.collection.name}")
+        return True
+
+    def summary(self) -> str:
+        return (f"변경 {self.updated}개 / 유지 {self.skipped}개 / 삭제 {self.removed}개 파일, "
+                f"임베딩 {self.embedded_chunks}개 / 삭제 {self.deleted_chunks}개 청크")
+
+
+def resolve_workers(workers: int) -> int:
+    """작업 프로세스 수 (0 이하면 CPU 코어 수)"""
+    return workers if workers and workers > 0 else (os.cpu_count() or 1)
+
+
+def iter_extracted(tasks: Iterable, workers: int = 1) -> Iterator[ExtractResult]:
+    """
+    추출+청킹 작업 결과를 제출 순서대로 반환
 
-        kdb_number = kdb_folder.name.replace("KDB_", "")
-        logger.info(f"\nProcessing KDB {kdb_number}")
+    - workers > 1: ProcessPoolExecutor (진행 중 작업은 workers * 2개로 제한 - 임베딩이 느려도 결과가 쌓이지 않음)
+    - workers == 1: 현재 프로세스에서 순차 실행
+    """
+    if workers <= 1:
+        yield from map(extract_and_chunk, tasks)
+        return
 
-        for pdf_file in kdb_folder.glob("*.pdf"):
-            # 텍스트 추출
-            pages = extractor.extract(pdf_file)
-
-            all_chunks = []
-            for page in pages:
-                metadata = {
-                    'source_file': pdf_file.name,
-                    'source_type': 'kdb',
-                    'doc_id': f"KDB_{kdb_number}",
-                    'page_num': page['page_num']
-                }
-                chunks = chunker.chunk(page['content'], metadata)
-                all_chunks.extend(chunks)
-
-            # 벡터DB에 추가
-            if all_chunks:
-                builder.add_chunks(collection, all_chunks)
-                total_chunks += len(all_chunks)
-                processed_docs += 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(extract_and_chunk, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-    logger.info(f"\n{'='*60}")
-    logger.info(f"KDB 처리 완료: {processed_docs}개 문서, {total_chunks}개 청크")
-    logger.info(f"{'='*60}")
 
-    return collection, total_chunks
+@dataclass
+class DocumentPiece:
+    """스트리밍 단위 - 문서 일부(PDF 페이지 구간, txt는 문서 전체)의 청크"""
+    path: Path
+    doc_id: str
+    pages: List[tuple]   # [(페이지 번호, 페이지 텍스트 또는 None, TextChunk 목록), ...]
+    page_count: int = 0
 
+    def chunks(self) -> List[TextChunk]:
+        return [chunk for _, _, chunks in self.pages for chunk in chunks]
 
-def process_ecfr_documents():
-    """eCFR 문서 처리"""
-    logger.info("=" * 60)
-    logger.info("eCFR 문서 벡터화 시작")
-    logger.info("=" * 60)
 
-    chunker = TextChunker(chunk_size=800, overlap=100)
-    builder = VectorDBBuilder()
+@dataclass
+class DocumentEnd:
+    """문서의 마지막 조각 뒤에 오는 표시 (쓰기 스테이지가 받으면 manifest 기록/이전 청크 삭제)"""
+    path: Path
+    doc_id: str
 
-    collection = builder.get_or_create_collection("fcc_ecfr")
 
-    ecfr_dir = RAW_DATA_DIR / "ecfr"
-    total_chunks = 0
+def pdf_pieces(documents: List[Tuple[Path, str]], source_type: str, workers: int = 1,
+               keep_text: bool = False) -> Iterator:
+    """
+    PDF 문서 [(경로, doc_id), ...] → DocumentPiece(페이지 구간별) / DocumentEnd 스트림
 
-    for txt_file in ecfr_dir.glob("*.txt"):
+    추출/정리/청킹은 작업 프로세스에서 PAGES_PER_TASK 페이지 구간 단위로 실행 (큰 PDF도 구간만큼만 메모리 사용)
+    """
+    workers = resolve_workers(workers)
+    pages_total, worker_seconds = 0, 0.0
+    tasks = (task for path, doc_id in documents
+             for task in split_pdf_tasks(path, source_type, doc_id, CHUNK_SIZE, CHUNK_OVERLAP, keep_text))
+
+    current = None
+    for result in iter_extracted(tasks, workers):
+        path = Path(result.task.path)
+        if current is not None and current.path != path:
+            yield current
+        current = DocumentEnd(path, result.task.doc_id)
+        pages_total += result.page_count
+        worker_seconds += result.seconds
+        yield DocumentPiece(path, result.task.doc_id, result.page_chunks(), result.page_count)
+    if current is not None:
+        yield current
+
+    if pages_total:
+        logger.info(f"{source_type} 추출/청킹: {pages_total}페이지, 작업 프로세스 {workers}개, "
+                    f"프로세스당 {pages_total / max(worker_seconds, 1e-9):.1f} pages/s")
+
+
+def text_pieces(files: List[Path], source_type: str) -> Iterator:
+    """txt 문서 → DocumentPiece(문서 전체 1개) / DocumentEnd 스트림 (doc_id는 파일명)"""
+    chunker = TextChunker(chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+    for txt_file in files:
         logger.info(f"Processing {txt_file.name}")
-
         with open(txt_file, 'r', encoding='utf-8') as f:
             content = f.read()
 
         metadata = {
             'source_file': txt_file.name,
-            'source_type': 'ecfr',
+            'source_type': source_type,
             'doc_id': txt_file.stem
         }
+        yield DocumentPiece(txt_file, txt_file.stem, [(None, content, chunker.chunk(content, metadata))], 1)
+        yield DocumentEnd(txt_file, txt_file.stem)
+
+
+def with_section_index(pieces: Iterable, section_index: Optional[SectionIndex], source_type: str) -> Iterator:
+    """조각을 그대로 흘려보내며 문서가 끝나면 조항 색인 등록 (현재 문서 텍스트만 보관)"""
+    pages = []
+    for item in pieces:
+        if section_index is not None:
+            if isinstance(item, DocumentPiece):
+                pages.extend((text, chunks) for _, text, chunks in item.pages if text is not None)
+            elif pages:
+                metadata = {'source_file': item.path.name, 'source_type': source_type, 'doc_id': item.doc_id}
+                index_sections(section_index, metadata, pages)
+                pages = []
+        yield item
+
+
+def stream_ingest(indexer: IncrementalIndexer, pieces: Iterable, batch_size: int = None,
+                  queue_size: int = QUEUE_SIZE) -> List[StageStats]:
+    """
+    extract → embed → write 스트리밍 실행 (스테이지별 스레드, 크기 제한 큐)
 
-        chunks = chunker.chunk(content, metadata)
+    - extract: pieces 생성 (추출/정리/청킹 - PDF는 프로세스 풀)
+    - embed: 바뀐 청크만 batch_size개씩 모아 임베딩 (문서 경계와 무관하게 큰 배치,
+      기본은 builder.pool_size - 모은 청크를 토큰 길이순으로 encode)
+      임베딩 풀이 있으면 builder.in_flight개 배치를 동시에 제출하고 결과는 제출 순서대로 전달
+    - write: ChromaDB upsert, 문서가 끝나면 indexer.finish() (manifest 기록/이전 청크 삭제)
+    """
+    builder, collection = indexer.builder, indexer.collection
+    batch = []
+    waiting = []      # [(앞선 청크 중 아직 배치에 남은 수, DocumentEnd), ...]
+    outbox = deque()  # 제출 순서: (청크, 임베딩 Future) 또는 DocumentEnd
+    pending = [0]     # outbox 안의 임베딩 배치 수
+
+    def send(count: int):
+        chunks = batch[:count]
+        del batch[:count]
+        outbox.append((chunks, builder.embed_async(chunks)))
+        pending[0] += 1
+        # 앞선 청크가 모두 제출된 문서 완료 표시만 통과 (쓰기 스테이지에서 청크 뒤에 처리되도록)
+        for entry in waiting:
+            entry[0] -= count
+        while waiting and waiting[0][0] <= 0:
+            outbox.append(waiting.pop(0)[1])
+
+    def drain(emit, keep: int) -> int:
+        """진행 중 배치가 keep개 이하가 될 때까지 앞에서부터 결과를 기다려 전달"""
+        embedded = 0
+        while outbox and (isinstance(outbox[0], DocumentEnd) or pending[0] > keep):
+            item = outbox.popleft()
+            if isinstance(item, DocumentEnd):
+                emit(item)
+                continue
+            chunks, future = item
+            pending[0] -= 1
+            emit((chunks, future.result()))
+            embedded += len(chunks)
+        return embedded
+
+    def embed(item, emit) -> int:
+        if isinstance(item, DocumentEnd):
+            if batch:
+                waiting.append([len(batch), item])
+            else:
+                outbox.append(item)
+            return drain(emit, builder.in_flight)
+        batch.extend(indexer.changed_chunks(item.path, item.chunks()))
+        if batch:
+            limit = batch_size or builder.pool_size
+            while len(batch) >= limit:
+                send(limit)
+        return drain(emit, builder.in_flight)
+
+    def flush(emit) -> int:
+        if batch:
+            send(len(batch))
+        outbox.extend(item for _, item in waiting)
+        waiting.clear()
+        return drain(emit, 0)
+
+    def write(item, emit) -> int:
+        if isinstance(item, DocumentEnd):
+            indexer.finish(item.path, item.doc_id)
+            return 0
+        chunks, embeddings = item
+        builder.write(collection, chunks, embeddings)
+        return len(chunks)
+
+    pipeline = StreamingPipeline(queue_size) \
+        .stage("embed", embed, flush=flush, unit_name="chunks") \
+        .stage("write", write, unit_name="chunks")
+    stats = pipeline.run(pieces, source_name="extract", source_unit=lambda item: getattr(item, 'page_count', 0),
+                         source_unit_name="pages")
+    logger.info(f"[{indexer.source_type}] 스트리밍 수집 스테이지별 처리량\n{format_stats(stats)}")
+    return stats
+
+
+def process_kdb_documents(section_index: SectionIndex = None, collection_name: str = "fcc_kdb",
+                          manifest: IngestManifest = None, reparse: bool = False, workers: int = 1,
+                          builder: VectorDBBuilder = None):
+    """
+    KDB 문서 처리 (section_index가 주어지면 헤딩 조항도 색인, manifest가 주어지면 바뀐 파일만)
 
-        if chunks:
-            builder.add_chunks(collection, chunks)
-            total_chunks += len(chunks)
+    workers: PDF 추출/청킹 프로세스 수 (1이면 순차, 0이면 CPU 코어 수)
+    builder: 공유 임베딩 모델/DB 연결 (없으면 새로 생성)
+    """
+    logger.info("=" * 60)
+    logger.info("KDB 문서 벡터화 시작")
+    logger.info("=" * 60)
 
-    logger.info(f"\neCFR 처리 완료: {total_chunks}개 청크")
+    builder = builder or VectorDBBuilder()
 
-    return collection, total_chunks
+    collection = builder.get_or_create_collection(collection_name)
+    indexer = IncrementalIndexer(builder, collection, 'kdb', manifest, section_index, reparse)
 
+    kdb_dir = RAW_DATA_DIR / "kdb"
+    documents = []
 
-def process_rss_documents():
-    """RSS 문서 처리"""
-    logger.info("=" * 60)
-    logger.info("RSS 문서 벡터화 시작")
-    logger.info("=" * 60)
+    for kdb_folder in kdb_dir.iterdir():
+        if not kdb_folder.is_dir():
+            continue
 
-    chunker = TextChunker(chunk_size=800, overlap=100)
-    builder = VectorDBBuilder()
+        kdb_number = kdb_folder.name.replace("KDB_", "")
+        for pdf_file in kdb_folder.glob("*.pdf"):
+            if not indexer.is_current(pdf_file):
+                documents.append((pdf_file, f"KDB_{kdb_number}"))
 
-    collection = builder.get_or_create_collection("ised_rss")
+    # 추출/청킹 → 임베딩 → 저장 스트리밍 (조항 색인은 문서가 끝날 때 등록)
+    pieces = pdf_pieces(documents, 'kdb', workers, keep_text=section_index is not None)
+    stream_ingest(indexer, with_section_index(pieces, section_index, 'kdb'))
 
-    rss_dir = RAW_DATA_DIR / "rss"
-    total_chunks = 0
+    indexer.purge()
+    indexer.invalidate_bm25()
 
-    for txt_file in rss_dir.glob("*.txt"):
-        logger.info(f"Processing {txt_file.name}")
+    logger.info(f"\n{'='*60}")
+    logger.info(f"KDB 처리 완료: {indexer.total_chunks}개 청크 ({indexer.summary()})")
+    logger.info(f"{'='*60}")
 
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+    return collection, indexer.total_chunks
 
-        metadata = {
-            'source_file': txt_file.name,
-            'source_type': 'rss',
-            'doc_id': txt_file.stem
-        }
 
-        chunks = chunker.chunk(content, metadata)
+def process_text_documents(source_type: str, source_dir: Path, section_index: SectionIndex = None,
+                           collection_name: str = None, manifest: IngestManifest = None, reparse: bool = False,
+                           builder: VectorDBBuilder = None):
+    """txt 문서 폴더 처리 (eCFR/RSS 공통 - doc_id는 파일명)"""
+    builder = builder or VectorDBBuilder()
 
-        if chunks:
-            builder.add_chunks(collection, chunks)
-            total_chunks += len(chunks)
+    collection = builder.get_or_create_collection(collection_name)
+    indexer = IncrementalIndexer(builder, collection, source_type, manifest, section_index, reparse)
 
-    logger.info(f"\nRSS 처리 완료: {total_chunks}개 청크")
+    files = [txt_file for txt_file in source_dir.glob("*.txt") if not indexer.is_current(txt_file)]
+    stream_ingest(indexer, with_section_index(text_pieces(files, source_type), section_index, source_type))
 
-    return collection, total_chunks
+    indexer.purge()
+    indexer.invalidate_bm25()
+    return collection, indexer
 
 
-def process_testreport_documents():
-    """Test Report 문서 처리"""
+def process_ecfr_documents(section_index: SectionIndex = None, collection_name: str = "fcc_ecfr",
+                           manifest: IngestManifest = None, reparse: bool = False,
+                           builder: VectorDBBuilder = None):
+    """eCFR 문서 처리 (section_index가 주어지면 조항도 색인, manifest가 주어지면 바뀐 파일만)"""
     logger.info("=" * 60)
-    logger.info("Test Report 문서 벡터화 시작")
+    logger.info("eCFR 문서 벡터화 시작")
     logger.info("=" * 60)
 
-    extractor = PDFExtractor()
-    chunker = TextChunker(chunk_size=800, overlap=100)
-    builder = VectorDBBuilder()
+    collection, indexer = process_text_documents('ecfr', RAW_DATA_DIR / "ecfr", section_index,
+                                                 collection_name, manifest, reparse, builder)
+
+    logger.info(f"\neCFR 처리 완료: {indexer.total_chunks}개 청크 ({indexer.summary()})")
 
-    collection = builder.get_or_create_collection("fcc_testreport")
+    return collection, indexer.total_chunks
 
+
+def process_rss_documents(section_index: SectionIndex = None, collection_name: str = "ised_rss",
+                          manifest: IngestManifest = None, reparse: bool = False,
+                          builder: VectorDBBuilder = None):
+    """RSS 문서 처리 (section_index가 주어지면 조항도 색인, manifest가 주어지면 바뀐 파일만)"""
+    logger.info("=" * 60)
+    logger.info("RSS 문서 벡터화 시작")
+    logger.info("=" * 60)
+
+    collection, indexer = process_text_documents('rss', RAW_DATA_DIR / "rss", section_index,
+                                                 collection_name, manifest, reparse, builder)
+
+    logger.info(f"\nRSS 처리 완료: {indexer.total_chunks}개 청크 ({indexer.summary()})")
+
+    return collection, indexer.total_chunks
+
+
+def ingest_testreports(collection_name: str = "fcc_testreport", manifest: IngestManifest = None,
+                       workers: int = 1, builder: VectorDBBuilder = None):
+    """Test Report 폴더 증분 수집 → (collection, indexer), 폴더가 없으면 (None, None)"""
     testreport_dir = BASE_DIR / "aidata" / "Testreport"
-    total_chunks = 0
-    processed_docs = 0
 
     if not testreport_dir.exists():
         logger.warning(f"Test Report 폴더가 없습니다: {testreport_dir}")
-        return None, 0
+        return None, None
 
-    for pdf_file in testreport_dir.glob("*.pdf"):
-        logger.info(f"\nProcessing {pdf_file.name}")
+    builder = builder or VectorDBBuilder()
+    collection = builder.get_or_create_collection(collection_name)
+    indexer = IncrementalIndexer(builder, collection, 'testreport', manifest)
 
-        # 파일명에서 리포트 타입 추출
-        # 예: S-4791615583-E11V1 FCC Report UNII(6E) WLAN.pdf
-        report_name = pdf_file.stem
+    # 파일명이 곧 리포트 ID
+    # 예: S-4791615583-E11V1 FCC Report UNII(6E) WLAN.pdf
+    documents = [(pdf_file, pdf_file.stem) for pdf_file in testreport_dir.glob("*.pdf")
+                 if not indexer.is_current(pdf_file)]
 
-        # 텍스트 추출
-        pages = extractor.extract(pdf_file)
+    # 추출/청킹 → 임베딩 → 저장 스트리밍 (수백 페이지 리포트도 페이지 구간 단위로 흘러감)
+    stream_ingest(indexer, pdf_pieces(documents, 'testreport', workers))
 
-        all_chunks = []
-        for page in pages:
-            metadata = {
-                'source_file': pdf_file.name,
-                'source_type': 'testreport',
-                'doc_id': report_name,
-                'page_num': page['page_num']
-            }
-            chunks = chunker.chunk(page['content'], metadata)
-            all_chunks.extend(chunks)
+    indexer.purge()
+    indexer.invalidate_bm25()
+    return collection, indexer
+
+
+def process_testreport_documents(collection_name: str = "fcc_testreport", manifest: IngestManifest = None,
+                                 workers: int = 1, builder: VectorDBBuilder = None):
+    """
+    Test Report 문서 처리 (manifest가 주어지면 바뀐 파일만 - 새 리포트 하나 추가는 그 파일만 임베딩)
+
+    workers: PDF 추출/청킹 프로세스 수 (1이면 순차, 0이면 CPU 코어 수 - 수백 페이지 리포트는 페이지 구간 분할)
+    builder: 공유 임베딩 모델/DB 연결 (없으면 새로 생성)
+    """
+    logger.info("=" * 60)
+    logger.info("Test Report 문서 벡터화 시작")
+    logger.info("=" * 60)
 
-        # 벡터DB에 추가
-        if all_chunks:
-            builder.add_chunks(collection, all_chunks)
-            total_chunks += len(all_chunks)
-            processed_docs += 1
-            logger.info(f"  -> {len(all_chunks)}개 청크 추가")
+    collection, indexer = ingest_testreports(collection_name, manifest, workers, builder)
+    if indexer is None:
+        return None, 0
 
     logger.info(f"\n{'='*60}")
-    logger.info(f"Test Report 처리 완료: {processed_docs}개 문서, {total_chunks}개 청크")
+    logger.info(f"Test Report 처리 완료: {indexer.total_chunks}개 청크 ({indexer.summary()})")
     logger.info(f"{'='*60}")
 
-    return collection, total_chunks
+    return collection, indexer.total_chunks
 
 
-def test_search():
-    """검색 테스트"""
+def test_search(collection_name: str = "fcc_kdb", builder: VectorDBBuilder = None):
+    """검색 테스트 (builder: 파이프라인이 쓰던 모델 재사용)"""
     logger.info("\n" + "=" * 60)
     logger.info("검색 테스트")
     logger.info("=" * 60)
 
-    builder = VectorDBBuilder()
+    builder = builder or VectorDBBuilder()
 
-    # KDB 검색 테스트
-    kdb_collection = builder.get_or_create_collection("fcc_kdb")
+    # KDB 검색 테스트 (통합 컬렉션이면 전체 소스)
+    kdb_collection = builder.get_or_create_collection(collection_name)
 
     test_queries = [
         "DFS test procedure",
@@ -462,22 +719,98 @@ def test_search():
             logger.info(f"      {r['document'][:100]}...")
 
 
-def main():
-    """메인 실행"""
+def index_sections(section_index: Optional[SectionIndex], metadata: Dict,
+                   pages: List[tuple]) -> int:
+    """
+    조항 색인에 문서 등록
+
+    Args:
+        pages: [(페이지 텍스트, 해당 페이지 청크 목록), ...] - txt 문서는 1개
+    """
+    if section_index is None:
+        return 0
+
+    texts, chunk_spans = [], []
+    offset = 0
+    for text, chunks in pages:
+        texts.append(text)
+        chunk_spans.extend((c.chunk_id, offset + c.char_start, offset + c.char_end) for c in chunks)
+        offset += len(text) + 2  # 페이지 구분 "\n\n"
+
+    count = section_index.add_document(
+        metadata['doc_id'], metadata['source_type'], metadata['source_file'],
+        "\n\n".join(texts), chunk_spans
+    )
+    if count:
+        logger.info(f"  -> {count}개 조항 색인")
+    return count
+
+
+def load_manifest(builder: VectorDBBuilder, full: bool = False) -> IngestManifest:
+    """증분 색인 상태 (모델/추론 엔진/청킹 파라미터가 바뀌면 전체 재임베딩, full이면 빈 상태)"""
+    manifest = IngestManifest.load(MANIFEST_PATH, model=f"{builder.model_name}:{builder.inference}",
+                                   chunker={'chunk_size': CHUNK_SIZE, 'overlap': CHUNK_OVERLAP},
+                                   root=BASE_DIR)
+    if full:
+        manifest.clear()
+    return manifest
+
+
+def main(unified: Optional[bool] = None, inference: str = "torch", full: bool = False, workers: int = 1,
+         batch_size: int = None, embed_workers: int = 1):
+    """
+    메인 실행
+
+    Args:
+        unified: 네 소스를 regulatory_corpus 한 컬렉션에 저장 (source_type/doc_id 메타데이터로 필터)
+                 None이면 벡터DB에 기록된 구성을 따름 (검색 엔진도 같은 기록을 읽음)
+        inference: 임베딩 엔진 ('onnx'는 int8 ONNX Runtime - 검색 쪽도 같은 엔진 권장)
+        full: manifest를 무시하고 모든 파일을 다시 추출/임베딩 (기본은 바뀐 파일만)
+        workers: KDB/Test Report PDF 추출/청킹 프로세스 수 (1이면 순차, 0이면 CPU 코어 수)
+        batch_size: 임베딩 encode 배치 크기 (None이면 가용 RAM 기준 자동)
+        embed_workers: 임베딩 프로세스 수 (1이면 단일 프로세스, 0이면 코어 수 기준 - 코어/RAM이 부족하면 1)
+    """
     logger.info("벡터DB 파이프라인 시작")
     logger.info(f"저장 위치: {VECTOR_DB_DIR}")
+    if unified is None:
+        unified = read_layout(VECTOR_DB_DIR) == LAYOUT_UNIFIED
+    if unified:
+        logger.info(f"통합 컬렉션: {UNIFIED_COLLECTION}")
+
+    def target(name: str) -> str:
+        return UNIFIED_COLLECTION if unified else name
+
+    # 임베딩 모델/DB 연결은 모든 소스와 검색 테스트가 공유 (모델 로드 1회)
+    builder = VectorDBBuilder(inference=inference, batch_size=batch_size, embed_workers=embed_workers)
+    manifest = load_manifest(builder, full)
+
+    # 조항 인용 색인 (KDB/eCFR/RSS 처리 중 함께 구축 - 증분 실행은 기존 색인에 바뀐 문서만 교체)
+    section_index = SectionIndex(SECTION_INDEX_DIR) if full else SectionIndex.load(SECTION_INDEX_DIR)
+    # 조항 색인 파일이 없으면 그대로인 파일도 다시 추출 - 청크 내용이 같으면 임베딩은 생략
+    reparse = bool(manifest.files) and not full and not (SECTION_INDEX_DIR / "sections.json").exists()
+    if reparse:
+        logger.warning("Section index missing - re-extracting KDB/eCFR/RSS documents")
 
     # KDB 처리
-    kdb_collection, kdb_chunks = process_kdb_documents()
+    kdb_collection, kdb_chunks = process_kdb_documents(section_index, target("fcc_kdb"), manifest, reparse,
+                                                       workers=workers, builder=builder)
 
     # eCFR 처리
-    ecfr_collection, ecfr_chunks = process_ecfr_documents()
+    ecfr_collection, ecfr_chunks = process_ecfr_documents(section_index, target("fcc_ecfr"), manifest, reparse,
+                                                          builder=builder)
 
     # RSS 처리
-    rss_collection, rss_chunks = process_rss_documents()
+    rss_collection, rss_chunks = process_rss_documents(section_index, target("ised_rss"), manifest, reparse,
+                                                       builder=builder)
+
+    section_index.save()
 
     # Test Report 처리
-    testreport_collection, testreport_chunks = process_testreport_documents()
+    testreport_collection, testreport_chunks = process_testreport_documents(target("fcc_testreport"), manifest,
+                                                                            workers=workers, builder=builder)
+
+    # 검색 엔진이 방금 수집한 컬렉션 구성을 읽도록 기록
+    write_layout(VECTOR_DB_DIR, LAYOUT_UNIFIED if unified else LAYOUT_SEPARATE)
 
     # 요약
     logger.info("\n" + "=" * 60)
@@ -487,10 +820,16 @@ def main():
     logger.info(f"eCFR: {ecfr_chunks}개 청크")
     logger.info(f"RSS: {rss_chunks}개 청크")
     logger.info(f"Test Report: {testreport_chunks}개 청크")
+    logger.info(f"조항 색인: {len(section_index)}개 인용")
     logger.info(f"총: {kdb_chunks + ecfr_chunks + rss_chunks + testreport_chunks}개 청크")
+    if builder.embedded:
+        logger.info(f"임베딩: {builder.embedded}개, {builder.embeddings_per_second:.1f} embeddings/s "
+                    f"(배치 {builder.batch_size}, 정렬 단위 {builder.pool_size}, "
+                    f"프로세스 {builder.embed_workers} × 스레드 {builder.embed_threads or '기본'})")
+    builder.close()
 
     # 검색 테스트
-    test_search()
+    test_search(target("fcc_kdb"), builder)
 
     return {
         'kdb_chunks': kdb_chunks,
@@ -502,4 +841,23 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="벡터DB 구축")
+    layout = parser.add_mutually_exclusive_group()
+    layout.add_argument('--unified', action='store_const', const=True, dest='unified',
+                        help=f"소스별 컬렉션 대신 {UNIFIED_COLLECTION} 하나에 저장 (기본: 기록된 구성)")
+    layout.add_argument('--separate', action='store_const', const=False, dest='unified',
+                        help="소스별 컬렉션에 저장 (기본: 기록된 구성)")
+    parser.add_argument('--inference', choices=['torch', 'onnx'], default='torch',
+                        help="임베딩 추론 엔진 (onnx: onnx_models.py export 필요)")
+    parser.add_argument('--full', action='store_true',
+                        help="증분 manifest를 무시하고 전체 재색인")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="PDF 추출/청킹 프로세스 수 (0: CPU 코어 수)")
+    parser.add_argument('--batch-size', type=int,
+                        help="임베딩 encode 배치 크기 (기본: 가용 RAM 기준 자동)")
+    parser.add_argument('--embed-workers', type=int, default=1,
+                        help="임베딩 프로세스 수 (0: 코어 수 기준 자동, 코어/RAM이 부족하면 단일 프로세스)")
+    args = parser.parse_args()
+    main(unified=args.unified, inference=args.inference, full=args.full, workers=args.workers,
+         batch_size=args.batch_size, embed_workers=args.embed_workers)